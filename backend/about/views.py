@@ -9,13 +9,16 @@ from .serializers import AboutHighlightSerializer
 class AboutHighlightViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AboutHighlight.objects.filter(is_active=True).order_by("order")
     serializer_class = AboutHighlightSerializer
+    ordering = ("order", "id")
 
 
 class AboutCardViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AboutCard.objects.all()
     serializer_class = AboutCardSerializer
+    ordering = ("order", "id")
 
 
 class AboutPageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AboutPage.objects.filter(is_active=True).order_by("order")
     serializer_class = AboutPageSerializer
+    ordering = ("order", "id")
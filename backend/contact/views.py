@@ -18,3 +18,4 @@ class ContactListView(generics.ListAPIView):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.IsAdminUser]
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,167 @@
+# core/pagination.py
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+KeysetPage = namedtuple("KeysetPage", ["object_list", "next_cursor", "previous_cursor"])
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, reverse=False):
+    payload = {"v": [_dump(v) for v in values]}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload["v"]), bool(payload.get("r"))
+    except (ValueError, KeyError, TypeError):
+        raise NotFound("Invalid cursor")
+
+
+class KeysetPaginator:
+    """
+    Seek-based paging over a fixed ordering such as ("order", "-created", "-id").
+
+    The cursor stores the ordering values of the last row of a page and the next
+    page is fetched with a WHERE on those values instead of an OFFSET, so deep
+    pages cost the same as the first one. The ordering must end with a unique,
+    non-null field.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.fields = [(f.lstrip("-"), f.startswith("-")) for f in self.ordering]
+
+    def _to_python(self, values):
+        if len(values) != len(self.fields):
+            raise NotFound("Invalid cursor")
+        opts = self.queryset.model._meta
+        out = []
+        for (name, _desc), value in zip(self.fields, values):
+            try:
+                out.append(opts.get_field(name).to_python(value))
+            except FieldDoesNotExist:
+                out.append(value)
+            except ValidationError:
+                raise NotFound("Invalid cursor")
+        return out
+
+    def _seek(self, values, reverse):
+        # (a, b, c) after (x, y, z)  ->  a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z))
+        # the leading a >= x gives SQLite an index range to start from
+        condition = Q()
+        prefix = {}
+        for (name, desc), value in zip(self.fields, values):
+            lookup = "lt" if desc != reverse else "gt"
+            condition |= Q(**prefix, **{f"{name}__{lookup}": value})
+            prefix[name] = value
+        (first, desc), value = self.fields[0], values[0]
+        return Q(**{f"{first}__{'lte' if desc != reverse else 'gte'}": value}) & condition
+
+    def _position(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name, _desc in self.fields]
+        return [getattr(row, name) for name, _desc in self.fields]
+
+    def page(self, cursor=None):
+        qs = self.queryset
+        reverse = False
+        if cursor:
+            values, reverse = decode_cursor(cursor)
+            qs = qs.filter(self._seek(self._to_python(values), reverse))
+
+        if reverse:
+            ordering = [f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering]
+        else:
+            ordering = self.ordering
+        rows = list(qs.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+        if not rows:
+            return KeysetPage(rows, None, None)
+
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        next_cursor = encode_cursor(self._position(rows[-1])) if has_next else None
+        previous_cursor = encode_cursor(self._position(rows[0]), reverse=True) if has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+
+class BoundedCursorPagination(CursorPagination):
+    """
+    Default pagination for every list endpoint (see REST_FRAMEWORK in settings).
+    - pages are capped at max_page_size whatever ?page_size= asks for
+    - views declare a stable `ordering` (ending in a unique field); "id" otherwise
+    - pages seek on the whole ordering (KeysetPaginator), so a long run of equal
+      leading values such as order=0 costs no more than any other page
+    - staff can still fetch the whole table with ?all=1
+    Responses keep CursorPagination's {next, previous, results} shape.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = getattr(view, "ordering", None) or type(self).ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if wants_all(request):
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, queryset, view)
+        paginator = KeysetPaginator(queryset, ordering, self.page_size)
+        self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        self.has_next = self.page.next_cursor is not None
+        self.has_previous = self.page.previous_cursor is not None
+        return list(self.page.object_list)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+
+def wants_all(request):
+    user = getattr(request, "user", None)
+    return (
+        request.query_params.get("all") in ("1", "true")
+        and user is not None
+        and user.is_staff
+    )
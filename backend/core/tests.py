@@ -1,3 +1,82 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from home.models import OfferStrip
+
+from .pagination import BoundedCursorPagination
+
+
+class BoundedCursorPaginationTests(TestCase):
+    """Default list pagination, on /api/offer-strips/ (ordering ("order", "id"))."""
+
+    url = "/api/offer-strips/"
+
+    @classmethod
+    def setUpTestData(cls):
+        # every strip ties on order, so paging has to seek on (order, id)
+        OfferStrip.objects.bulk_create(
+            OfferStrip(title=f"strip {i}", product_image="offer_strip/x.png") for i in range(130)
+        )
+        cls.ids = list(OfferStrip.objects.order_by("order", "id").values_list("id", flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            seen += [row["id"] for row in data["results"]]
+            url, pages = data["next"], pages + 1
+        return seen, pages
+
+    def test_pages_walk_tied_ordering_without_gaps_or_repeats(self):
+        seen, pages = self.walk(f"{self.url}?page_size=25")
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(pages, 6)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(f"{self.url}?page_size=25").json()
+        second = self.client.get(first["next"]).json()
+        self.assertIsNone(first["previous"])
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_seek_is_one_query_on_the_whole_ordering(self):
+        first = self.client.get(f"{self.url}?page_size=25").json()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first["next"])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertIn('"order" >', sql)
+        self.assertIn('"id" >', sql)
+
+    def test_page_size_is_capped(self):
+        data = self.client.get(f"{self.url}?page_size=1000").json()
+        self.assertEqual(len(data["results"]), BoundedCursorPagination.max_page_size)
+        self.assertEqual(len(self.client.get(self.url).json()["results"]), BoundedCursorPagination.page_size)
+        self.assertEqual(len(self.client.get(f"{self.url}?page_size=abc").json()["results"]), 20)
+
+    def test_all_is_staff_only(self):
+        self.assertEqual(len(self.client.get(f"{self.url}?all=1").json()["results"]), 20)
+        self.client.force_authenticate(User.objects.create_user("shopper", password="x"))
+        self.assertEqual(len(self.client.get(f"{self.url}?all=1").json()["results"]), 20)
+        self.client.force_authenticate(User.objects.create_user("admin", password="x", is_staff=True))
+        data = self.client.get(f"{self.url}?all=true").json()
+        self.assertEqual([row["id"] for row in data], self.ids)
+
+    def test_tampered_cursor_is_not_found(self):
+        self.assertEqual(self.client.get(f"{self.url}?cursor=bm9wZQ").status_code, 404)
+
+    def test_list_data_contract(self):
+        # fronteng/src/lib/api.js listData(): an array, or an object with a `results` array
+        data = self.client.get(self.url).json()
+        self.assertEqual(set(data), {"next", "previous", "results"})
+        self.assertIsInstance(data["results"], list)
+        self.assertEqual(set(data["results"][0]), {
+            "id", "title", "subtitle", "product_image_url", "button_text", "link",
+            "background_color", "text_color", "order",
+        })
@@ -20,6 +20,7 @@ class MegaMenuViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin, mixins
     ).all()
     serializer_class = MegaMenuSerializer
     lookup_field = "key"
+    ordering = ("order", "id")
 
     # No need to override retrieve in most cases — the mixin covers it.
     # But if you want a custom error message or custom logic you can override.
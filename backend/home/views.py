@@ -24,6 +24,7 @@ class CarousalBanner3ViewSet(viewsets.ModelViewSet):
     queryset = CarousalBanner3.objects.all().order_by("order", "-created_at")
     serializer_class = CarousalBanner3Serializer
     permission_classes = [permissions.AllowAny]
+    ordering = ("order", "-created_at", "-id")
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -42,6 +43,7 @@ class CarousalBanner2ViewSet(viewsets.ModelViewSet):
     queryset = CarousalBanner2.objects.all().order_by("order", "-created_at")
     serializer_class = CarousalBanner2Serializer
     permission_classes = [permissions.AllowAny]
+    ordering = ("order", "-created_at", "-id")
 
     def get_queryset(self):
         # If called by frontend (AllowAny) we can optionally filter to active banners only
@@ -65,16 +67,19 @@ class CarousalBanner1ViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = CarousalBanner1.objects.filter(is_active=True).order_by("-created_at")
     serializer_class = CarousalBanner1Serializer
     permission_classes = [AllowAny]
+    ordering = ("-created_at", "-id")
 
 
 class PetServiceViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = PetService.objects.all()
     serializer_class = PetServiceSerializer
+    ordering = ("order", "id")
 
 
 class OfferStripViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = OfferStrip.objects.all()
     serializer_class = OfferStripSerializer
+    ordering = ("order", "id")
 
 
 class PromoBannerViewSet(viewsets.ReadOnlyModelViewSet):
@@ -85,3 +90,4 @@ class PromoBannerViewSet(viewsets.ReadOnlyModelViewSet):
 class PetCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = HomeCategory.objects.order_by('id')
     serializer_class = PetCategorySerializer
+    ordering = ("id",)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_billing_address_line2_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product_id', 'created'], name='orders_item_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['created'], name='orders_item_created_idx'),
+        ),
+    ]
@@ -47,6 +47,13 @@ class OrderItem(TimeStamped):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            # units sold per product (pets.bestsellers), which product_id had no index for
+            models.Index(fields=["product_id", "created"], name="orders_item_product_idx"),
+            models.Index(fields=["created"], name="orders_item_created_idx"),
+        ]
+
     def subtotal(self):
         return self.quantity * self.price
 
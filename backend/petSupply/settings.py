@@ -161,6 +161,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.BoundedCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
 from datetime import timedelta
@@ -174,6 +176,18 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
 
+# Serve /api/pet-products/ and /api/pet-page/ from a per-worker in-memory
+# catalog snapshot (pets/snapshot.py). Needs a shared CACHES backend when
+# running several workers, see pets/catalog.py.
+PETS_CATALOG_SNAPSHOT = False
+
+# Path of the memory-mapped catalog file shared by all workers (pets/catalog_file.py);
+# None disables it. Write the first one with `manage.py write_catalog_file`.
+PETS_CATALOG_FILE = None
+# Seconds after a catalog change before the file is rewritten in the background;
+# changes in between share one rewrite. 0 rewrites synchronously on commit.
+PETS_CATALOG_FILE_DELAY = 1.0
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -1,11 +1,11 @@
 # petshop/admin.py
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import PetCategory, PetProduct, PetBanner, ProductReview
+from .models import Brand, PetCategory, PetProduct, PetBanner, ProductCategory, ProductReview
 
 @admin.register(PetCategory)
 class PetCategoryAdmin(admin.ModelAdmin):
-    list_display = ("title", "pet_type", "group", "order", "thumb")
+    list_display = ("title", "pet_type", "group", "order", "product_count", "thumb")
     list_filter = ("pet_type", "group")
     search_fields = ("title", "subtitle")
     ordering = ("pet_type", "group", "order", "id")
@@ -16,12 +16,30 @@ class PetCategoryAdmin(admin.ModelAdmin):
         return "-"
 
 
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "thumb")
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+
+    def thumb(self, obj):
+        if obj.logo:
+            return format_html('<img src="{}" style="height:40px;object-fit:contain;"/>', obj.logo.url)
+        return "-"
+
+
+class ProductCategoryInline(admin.TabularInline):
+    model = ProductCategory
+    extra = 0
+
+
 @admin.register(PetProduct)
 class PetProductAdmin(admin.ModelAdmin):
     list_display = ("title", "pet_type", "brand", "price", "quantity_display", "rating", "rating_count", "is_active")
     list_filter = ("pet_type", "is_active", "rating", "quantity_unit")
     search_fields = ("title", "brand")
     filter_horizontal = ("related",)
+    inlines = [ProductCategoryInline]
     ordering = ("pet_type", "order", "-created")
 
     def thumb(self, obj):
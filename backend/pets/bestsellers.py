@@ -0,0 +1,141 @@
+# petshop/bestsellers.py
+"""
+Rolling-window bestsellers, ranked by units sold.
+
+Every order line adds its quantity to its product's ProductSalesDay bucket and
+to the product's Bestseller row of each window (pets.signals, in the order's
+transaction); edited lines move the difference, deleted lines and cancelled or
+deleted orders take theirs back out. Once a day expire() subtracts the buckets
+that have slid out of each window, so nothing ever sums order history per
+request: top() is a LIMITed read of the (window, pet_type, -units) index.
+rebuild() recomputes everything from orders.OrderItem, for the first deploy and
+after raw SQL changes to order lines.
+"""
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Bestseller, BestsellerWindow, PetProduct, ProductSalesDay
+
+# ?window= -> days
+WINDOWS = {"7d": 7, "30d": 30}
+DEFAULT_WINDOW = "7d"
+TOP_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def window_starts(today=None):
+    """{days: first counted day} of every window, created starting today's window if missing."""
+    today = today or timezone.localdate()
+    starts = dict(BestsellerWindow.objects.values_list("days", "start"))
+    for days in WINDOWS.values():
+        if days not in starts:
+            window, _ = BestsellerWindow.objects.get_or_create(
+                days=days, defaults={"start": today - timedelta(days=days - 1)}
+            )
+            starts[days] = window.start
+    return starts
+
+
+def _add(model, keys, units, **defaults):
+    if model.objects.filter(**keys).update(units=F("units") + units):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **defaults, units=units)
+    except IntegrityError:
+        # another order line created the row first
+        model.objects.filter(**keys).update(units=F("units") + units)
+
+
+def record(lines, sign=1):
+    """Add (or with sign=-1 take back) order lines given as (product_id, created, quantity)."""
+    lines = [line for line in lines if line[2]]
+    if not lines:
+        return
+    pet_types = dict(PetProduct.objects.filter(pk__in={line[0] for line in lines}).values_list("id", "pet_type"))
+    starts = window_starts()
+    for product_id, created, quantity in lines:
+        # order lines keep ids of products that may since have been deleted
+        if product_id not in pet_types:
+            continue
+        day, units = timezone.localdate(created), sign * quantity
+        _add(ProductSalesDay, {"product_id": product_id, "day": day}, units)
+        for days, start in starts.items():
+            if day >= start:
+                _add(Bestseller, {"window": days, "product_id": product_id}, units, pet_type=pet_types[product_id])
+
+
+def expire(today=None):
+    """Subtract the days that have left each window; returns the Bestseller rows updated."""
+    today = today or timezone.localdate()
+    changed = 0
+    with transaction.atomic():
+        window_starts(today)
+        for window in BestsellerWindow.objects.select_for_update().filter(days__in=WINDOWS.values()):
+            start = today - timedelta(days=window.days - 1)
+            if window.start >= start:
+                continue
+            expired = (
+                ProductSalesDay.objects.filter(day__gte=window.start, day__lt=start)
+                .values("product").annotate(total=Sum("units")).order_by()
+            )
+            for row in expired:
+                changed += Bestseller.objects.filter(window=window.days, product=row["product"]).update(
+                    units=F("units") - row["total"]
+                )
+            window.start = start
+            window.save(update_fields=["start"])
+        Bestseller.objects.filter(units__lte=0).delete()
+        ProductSalesDay.objects.filter(day__lt=today - timedelta(days=max(WINDOWS.values()) - 1)).delete()
+    return changed
+
+
+def rebuild(today=None):
+    """Recompute the buckets and every window from order lines; returns the Bestseller rows written."""
+    today = today or timezone.localdate()
+    first = today - timedelta(days=max(WINDOWS.values()) - 1)
+    OrderItem = apps.get_model("orders", "OrderItem")
+    days = (
+        OrderItem.objects.exclude(order__status="cancelled")
+        .filter(created__gte=timezone.make_aware(datetime.combine(first, time.min)))
+        .annotate(day=TruncDate("created")).values("product_id", "day").annotate(units=Sum("quantity"))
+        .order_by()
+    )
+    days = [row for row in days if row["units"]]
+    pet_types = dict(PetProduct.objects.filter(pk__in={row["product_id"] for row in days}).values_list("id", "pet_type"))
+    days = [row for row in days if row["product_id"] in pet_types]
+
+    rows = []
+    for window in WINDOWS.values():
+        start = today - timedelta(days=window - 1)
+        totals = {}
+        for row in days:
+            if row["day"] >= start:
+                totals[row["product_id"]] = totals.get(row["product_id"], 0) + row["units"]
+        rows += [
+            Bestseller(window=window, product_id=pk, pet_type=pet_types[pk], units=units)
+            for pk, units in totals.items()
+        ]
+    with transaction.atomic():
+        ProductSalesDay.objects.all().delete()
+        Bestseller.objects.all().delete()
+        ProductSalesDay.objects.bulk_create(
+            ProductSalesDay(product_id=row["product_id"], day=row["day"], units=row["units"]) for row in days
+        )
+        for window in WINDOWS.values():
+            BestsellerWindow.objects.update_or_create(days=window, defaults={"start": today - timedelta(days=window - 1)})
+        return len(Bestseller.objects.bulk_create(rows))
+
+
+def top(window, pet_type=None):
+    """Active products of the window by units sold, best first, for slicing; one indexed read."""
+    # one filter() call, so every condition is on the same join
+    ranked = {"bestsellers__window": window, "bestsellers__units__gt": 0}
+    if pet_type:
+        ranked["bestsellers__pet_type"] = pet_type
+    return PetProduct.objects.filter(is_active=True, **ranked).order_by("-bestsellers__units", "bestsellers__product_id")
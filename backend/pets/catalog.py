@@ -0,0 +1,111 @@
+# petshop/catalog.py
+"""
+Catalog version counter kept in the Django cache.
+
+Every committed change to the catalog bumps the version. In-process indexes
+(VersionedIndex) remember the version they were built at: the worker that made
+the change patches its copy in place, every other worker sees a newer version
+on its next read and rebuilds. For this to work across gunicorn workers CACHES
+must point at a shared backend; with the default LocMemCache each process only
+sees its own bumps.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "pets:catalog-version"
+# single_flight: how long a fill may hold its lock, how long others wait for it
+FILL_LOCK_TIMEOUT = 30
+FILL_WAIT = 5
+FILL_POLL = 0.05
+
+# called with the new version after every bump, see on_version_bump
+_listeners = []
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    """Returns (previous, new)."""
+    try:
+        new = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+        new = cache.incr(VERSION_KEY)
+    for listener in _listeners:
+        listener(new)
+    return new - 1, new
+
+
+def on_version_bump(listener):
+    """Register `listener(version)` to run after each bump; usable as a decorator."""
+    _listeners.append(listener)
+    return listener
+
+
+def single_flight(key, build, timeout):
+    """
+    cache.get(key), or build() and cache it for `timeout`. Of concurrent misses
+    only the request that takes the fill lock (cache.add) builds; the others
+    poll the cache for up to FILL_WAIT seconds and build themselves only if
+    the value still hasn't appeared.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock = f"{key}:fill"
+    if cache.add(lock, 1, FILL_LOCK_TIMEOUT):
+        try:
+            value = build()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock)
+        return value
+    deadline = time.monotonic() + FILL_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(FILL_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return build()
+
+
+class VersionedIndex:
+    """Lazily built per-process index that is thrown away when the catalog version moves."""
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def get(self):
+        version = current_version()
+        if self._index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = self._build()
+                    self._version = version
+        return self._index
+
+    def apply(self, change, previous, new):
+        """
+        Patch the local copy with `change(index)` when it was current at `previous`,
+        so the worker that made the edit doesn't have to rebuild from scratch.
+        """
+        with self._lock:
+            if self._index is not None and self._version == previous:
+                change(self._index)
+                self._version = new
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+            self._version = None
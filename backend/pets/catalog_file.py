@@ -0,0 +1,422 @@
+# petshop/catalog_file.py
+"""
+Active catalog in one memory-mapped file shared by every worker.
+
+Set PETS_CATALOG_FILE to a path to enable it. The file is written (by
+`manage.py write_catalog_file`, and again after catalog version bumps) to a
+temp file next to it and moved into place with os.replace, so readers see
+either the old or the new file, never half of one. The header records the
+catalog version the rows were read at: a file older than the current version
+is not served, and a write never replaces a newer file with an older one.
+Rewrites run in a background thread PETS_CATALOG_FILE_DELAY seconds after a
+bump, so a burst of edits costs one rewrite and no request waits for it; of
+several workers only the one holding the write lock builds. Each worker maps
+the file read-only and re-maps when the inode changes; the pages live once in
+the OS page cache no matter how many workers there are.
+
+Layout: an 8-byte prefix (magic, header length), a JSON header, then 8-byte
+aligned sections: one fixed-width array per column (row order is pet_type,
+then the default grid order), a UTF-8 string heap addressed by (offset,
+length) columns, per pet_type row permutations for every ?sort=, and a sorted
+id column for lookups. Columns are read through memoryview.cast(), so nothing
+is copied until a card is built.
+"""
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from rest_framework.exceptions import NotFound
+
+from .catalog import current_version, on_version_bump
+from .models import PetProduct, PetType, UnitType
+from .pagination import PRODUCT_ORDERING, PRODUCT_SORTS, KeysetPage, decode_cursor, encode_cursor
+from .serializers import PetProductSerializer
+
+MAGIC = b"PCAT"
+FORMAT = 1
+PREFIX = struct.Struct("<4sI")
+NULL = -(2 ** 63)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard around the replace
+    fcntl = None
+
+# seconds between a version bump and the rewrite it schedules; 0 writes in the
+# bump's on_commit callback instead of a thread
+REWRITE_DELAY = 1.0
+WRITE_LOCK = "pets:catalog-file:write"
+WRITE_LOCK_TIMEOUT = 120
+
+PET_TYPES = list(PetType.values)
+UNITS = list(UnitType.values)
+BASES = ["", "kg", "l", "pcs"]
+
+# name -> array typecode; money and quantities are stored in hundredths
+COLUMNS = {
+    "id": "q", "pet_type": "B", "order": "q", "created": "q",
+    "price": "q", "mrp": "q", "discount_pct": "i",
+    "quantity_value": "q", "quantity_unit": "B",
+    "unit_price": "q", "unit_price_basis": "B",
+    "rating": "i", "rating_count": "q",
+    "title_at": "q", "title_len": "i", "image_at": "q", "image_len": "i",
+}
+ORDERINGS = {tuple(PRODUCT_ORDERING): "default", **{tuple(o): name for name, o in PRODUCT_SORTS.items()}}
+
+
+def enabled():
+    return bool(getattr(settings, "PETS_CATALOG_FILE", None))
+
+
+def _hundredths(value):
+    return NULL if value is None else int(Decimal(value).scaleb(2))
+
+
+def _decimal(value):
+    return None if value == NULL else Decimal(value).scaleb(-2)
+
+
+def _micros(moment):
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def _money(value):
+    return None if value == NULL else str(_decimal(value))
+
+
+# ---- writing ----
+
+def build(version):
+    """The file contents for the active catalog, as bytes; read `version` before calling."""
+    products = list(PetProduct.objects.filter(is_active=True).order_by("pet_type", *PRODUCT_ORDERING))
+    images = [card["image"] for card in PetProductSerializer(products, many=True).data]
+
+    heap = bytearray()
+
+    def put(text):
+        if text is None:
+            return 0, -1
+        raw = text.encode()
+        heap.extend(raw)
+        return len(heap) - len(raw), len(raw)
+
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    for product, image in zip(products, images):
+        title_at, title_len = put(product.title)
+        image_at, image_len = put(image)
+        row = {
+            "id": product.id, "pet_type": PET_TYPES.index(product.pet_type), "order": product.order,
+            "created": _micros(product.created), "price": _hundredths(product.price),
+            "mrp": _hundredths(product.mrp), "discount_pct": product.discount_pct,
+            "quantity_value": _hundredths(product.quantity_value),
+            "quantity_unit": UNITS.index(product.quantity_unit),
+            "unit_price": _hundredths(product.unit_price),
+            "unit_price_basis": BASES.index(product.unit_price_basis),
+            "rating": product.rating, "rating_count": product.rating_count,
+            "title_at": title_at, "title_len": title_len, "image_at": image_at, "image_len": image_len,
+        }
+        for name, value in row.items():
+            columns[name].append(value)
+
+    ranges, orders = {}, {}
+    for pet_type_code, pet_type in enumerate(PET_TYPES):
+        rows = [i for i, code in enumerate(columns["pet_type"]) if code == pet_type_code]
+        if not rows:
+            continue
+        ranges[pet_type] = [rows[0], len(rows)]
+        for ordering, name in ORDERINGS.items():
+            candidates = rows
+            if "unit_price" in ordering:
+                candidates = [i for i in rows if columns["unit_price"][i] != NULL]
+            key = _row_key(columns, _fields(ordering))
+            orders.setdefault(pet_type, {})[name] = array("I", sorted(candidates, key=key))
+    by_id = sorted(range(len(products)), key=lambda i: columns["id"][i])
+    ids, id_rows = array("q", (columns["id"][i] for i in by_id)), array("I", by_id)
+
+    sections = [(f"column:{name}", values) for name, values in columns.items()]
+    sections += [(f"order:{pet_type}:{name}", perm) for pet_type, by_name in orders.items() for name, perm in by_name.items()]
+    sections += [("ids", ids), ("id_rows", id_rows), ("heap", bytes(heap))]
+
+    layout, body, offset = {}, bytearray(), 0
+    for name, values in sections:
+        raw = values.tobytes() if isinstance(values, array) else values
+        layout[name] = [values.typecode if isinstance(values, array) else "B", offset, len(values)]
+        body.extend(raw)
+        body.extend(b"\0" * (-len(raw) % 8))
+        offset = len(body)
+
+    header = json.dumps({
+        "format": FORMAT, "version": version, "rows": len(products),
+        "byteorder": sys.byteorder, "ranges": ranges, "sections": layout,
+    }).encode()
+    header += b" " * (-(PREFIX.size + len(header)) % 8)
+    return PREFIX.pack(MAGIC, len(header)) + header + bytes(body)
+
+
+def file_version(path):
+    """The catalog version recorded in the file at `path`, None if there is no readable one."""
+    try:
+        with open(path, "rb") as f:
+            magic, header_len = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC:
+                return None
+            return json.loads(f.read(header_len))["version"]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def write(path=None, version=None):
+    """
+    Write the catalog file atomically; returns the version written, or None
+    when the file at `path` is newer than `version` (it is left alone).
+    """
+    path = path or settings.PETS_CATALOG_FILE
+    # read before the rows, so a bump during the build leaves the file older, never mislabelled
+    version = current_version() if version is None else version
+    data = build(version)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(f"{path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            existing = file_version(path)
+            # (a file from beyond the current version predates a cache reset: replace it)
+            if existing is not None and version < existing <= current_version():
+                os.unlink(tmp)
+                return None
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return version
+
+
+def refresh():
+    """
+    Bring the file up to the current version unless it is already there or
+    another worker holds the write lock (that one re-checks when it's done).
+    """
+    version = current_version()
+    if file_version(settings.PETS_CATALOG_FILE) == version:
+        return
+    if not cache.add(WRITE_LOCK, 1, WRITE_LOCK_TIMEOUT):
+        return
+    try:
+        write(version=version)
+    except OSError:
+        # readers fall back to the database; the next bump or the command retries
+        logger.exception("Could not write the catalog file")
+        return
+    finally:
+        cache.delete(WRITE_LOCK)
+    if current_version() > version:
+        # bumped while building, possibly by a worker that found the lock taken
+        _schedule()
+
+
+_timer_lock = threading.Lock()
+_timer = None
+
+
+def _delay():
+    return getattr(settings, "PETS_CATALOG_FILE_DELAY", REWRITE_DELAY)
+
+
+def _run():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    try:
+        refresh()
+    finally:
+        connection.close()
+
+
+def _schedule():
+    global _timer
+    with _timer_lock:
+        if _timer is None:
+            _timer = threading.Timer(_delay() or REWRITE_DELAY, _run)
+            _timer.daemon = True
+            _timer.start()
+
+
+@on_version_bump
+def rewrite(version):
+    if not enabled():
+        return
+    if _delay():
+        _schedule()
+    else:
+        refresh()
+
+
+# ---- reading ----
+
+def _fields(ordering):
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def _row_key(columns, fields):
+    cols = [(columns[name], desc) for name, desc in fields]
+
+    def key(row):
+        return tuple(-col[row] if desc else col[row] for col, desc in cols)
+    return key
+
+
+class CatalogFile:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = PREFIX.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog file")
+        self.meta = json.loads(self._map[PREFIX.size:PREFIX.size + header_len])
+        if self.meta["format"] != FORMAT or self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written in an incompatible format")
+        view = memoryview(self._map)[PREFIX.size + header_len:]
+        self.sections = {}
+        for name, (code, offset, count) in self.meta["sections"].items():
+            size = array(code).itemsize
+            self.sections[name] = view[offset:offset + size * count].cast(code)
+        self.columns = {name: self.sections[f"column:{name}"] for name in COLUMNS}
+        self.heap = self.sections["heap"]
+
+    @property
+    def version(self):
+        return self.meta["version"]
+
+    def _text(self, at, length):
+        return None if length < 0 else bytes(self.heap[at:at + length]).decode()
+
+    def card(self, row):
+        """The PetProductSerializer dict for a row, image URL still relative."""
+        c = self.columns
+        quantity_value = _money(c["quantity_value"][row])
+        quantity_unit = UNITS[c["quantity_unit"][row]]
+        return {
+            "id": c["id"][row],
+            "title": self._text(c["title_at"][row], c["title_len"][row]),
+            "image": self._text(c["image_at"][row], c["image_len"][row]),
+            "price": _money(c["price"][row]),
+            "mrp": _money(c["mrp"][row]),
+            "discount_pct": c["discount_pct"][row],
+            "quantity_value": quantity_value,
+            "quantity_unit": quantity_unit,
+            "quantity_display": f"{quantity_value} {quantity_unit}",
+            "unit_price": _money(c["unit_price"][row]),
+            "unit_price_basis": BASES[c["unit_price_basis"][row]],
+            "rating": c["rating"][row],
+            "rating_count": c["rating_count"][row],
+        }
+
+    def find(self, product_id):
+        ids = self.sections["ids"]
+        i = bisect.bisect_left(ids, product_id)
+        if i < len(ids) and ids[i] == product_id:
+            return self.sections["id_rows"][i]
+        return None
+
+    def _position(self, row, fields):
+        values = []
+        for name, _desc in fields:
+            value = self.columns[name][row]
+            if name == "created":
+                value = EPOCH + timedelta(microseconds=value)
+            elif name in ("price", "unit_price"):
+                value = _decimal(value)
+            values.append(value)
+        return values
+
+    def _cursor_key(self, values, fields):
+        if len(values) != len(fields):
+            raise NotFound("Invalid cursor")
+        key = []
+        opts = PetProduct._meta
+        try:
+            for (name, desc), value in zip(fields, values):
+                value = opts.get_field(name).to_python(value)
+                if name == "created":
+                    value = _micros(value)
+                elif name in ("price", "unit_price"):
+                    value = _hundredths(value)
+                key.append(-value if desc else value)
+        except (ValidationError, TypeError):
+            raise NotFound("Invalid cursor")
+        return tuple(key)
+
+    def page(self, pet_type, ordering, page_size, cursor=None):
+        """A KeysetPage of cards with the same cursors as pagination.KeysetPaginator."""
+        name = ORDERINGS.get(tuple(ordering))
+        rows = self.sections.get(f"order:{pet_type}:{name}", ())
+        fields = _fields(ordering)
+        key = _row_key(self.columns, fields)
+        reverse = False
+        if cursor:
+            values, reverse = decode_cursor(cursor)
+            position = self._cursor_key(values, fields)
+            if reverse:
+                end = bisect.bisect_left(rows, position, key=key)
+                start = max(0, end - page_size)
+                has_next, has_previous = True, start > 0
+            else:
+                start = bisect.bisect_right(rows, position, key=key)
+                end = start + page_size
+                has_next, has_previous = end < len(rows), True
+        else:
+            start, end = 0, page_size
+            has_next, has_previous = len(rows) > page_size, False
+        selected = list(rows[start:end])
+        if not selected:
+            return KeysetPage([], None, None)
+        next_cursor = encode_cursor(self._position(selected[-1], fields)) if has_next else None
+        previous_cursor = encode_cursor(self._position(selected[0], fields), reverse=True) if has_previous else None
+        return KeysetPage([self.card(row) for row in selected], next_cursor, previous_cursor)
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def current():
+    """This worker's mapping of the catalog file, re-opened after a replace; None if unavailable or stale."""
+    global _current
+    try:
+        inode = os.stat(settings.PETS_CATALOG_FILE).st_ino
+    except OSError:
+        return None
+    mapped = _current
+    if mapped is None or mapped.inode != inode:
+        with _lock:
+            if _current is None or _current.inode != inode:
+                try:
+                    _current = CatalogFile(settings.PETS_CATALOG_FILE)
+                except (OSError, ValueError):
+                    return None
+            mapped = _current
+    # until the rewrite after a bump lands, the database answers
+    return mapped if mapped.version == current_version() else None
@@ -0,0 +1,197 @@
+# petshop/facets.py
+"""
+Sidebar facets for the product grid.
+
+For every pet_type the active products get a bit position, and every facet
+value (a brand, a unit, a price band, a rating, "has discount") is a Python
+int used as a bitset over those positions. A facet count is then an AND and a
+popcount in memory instead of a GROUP BY per facet per page view. The listing
+filters that aren't facets (?category=, ?unit_basis=) get bitsets too, so the
+counts cover the same products as the grid they sit next to. The bitsets are
+rebuilt when the catalog version moves (see catalog.py).
+"""
+from decimal import Decimal
+
+from django.db.models import F, Q
+
+from .catalog import VersionedIndex
+from .models import Brand, PetProduct, ProductCategory, UnitType, brand_slug
+
+# (value, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = [
+    ("0-250", Decimal("0"), Decimal("250")),
+    ("250-500", Decimal("250"), Decimal("500")),
+    ("500-1000", Decimal("500"), Decimal("1000")),
+    ("1000-2500", Decimal("1000"), Decimal("2500")),
+    ("2500+", Decimal("2500"), None),
+]
+FACETS = ("brand", "quantity_unit", "price", "rating", "has_discount")
+# listing filters that narrow the counts without being counted themselves
+SCOPES = ("category", "unit_basis")
+TRUE_VALUES = ("1", "true", "yes")
+
+
+def parse_filters(params):
+    """
+    ?brand=pedigree&brand=royal-canin  /  ?brand=pedigree,royal-canin  /  ?brand[]=pedigree
+    -> {"brand": {"pedigree", "royal-canin"}}  (brand values are Brand slugs)
+    """
+    filters = {}
+    for name in FACETS:
+        raw = params.getlist(name) + params.getlist(f"{name}[]")
+        values = {v.strip() for item in raw for v in item.split(",") if v.strip()}
+        if name == "brand":
+            values = {brand_slug(v) for v in values}
+        elif name == "has_discount":
+            values = {"1"} if values & set(TRUE_VALUES) else set()
+        if values:
+            filters[name] = values
+    return filters
+
+
+def parse_scope(params):
+    """?category=3&unit_basis=kg -> {"category": 3, "unit_basis": "kg"}, as views._product_listing reads them."""
+    scope = {}
+    category = params.get("category", "")
+    if category.isdigit():
+        scope["category"] = int(category)
+    if params.get("unit_basis"):
+        scope["unit_basis"] = params["unit_basis"]
+    return scope
+
+
+def filter_queryset(queryset, filters):
+    """The same filters as a WHERE clause, for the paginated product listing."""
+    if "brand" in filters:
+        queryset = queryset.filter(brand_ref__in=Brand.objects.filter(slug__in=filters["brand"]))
+    if "quantity_unit" in filters:
+        queryset = queryset.filter(quantity_unit__in=filters["quantity_unit"])
+    if "price" in filters:
+        condition = Q()
+        for value, low, high in PRICE_BANDS:
+            if value in filters["price"]:
+                condition |= Q(price__gte=low, price__lt=high) if high is not None else Q(price__gte=low)
+        queryset = queryset.filter(condition) if condition else queryset.none()
+    if "rating" in filters:
+        queryset = queryset.filter(rating__in=[v for v in filters["rating"] if v.isdigit()])
+    if "has_discount" in filters:
+        queryset = queryset.filter(mrp__gt=F("price"))
+    return queryset
+
+
+def price_band(price):
+    for value, low, high in PRICE_BANDS:
+        if price >= low and (high is None or price < high):
+            return value
+    return None
+
+
+class PetTypeFacets:
+    def __init__(self):
+        self.size = 0
+        self.bits = {name: {} for name in FACETS}
+        self.scopes = {name: {} for name in SCOPES}
+        self.labels = {}  # brand slug -> display name
+
+    def add(self, brand, brand_name, quantity_unit, price, mrp, rating, unit_basis="", categories=()):
+        bit = 1 << self.size
+        self.size += 1
+        for category in categories:
+            self.scopes["category"][category] = self.scopes["category"].get(category, 0) | bit
+        if unit_basis:
+            self.scopes["unit_basis"][unit_basis] = self.scopes["unit_basis"].get(unit_basis, 0) | bit
+        values = {
+            "quantity_unit": quantity_unit,
+            "price": price_band(price),
+            "rating": str(rating),
+            "has_discount": "1" if mrp is not None and mrp > price else None,
+        }
+        if brand:
+            values["brand"] = brand
+            self.labels[brand] = brand_name
+        for name, value in values.items():
+            if value is not None:
+                column = self.bits[name]
+                column[value] = column.get(value, 0) | bit
+
+    @property
+    def everything(self):
+        return (1 << self.size) - 1
+
+    def _select(self, filters, scope, skip=None):
+        selected = self.everything
+        for name, value in scope.items():
+            selected &= self.scopes[name].get(value, 0)
+        for name, values in filters.items():
+            if name == skip:
+                continue
+            column = self.bits[name]
+            union = 0
+            for value in values:
+                union |= column.get(value, 0)
+            selected &= union
+        return selected
+
+    def counts(self, filters, scope=None):
+        """
+        Counts per facet value within `scope` (see parse_scope). Each facet is counted
+        with the filters of the *other* facets applied, so ticking a brand doesn't
+        zero out its siblings.
+        """
+        scope = scope or {}
+        facets = {}
+        for name in FACETS:
+            base = self._select(filters, scope, skip=name)
+            entries = []
+            for value, bits in self.bits[name].items():
+                entries.append({
+                    "value": value,
+                    "label": self._label(name, value),
+                    "count": (base & bits).bit_count(),
+                    "selected": value in filters.get(name, ()),
+                })
+            facets[name] = self._sorted(name, entries)
+        return {"total": self._select(filters, scope).bit_count(), "facets": facets}
+
+    def _label(self, name, value):
+        if name == "brand":
+            return self.labels.get(value, value)
+        if name == "quantity_unit":
+            return UnitType(value).label if value in UnitType.values else value
+        if name == "rating":
+            return f"{value}★"
+        if name == "has_discount":
+            return "On discount"
+        return value
+
+    @staticmethod
+    def _sorted(name, entries):
+        if name == "price":
+            order = [band[0] for band in PRICE_BANDS]
+            return sorted(entries, key=lambda e: order.index(e["value"]))
+        if name == "rating":
+            return sorted(entries, key=lambda e: e["value"], reverse=True)
+        return sorted(entries, key=lambda e: (-e["count"], e["label"]))
+
+
+def build_index():
+    index = {}
+    links = {}
+    linked = ProductCategory.objects.filter(product__is_active=True).values_list("product_id", "category_id")
+    for product_id, category_id in linked.iterator(chunk_size=2000):
+        links.setdefault(product_id, []).append(category_id)
+    rows = PetProduct.objects.filter(is_active=True).values_list(
+        "id", "pet_type", "brand_ref__slug", "brand_ref__name", "quantity_unit", "price", "mrp", "rating",
+        "unit_price_basis",
+    )
+    for pk, pet_type, *values, unit_basis in rows.iterator(chunk_size=2000):
+        index.setdefault(pet_type, PetTypeFacets()).add(*values, unit_basis, links.get(pk, ()))
+    return index
+
+
+facet_index = VersionedIndex(build_index)
+
+
+def facet_counts(pet_type, filters, scope=None):
+    facets = facet_index.get().get(pet_type) or PetTypeFacets()
+    return facets.counts(filters, scope)
@@ -0,0 +1,123 @@
+# petshop/fuzzy.py
+"""
+Typo-tolerant fallback for product search.
+
+A trigram index over the vocabulary of product titles and brands: every word
+is split into pg_trgm style trigrams ("  p", " pe", "ped", ...) and each
+trigram keeps a posting array of word ids. A misspelled query term is matched
+by counting shared trigrams through the postings only, ranked by
+similarity = shared / (|a| + |b| - shared), so "pedigre" -> "pedigree" and
+"orjen" -> "orijen" without comparing against every word.
+"""
+import time
+from array import array
+from collections import Counter
+
+from .catalog import VersionedIndex
+from .suggest import tokenize
+
+SIMILARITY_THRESHOLD = 0.3
+# per-query budget for the correction step
+BUDGET_SECONDS = 0.005
+MIN_TERM_LENGTH = 3
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self):
+        self.words = []               # word id -> word
+        self.word_ids = {}            # word -> word id
+        self.refcounts = array("I")   # word id -> number of products using it
+        self.gram_counts = array("H") # word id -> number of distinct trigrams
+        self.grams = {}               # trigram -> array("I") of word ids
+        self.products = {}            # product id -> array("I") of word ids
+
+    def _word_id(self, word):
+        wid = self.word_ids.get(word)
+        if wid is None:
+            wid = len(self.words)
+            self.words.append(word)
+            self.word_ids[word] = wid
+            self.refcounts.append(0)
+            grams = trigrams(word)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, array("I")).append(wid)
+        return wid
+
+    def add_product(self, product_id, title, brand):
+        self.remove_product(product_id)
+        ids = array("I", sorted({self._word_id(w) for w in tokenize(f"{title} {brand or ''}") if not w.isdigit()}))
+        for wid in ids:
+            self.refcounts[wid] += 1
+        self.products[product_id] = ids
+
+    def remove_product(self, product_id):
+        # words stay in the vocabulary with a zero refcount until the next rebuild
+        for wid in self.products.pop(product_id, ()):
+            self.refcounts[wid] -= 1
+
+    def similar(self, term, limit=3, deadline=None):
+        """[(word, similarity)] best first for a single term."""
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            posting = self.grams.get(gram)
+            if posting:
+                shared.update(posting)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        size = len(grams)
+        scored = []
+        for wid, common in shared.items():
+            if not self.refcounts[wid]:
+                continue
+            similarity = common / (size + self.gram_counts[wid] - common)
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((similarity, self.refcounts[wid], self.words[wid]))
+        scored.sort(reverse=True)
+        return [(word, similarity) for similarity, _refs, word in scored[:limit]]
+
+    def correct(self, text):
+        """
+        Replace every unknown term of `text` with its closest known word and
+        drop the ones nothing is close to. Returns None when nothing changed.
+        Terms reached after the BUDGET_SECONDS deadline are left as typed.
+        """
+        deadline = time.perf_counter() + BUDGET_SECONDS
+        terms = tokenize(text)
+        corrected = []
+        changed = False
+        for term in terms:
+            wid = self.word_ids.get(term)
+            if (wid is not None and self.refcounts[wid]) or len(term) < MIN_TERM_LENGTH or term.isdigit():
+                corrected.append(term)
+                continue
+            best = self.similar(term, limit=1, deadline=deadline)
+            if best:
+                corrected.append(best[0][0])
+            elif time.perf_counter() > deadline:
+                # out of time, not out of candidates
+                corrected.append(term)
+                continue
+            changed = True
+        if not changed or not corrected:
+            return None
+        return " ".join(corrected)
+
+
+def build_index():
+    from .models import PetProduct
+
+    index = TrigramIndex()
+    rows = PetProduct.objects.filter(is_active=True).values_list("id", "title", "brand")
+    for pk, title, brand in rows.iterator(chunk_size=2000):
+        index.add_product(pk, title, brand)
+    return index
+
+
+fuzzy_index = VersionedIndex(build_index)
@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from pets.models import PetProduct
+from pets.renderers import CardJSONRenderer
+from pets.serializers import PetProductCardProjection, PetProductSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering product cards with PetProductSerializer, the values() projection and the "
+        "stored card_json, on throwaway products (created and rolled back inside a transaction)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def best(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get("/api/pet-products/"))
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    PetProduct.objects.bulk_create(
+                        PetProduct(
+                            title=f"Bench product {i}", image=f"products/bench-{i}.jpg",
+                            price=Decimal(100 + i % 500), mrp=Decimal(120 + i % 500) if i % 3 else None,
+                            quantity_value=Decimal("1.5"), quantity_unit="kg",
+                            unit_price=Decimal("66.67"), unit_price_basis="kg", discount_pct=i % 40,
+                        )
+                        for i in range(size)
+                    )
+                    qs = PetProduct.objects.filter(title__startswith="Bench product ").order_by("id")
+                    qs.refresh_card_json()
+                    renderer = CardJSONRenderer()
+                    columns, prebuilt = PetProductCardProjection(request, prebuilt=False), PetProductCardProjection(request)
+
+                    timings, outputs = {}, {}
+                    for name, render in (
+                        ("serializer", lambda: PetProductSerializer(qs, many=True, context={"request": request}).data),
+                        ("projection", lambda: columns.many(columns.queryset(qs))),
+                        ("card_json", lambda: prebuilt.many(prebuilt.queryset(qs))),
+                    ):
+                        timings[name], outputs[name] = self.best(lambda: renderer.render(render()), options["repeat"])
+                        if outputs[name] != outputs["serializer"]:
+                            self.stderr.write(self.style.ERROR(f"{size} rows: {name} output differs"))
+                    base = timings["serializer"]
+                    self.stdout.write(f"{size:>6} rows  " + "  ".join(
+                        f"{name} {seconds * 1000:8.1f} ms (x{base / seconds:.1f})" for name, seconds in timings.items()
+                    ))
+                    raise Rollback
+            except Rollback:
+                pass
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from pets import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the \"frequently bought together\" table from orders.OrderItem: streams order lines, "
+        "counts co-purchases and keeps the top neighbours of every product. Run it nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=recommendations.TOP_K)
+        parser.add_argument("--min-support", type=int, default=recommendations.MIN_SUPPORT)
+        parser.add_argument("--chunk-size", type=int, default=recommendations.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        written = recommendations.build(
+            top_k=options["top"], min_support=options["min_support"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} recommendations."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pets.models import PetProduct
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render PetProduct.card_json for every product (after migrating, bulk imports or raw SQL). "
+        "With --check, only report products whose stored card has drifted and exit non-zero if any did."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--check", action="store_true", help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        products = PetProduct.objects.all()
+        if not options["check"]:
+            changed = products.refresh_card_json(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt card_json on {changed} products."))
+            return
+
+        stale = [product.pk for product, _card in products.stale_cards(batch_size=options["batch_size"])]
+        if stale:
+            shown = ", ".join(map(str, stale[:20])) + (", ..." if len(stale) > 20 else "")
+            raise CommandError(f"{len(stale)} products have a stale card_json: {shown}")
+        self.stdout.write(self.style.SUCCESS("Every card_json matches its product."))
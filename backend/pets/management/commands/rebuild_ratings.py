@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from pets.models import PetProduct
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute PetProduct rating, rating_count, rating_sum and the per-star counts from "
+        "ProductReview (after bulk imports, raw SQL or a suspected drift). Counts entered by hand "
+        "without reviews behind them are reset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = PetProduct.objects.all().rebuild_ratings(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates on {changed} products."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pets import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 product search table from pets_petproduct."
+
+    def handle(self, *args, **options):
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
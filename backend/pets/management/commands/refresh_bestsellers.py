@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from pets import bestsellers
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the bestseller windows on to today, subtracting the days that left them; run it daily "
+        "(just after midnight). With --rebuild, recompute every window from orders.OrderItem instead, "
+        "e.g. on first deploy or after order lines were edited by hand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Recompute from order lines.")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            written = bestsellers.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} bestseller rows."))
+            return
+        changed = bestsellers.expire()
+        self.stdout.write(self.style.SUCCESS(f"Expired old days from {changed} bestseller rows."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pets.models import PetCategory, PetProduct
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute PetProduct.unit_price / unit_price_basis / discount_pct for every product "
+        "and PetCategory.product_count for every category (after bulk imports or raw SQL updates)."
+    )
+
+    def handle(self, *args, **options):
+        changed = PetProduct.objects.all().refresh_derived_fields()
+        self.stdout.write(self.style.SUCCESS(f"Updated derived fields on {changed} products."))
+        categories = PetCategory.objects.all().recount()
+        self.stdout.write(self.style.SUCCESS(f"Recounted products in {categories} categories."))
@@ -0,0 +1,25 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pets import catalog_file
+
+
+class Command(BaseCommand):
+    help = "Write the memory-mapped catalog file (PETS_CATALOG_FILE, or --path) from the active products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None)
+
+    def handle(self, *args, **options):
+        path = options["path"] or getattr(settings, "PETS_CATALOG_FILE", None)
+        if not path:
+            raise CommandError("Set PETS_CATALOG_FILE or pass --path.")
+        if catalog_file.write(path) is None:
+            self.stdout.write(f"{path} was written from a newer catalog version; left as is.")
+            return
+        mapped = catalog_file.CatalogFile(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {mapped.meta['rows']} products to {path} ({os.path.getsize(path)} bytes)."
+        ))
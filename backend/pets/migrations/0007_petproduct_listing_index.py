@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0006_cart_cartitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(fields=['pet_type', 'is_active', 'order', '-created', '-id'], name='pets_product_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0008_petproduct_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='petproduct',
+            name='pets_product_listing_idx',
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', 'order', '-created', '-id'], name='pets_product_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', 'price', 'id'], name='pets_product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', 'rating', 'id'], name='pets_product_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', 'created', 'id'], name='pets_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', 'rating_count', 'id'], name='pets_product_popular_idx'),
+        ),
+    ]
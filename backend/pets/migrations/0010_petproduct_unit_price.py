@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:02
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+# frozen copy of pets.models.UNIT_BASIS / compute_unit_price at the time of this migration
+UNIT_BASIS = {
+    "kg": ("kg", Decimal("1")),
+    "g": ("kg", Decimal("0.001")),
+    "l": ("l", Decimal("1")),
+    "ml": ("l", Decimal("0.001")),
+    "pcs": ("pcs", Decimal("1")),
+    "pack": ("pcs", Decimal("1")),
+}
+
+
+def compute_unit_price(price, quantity_value, quantity_unit):
+    basis = UNIT_BASIS.get(quantity_unit)
+    if basis is None or price is None or not quantity_value:
+        return None, ""
+    name, size = basis
+    amount = Decimal(quantity_value) * size
+    return (Decimal(price) / amount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), name
+
+
+def backfill_unit_prices(apps, schema_editor):
+    PetProduct = apps.get_model("pets", "PetProduct")
+    batch = []
+    for product in PetProduct.objects.only("price", "quantity_value", "quantity_unit").iterator(chunk_size=1000):
+        product.unit_price, product.unit_price_basis = compute_unit_price(
+            product.price, product.quantity_value, product.quantity_unit
+        )
+        batch.append(product)
+        if len(batch) >= 1000:
+            PetProduct.objects.bulk_update(batch, ["unit_price", "unit_price_basis"])
+            batch = []
+    PetProduct.objects.bulk_update(batch, ["unit_price", "unit_price_basis"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0009_petproduct_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petproduct',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='unit_price_basis',
+            field=models.CharField(blank=True, default='', editable=False, max_length=8),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True), ('unit_price__isnull', False)), fields=['pet_type', 'unit_price', 'id'], name='pets_product_unit_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True), ('unit_price__isnull', False)), fields=['pet_type', 'unit_price_basis', 'unit_price', 'id'], name='pets_product_unit_basis_idx'),
+        ),
+        migrations.RunPython(backfill_unit_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:03
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# frozen copy of pets.models.compute_discount_pct at the time of this migration
+def compute_discount_pct(price, mrp):
+    if price is None or not mrp or Decimal(mrp) <= Decimal(price):
+        return 0
+    return int((Decimal(mrp) - Decimal(price)) * 100 // Decimal(mrp))
+
+
+def backfill_discount_pct(apps, schema_editor):
+    PetProduct = apps.get_model("pets", "PetProduct")
+    batch = []
+    for product in PetProduct.objects.filter(mrp__isnull=False).only("price", "mrp").iterator(chunk_size=1000):
+        product.discount_pct = compute_discount_pct(product.price, product.mrp)
+        batch.append(product)
+        if len(batch) >= 1000:
+            PetProduct.objects.bulk_update(batch, ["discount_pct"])
+            batch = []
+    PetProduct.objects.bulk_update(batch, ["discount_pct"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0010_petproduct_unit_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petproduct',
+            name='discount_pct',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pet_type', '-discount_pct', '-id'], name='pets_product_discount_idx'),
+        ),
+        migrations.RunPython(backfill_discount_pct, migrations.RunPython.noop),
+    ]
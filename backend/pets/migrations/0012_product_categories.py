@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0011_petproduct_discount_pct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petcategory',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ProductCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='pets.petcategory')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='pets.petproduct')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='categories',
+            field=models.ManyToManyField(blank=True, related_name='products', through='pets.ProductCategory', to='pets.petcategory'),
+        ),
+        migrations.AddIndex(
+            model_name='productcategory',
+            index=models.Index(fields=['product', 'category'], name='pets_product_category_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productcategory',
+            constraint=models.UniqueConstraint(fields=('category', 'product'), name='pets_category_product_uniq'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:07
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+# frozen copy of pets.models.brand_slug at the time of this migration
+def brand_slug(name):
+    return slugify((name or "").strip(), allow_unicode=True)
+
+
+def dedupe_brands(apps, schema_editor):
+    """One Brand per slug, named after its most common spelling; products point at it."""
+    PetProduct = apps.get_model("pets", "PetProduct")
+    Brand = apps.get_model("pets", "Brand")
+    MegaMenuBrand = apps.get_model("core", "MegaMenuBrand")
+
+    products = PetProduct.objects.exclude(brand=None).only("brand")
+    spellings = {}
+    for product in products.iterator(chunk_size=1000):
+        slug = brand_slug(product.brand)
+        if slug:
+            spellings.setdefault(slug, Counter())[product.brand.strip()] += 1
+
+    logos = {brand_slug(b.name): b.image.name for b in MegaMenuBrand.objects.exclude(image="")}
+    brands = {}
+    for slug, names in spellings.items():
+        name = names.most_common(1)[0][0]
+        brands[slug] = Brand.objects.create(slug=slug, name=name, logo=logos.get(slug))
+
+    batch = []
+    for product in products.iterator(chunk_size=1000):
+        brand = brands.get(brand_slug(product.brand))
+        if brand is None:
+            continue
+        product.brand, product.brand_ref = brand.name, brand
+        batch.append(product)
+        if len(batch) >= 1000:
+            PetProduct.objects.bulk_update(batch, ["brand", "brand_ref"])
+            batch = []
+    PetProduct.objects.bulk_update(batch, ["brand", "brand_ref"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_alter_sitesettings_options'),
+        ('pets', '0012_product_categories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Brand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=120)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=140, unique=True)),
+                ('logo', models.ImageField(blank=True, null=True, upload_to='brands/')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='brand_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='products', to='pets.brand'),
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['brand_ref', 'order', '-created', '-id'], name='pets_product_brand_idx'),
+        ),
+        migrations.RunPython(dedupe_brands, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0013_brand'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField()),
+                ('pet_type', models.CharField(choices=[('dog', 'Dog'), ('cat', 'Cat'), ('small-pets', 'Small pets')], max_length=20)),
+                ('deleted', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='petproduct',
+            index=models.Index(fields=['updated', 'id'], name='pets_product_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producttombstone',
+            index=models.Index(fields=['deleted', 'id'], name='pets_tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0014_product_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petproduct',
+            name='card_json',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
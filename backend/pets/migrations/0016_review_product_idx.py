@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0015_petproduct_card_json'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', '-created', '-id'], name='pets_review_product_idx'),
+        ),
+        migrations.AlterField(
+            model_name='productreview',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='pets.petproduct'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:26
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_rating_aggregates(apps, schema_editor):
+    """
+    Fill rating_sum and the star histogram from the reviews. Counts entered by
+    hand beyond the actual reviews are kept, as that many ratings at the
+    product's current star value, so rating and rating_count don't change.
+    """
+    PetProduct = apps.get_model("pets", "PetProduct")
+    ProductReview = apps.get_model("pets", "ProductReview")
+    stars = range(1, 6)
+
+    stats = {
+        row.pop("product"): row
+        for row in ProductReview.objects.order_by().values("product").annotate(
+            count=Count("id"), total=Sum("rating"),
+            **{f"stars_{i}": Count("id", filter=Q(rating=i)) for i in stars},
+        )
+    }
+    fields = ["rating_count", "rating_sum", *(f"stars_{i}" for i in stars)]
+    batch = []
+    for product in PetProduct.objects.only("rating", "rating_count").iterator(chunk_size=1000):
+        row = stats.get(product.pk, {"count": 0, "total": 0})
+        legacy = max(product.rating_count - row["count"], 0)
+        if not row["count"] and not legacy:
+            continue
+        for i in stars:
+            setattr(product, f"stars_{i}", row.get(f"stars_{i}", 0) + (legacy if i == product.rating else 0))
+        product.rating_count = row["count"] + legacy
+        product.rating_sum = row["total"] + legacy * product.rating
+        batch.append(product)
+        if len(batch) >= 1000:
+            PetProduct.objects.bulk_update(batch, fields)
+            batch = []
+    PetProduct.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0016_review_product_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petproduct',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='stars_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='stars_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='stars_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='stars_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petproduct',
+            name='stars_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(seed_rating_aggregates, migrations.RunPython.noop),
+    ]
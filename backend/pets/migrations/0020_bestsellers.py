@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0019_productsimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BestsellerWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.PositiveSmallIntegerField(unique=True)),
+                ('start', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Bestseller',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveSmallIntegerField()),
+                ('pet_type', models.CharField(choices=[('dog', 'Dog'), ('cat', 'Cat'), ('small-pets', 'Small pets')], max_length=20)),
+                ('units', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bestsellers', to='pets.petproduct')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', 'pet_type', '-units', 'product'], name='pets_bestseller_pet_idx'), models.Index(fields=['window', '-units', 'product'], name='pets_bestseller_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'window'), name='pets_bestseller_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('units', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pets.petproduct')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='pets_salesday_uniq')],
+            },
+        ),
+    ]
@@ -1,4 +1,19 @@
-from django.db import models
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models, transaction
+from django.db.models import (
+    Case, CharField, Count, DecimalField, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum,
+    Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThan, In
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.models import MegaMenuBrand
+
+from . import search
+from .catalog import bump_version
 
 class TimeStamped(models.Model):
     created = models.DateTimeField(auto_now_add=True)
@@ -25,6 +40,258 @@ class UnitType(models.TextChoices):
     OTHER = "other", "Other"
 
 
+# canonical unit per dimension: unit -> (basis, size of one unit in the basis)
+UNIT_BASIS = {
+    UnitType.KG: ("kg", Decimal("1")),
+    UnitType.G: ("kg", Decimal("0.001")),
+    UnitType.L: ("l", Decimal("1")),
+    UnitType.ML: ("l", Decimal("0.001")),
+    UnitType.PCS: ("pcs", Decimal("1")),
+    UnitType.PACK: ("pcs", Decimal("1")),
+}
+
+
+def compute_unit_price(price, quantity_value, quantity_unit):
+    """(price per kg / l / piece, basis) or (None, "") for units we can't compare (inch, other)."""
+    basis = UNIT_BASIS.get(quantity_unit)
+    if basis is None or price is None or not quantity_value:
+        return None, ""
+    name, size = basis
+    amount = Decimal(quantity_value) * size
+    return (Decimal(price) / amount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), name
+
+
+def compute_discount_pct(price, mrp):
+    """Whole-percent discount of price below mrp, 0 when there is none."""
+    if price is None or not mrp or Decimal(mrp) <= Decimal(price):
+        return 0
+    return int((Decimal(mrp) - Decimal(price)) * 100 // Decimal(mrp))
+
+
+# columns derived from price / mrp / quantity, see PetProduct.refresh_derived_fields
+DERIVED_FIELDS = ("unit_price", "unit_price_basis", "discount_pct")
+DERIVED_SOURCES = {"price", "mrp", "quantity_value", "quantity_unit"}
+
+
+def _cents(value):
+    # every money and quantity column has two decimal places, so whole cents keep
+    # the arithmetic exact in integers instead of SQLite's floats
+    return Cast(Round(value * 100), IntegerField())
+
+
+def derived_expressions(values):
+    """
+    DERIVED_FIELDS as SQL expressions of the row's price / mrp / quantity, for
+    queryset.update(). New values come from `values` (the update's kwargs) where
+    given, as SET reads the old columns. Same results as compute_unit_price()
+    and compute_discount_pct().
+    """
+    def source(name):
+        value = values.get(name, F(name))
+        if not hasattr(value, "resolve_expression"):
+            value = Value(value, output_field=PetProduct._meta.get_field(name))
+        return value
+
+    price, mrp, quantity = _cents(source("price")), _cents(source("mrp")), _cents(source("quantity_value"))
+    unit = source("quantity_unit")
+    units_per_basis, units_of_basis = {}, {}
+    for name, (basis, size) in UNIT_BASIS.items():
+        units_per_basis.setdefault(int(1 / size), []).append(name.value)
+        units_of_basis.setdefault(basis, []).append(name.value)
+    # price / (quantity * size) in whole cents, halves rounded up: (2n + d) / 2d
+    unit_cents = Case(
+        *(
+            When(In(unit, names), then=(price * 200 * per_basis + quantity) / (quantity * 2))
+            for per_basis, names in units_per_basis.items()
+        ),
+        output_field=IntegerField(),
+    )
+    priced = GreaterThan(quantity, 0)
+    return {
+        "unit_price": Case(
+            When(priced, then=unit_cents / Value(100.0)),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        "unit_price_basis": Case(
+            *(When(priced & In(unit, names), then=Value(basis)) for basis, names in units_of_basis.items()),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+        "discount_pct": Case(
+            When(GreaterThan(mrp, price), then=(mrp - price) * 100 / mrp),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    }
+STARS = range(1, 6)
+# review aggregates, kept by pets.signals and `manage.py rebuild_ratings`
+RATING_FIELDS = ("rating_count", "rating_sum", *(f"stars_{i}" for i in STARS))
+
+
+def average_rating(total, count):
+    """Whole-star average, halves rounded up like SQL ROUND(); see PetProductQuerySet.add_rating."""
+    return int((Decimal(total) / count).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# columns PetProductSerializer renders into PetProduct.card_json
+CARD_SOURCES = {"title", "image", "rating", "rating_count", *DERIVED_SOURCES, *DERIVED_FIELDS}
+# columns copied into the full-text table, see search.py
+SEARCH_SOURCES = {"title", "brand", "description"}
+
+
+class PetProductQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates also keep the derived columns of the touched rows current: unit
+        price and discount for price / quantity changes (in the same UPDATE, see
+        derived_expressions), category counts for is_active, brand_ref for brand,
+        card_json for anything on the card and the search index for title, brand
+        and description. `updated` is bumped like save() does, for the changes feed.
+        """
+        kwargs.setdefault("updated", timezone.now())
+        # bulk edits skip post_save, so move the catalog version here; once per
+        # call, the follow-up writes below all bypass this method
+        transaction.on_commit(bump_version)
+        if "brand" in kwargs and "brand_ref" not in kwargs and not hasattr(kwargs["brand"], "resolve_expression"):
+            kwargs["brand_ref"] = Brand.objects.for_name(kwargs["brand"])
+            if kwargs["brand_ref"] is not None:
+                kwargs["brand"] = kwargs["brand_ref"].name
+        if DERIVED_SOURCES & kwargs.keys():
+            kwargs = {**derived_expressions(kwargs), **kwargs}
+        refresh_cards = bool(CARD_SOURCES & kwargs.keys())
+        reindex = bool(SEARCH_SOURCES & kwargs.keys())
+        if not refresh_cards and not reindex and "is_active" not in kwargs:
+            return super().update(**kwargs)
+        pks = list(self.values_list("pk", flat=True))
+        count = super().update(**kwargs)
+        touched = self.model.objects.filter(pk__in=pks)
+        if refresh_cards:
+            touched.refresh_card_json()
+        if reindex:
+            search.reindex(pks)
+        if "is_active" in kwargs:
+            linked = ProductCategory.objects.filter(product__in=pks).values("category")
+            PetCategory.objects.filter(pk__in=linked).recount()
+        return count
+
+    def refresh_derived_fields(self):
+        """
+        Recompute DERIVED_FIELDS in SQL for the rows where they are off (bulk
+        imports, raw SQL) and write those back through update(); returns that count.
+        """
+        fresh = derived_expressions({})
+        stale = self.annotate(**{f"fresh_{name}": expression for name, expression in fresh.items()}).exclude(
+            Q(unit_price=F("fresh_unit_price")) | Q(unit_price__isnull=True, fresh_unit_price__isnull=True),
+            unit_price_basis=F("fresh_unit_price_basis"),
+            discount_pct=F("fresh_discount_pct"),
+        )
+        pks = list(stale.values_list("pk", flat=True))
+        return self.model.objects.filter(pk__in=pks).update(**fresh) if pks else 0
+
+    def add_rating(self, stars, delta=1):
+        """
+        Count (delta=1) or uncount (delta=-1) one review of `stars` in the stored
+        aggregates and the rounded average. A single UPDATE of F() expressions, so
+        it costs the same however many reviews a product has and concurrent
+        writers can't lose each other's increments; then the card is re-rendered.
+        """
+        count = F("rating_count") + delta
+        total = F("rating_sum") + stars * delta
+        average = Cast(Round(Cast(total, FloatField()) / count), IntegerField())
+        # rating is on the card, in the facets and in the changes feed, so this is a
+        # catalog change like any other; written directly since only the card derives from it
+        transaction.on_commit(bump_version)
+        changed = super().update(
+            updated=timezone.now(),
+            rating_count=count,
+            rating_sum=total,
+            # the last review going away leaves the rating as it was
+            rating=Case(When(rating_count__gt=-delta, then=average), default=F("rating"), output_field=IntegerField()),
+            **{f"stars_{stars}": F(f"stars_{stars}") + delta},
+        )
+        self.refresh_card_json()
+        return changed
+
+    def rebuild_ratings(self, batch_size=1000):
+        """
+        Recompute RATING_FIELDS and rating from ProductReview with one grouped
+        query, and write back the rows that changed (and their cards); returns
+        that count.
+        """
+        stats = {
+            row.pop("product"): row
+            for row in ProductReview.objects.filter(product__in=self.values("pk")).order_by()
+            .values("product").annotate(
+                rating_count=Count("id"), rating_sum=Sum("rating"),
+                **{f"stars_{i}": Count("id", filter=Q(rating=i)) for i in STARS},
+            )
+        }
+        empty = dict.fromkeys(RATING_FIELDS, 0)
+        now = timezone.now()
+        changed, batch = [], []
+        for product in self.only("rating", *RATING_FIELDS).order_by().iterator(chunk_size=batch_size):
+            values = stats.get(product.pk, empty)
+            if values["rating_count"]:
+                values = {**values, "rating": average_rating(values["rating_sum"], values["rating_count"])}
+            if all(getattr(product, name) == value for name, value in values.items()):
+                continue
+            for name, value in values.items():
+                setattr(product, name, value)
+            product.updated = now
+            batch.append(product)
+            if len(batch) >= batch_size:
+                self.model._base_manager.bulk_update(batch, ["rating", "updated", *RATING_FIELDS])
+                changed += [product.pk for product in batch]
+                batch = []
+        if batch:
+            self.model._base_manager.bulk_update(batch, ["rating", "updated", *RATING_FIELDS])
+            changed += [product.pk for product in batch]
+        if changed:
+            transaction.on_commit(bump_version)
+        for start in range(0, len(changed), batch_size):
+            self.model.objects.filter(pk__in=changed[start:start + batch_size]).refresh_card_json(batch_size)
+        return len(changed)
+
+    def stale_cards(self, batch_size=1000):
+        """(product, freshly rendered card) for every product whose card_json differs."""
+        from .serializers import render_card
+
+        for product in self.order_by().iterator(chunk_size=batch_size):
+            card = render_card(product)
+            if card != product.card_json:
+                yield product, card
+
+    def refresh_card_json(self, batch_size=1000):
+        """
+        Re-render card_json and write back the rows that changed; returns that
+        count. Writes go through the base manager, so no version bump or
+        `updated` change: callers have done those already.
+        """
+        changed, batch = 0, []
+        for product, card in self.stale_cards(batch_size):
+            product.card_json = card
+            batch.append(product)
+            if len(batch) >= batch_size:
+                changed += self.model._base_manager.bulk_update(batch, ["card_json"])
+                batch = []
+        if batch:
+            changed += self.model._base_manager.bulk_update(batch, ["card_json"])
+        return changed
+
+
+class PetCategoryQuerySet(models.QuerySet):
+    def recount(self):
+        """Recompute product_count from the link table in one UPDATE."""
+        active = (
+            ProductCategory.objects.filter(category=OuterRef("pk"), product__is_active=True)
+            .order_by().values("category").annotate(n=Count("*")).values("n")
+        )
+        return self.update(product_count=Coalesce(Subquery(active), 0))
+
+    def adjust_count(self, delta):
+        return self.update(product_count=F("product_count") + delta) if delta else 0
+
+
 class PetCategory(TimeStamped):
     pet_type = models.CharField(max_length=20, choices=PetType.choices, default=PetType.DOG)
     title = models.CharField(max_length=120)
@@ -32,6 +299,10 @@ class PetCategory(TimeStamped):
     image = models.ImageField(upload_to="pet_categories/", blank=True, null=True)
     group = models.CharField(max_length=80, blank=True)
     order = models.PositiveIntegerField(default=0)
+    # active products in this category, kept current by pets.signals
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PetCategoryQuerySet.as_manager()
 
     class Meta:
         ordering = ["order", "id"]
@@ -40,48 +311,309 @@ class PetCategory(TimeStamped):
         return f"{self.get_pet_type_display()} - {self.title}"
 
 
+def brand_slug(name):
+    return slugify((name or "").strip(), allow_unicode=True)
+
+
+class BrandQuerySet(models.QuerySet):
+    def for_name(self, name):
+        """
+        The Brand for a free-text brand name ("royal canin ", "Royal Canin"), created
+        on first use with the mega-menu logo of the same name if there is one.
+        None for blank names.
+        """
+        slug = brand_slug(name)
+        if not slug:
+            return None
+        brand = self.filter(slug=slug).first()
+        if brand is None:
+            name = name.strip()
+            logo = (
+                MegaMenuBrand.objects.filter(name__iexact=name).exclude(image="")
+                .values_list("image", flat=True).first()
+            )
+            brand, _ = self.get_or_create(slug=slug, defaults={"name": name, "logo": logo})
+        return brand
+
+
+class Brand(TimeStamped):
+    name = models.CharField(max_length=120)
+    slug = models.SlugField(max_length=140, unique=True, allow_unicode=True)
+    # may point at the same file as a core.MegaMenuBrand image
+    logo = models.ImageField(upload_to="brands/", blank=True, null=True)
+
+    objects = BrandQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class PetProduct(TimeStamped):
     pet_type = models.CharField(max_length=20, choices=PetType.choices, default=PetType.DOG)
     title = models.CharField(max_length=220)
     brand = models.CharField(max_length=120, blank=True, null=True)
+    # resolved from `brand` on save; brand pages and filters go through this
+    brand_ref = models.ForeignKey(
+        Brand, on_delete=models.PROTECT, blank=True, null=True, editable=False,
+        related_name="products", db_index=False,
+    )
     image = models.ImageField(upload_to="pet_products/", blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
 
     # Quantity as value + unit
     quantity_value = models.DecimalField(max_digits=10, decimal_places=2, default=1)
     quantity_unit = models.CharField(max_length=20, choices=UnitType.choices, default=UnitType.PCS)
+    # derived columns, kept in sync by save(), queryset.update() and
+    # `manage.py refresh_derived_fields`
+    # price per kg / l / piece
+    unit_price = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True, editable=False)
+    unit_price_basis = models.CharField(max_length=8, blank=True, default="", editable=False)
 
     mrp = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    discount_pct = models.PositiveSmallIntegerField(default=0, editable=False)
     description = models.TextField(blank=True, null=True)
 
-    # rating summary
+    # rating summary; with reviews, rating is the rounded average of rating_sum / rating_count
     rating = models.PositiveIntegerField(choices=[(i, str(i)) for i in range(1, 6)], default=5)
     rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    # reviews per star
+    stars_1 = models.PositiveIntegerField(default=0, editable=False)
+    stars_2 = models.PositiveIntegerField(default=0, editable=False)
+    stars_3 = models.PositiveIntegerField(default=0, editable=False)
+    stars_4 = models.PositiveIntegerField(default=0, editable=False)
+    stars_5 = models.PositiveIntegerField(default=0, editable=False)
 
     # related products
     related = models.ManyToManyField("self", blank=True)
+    categories = models.ManyToManyField(PetCategory, through="ProductCategory", blank=True, related_name="products")
 
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
 
+    # PetProductSerializer output (image URL relative), rendered on every change so
+    # listings and the cart can copy it into responses; see refresh_card_json()
+    card_json = models.TextField(blank=True, default="", editable=False)
+
+    objects = PetProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["order", "-created"]
+        # Listing indexes are partial on is_active: Django renders is_active=True as a
+        # bare `WHERE "is_active"` on SQLite, which matches a partial index condition
+        # but can't be used as an equality on an is_active index column.
+        indexes = [
+            # default grid ordering and its keyset cursors
+            models.Index(
+                fields=["pet_type", "order", "-created", "-id"],
+                condition=models.Q(is_active=True),
+                name="pets_product_listing_idx",
+            ),
+            # one per ?sort= key; descending sorts walk them backwards
+            models.Index(fields=["pet_type", "price", "id"], condition=models.Q(is_active=True), name="pets_product_price_idx"),
+            models.Index(fields=["pet_type", "rating", "id"], condition=models.Q(is_active=True), name="pets_product_rating_idx"),
+            models.Index(fields=["pet_type", "created", "id"], condition=models.Q(is_active=True), name="pets_product_created_idx"),
+            models.Index(fields=["pet_type", "rating_count", "id"], condition=models.Q(is_active=True), name="pets_product_popular_idx"),
+            # ?sort=unit_price, with and without ?unit_basis=kg|l|pcs
+            models.Index(
+                fields=["pet_type", "unit_price", "id"],
+                condition=models.Q(is_active=True, unit_price__isnull=False),
+                name="pets_product_unit_price_idx",
+            ),
+            models.Index(
+                fields=["pet_type", "unit_price_basis", "unit_price", "id"],
+                condition=models.Q(is_active=True, unit_price__isnull=False),
+                name="pets_product_unit_basis_idx",
+            ),
+            # /api/brands/<slug>/products/, also the FK index for brand_ref
+            models.Index(
+                fields=["brand_ref", "order", "-created", "-id"],
+                condition=models.Q(is_active=True),
+                name="pets_product_brand_idx",
+            ),
+            # /api/pet-products/changes/, over active and inactive rows
+            models.Index(fields=["updated", "id"], name="pets_product_updated_idx"),
+            # /api/pet-products/deals/
+            models.Index(
+                fields=["pet_type", "-discount_pct", "-id"],
+                condition=models.Q(is_active=True),
+                name="pets_product_discount_idx",
+            ),
+        ]
 
     @property
     def quantity_display(self):
         return f"{self.quantity_value} {self.quantity_unit}"
 
+    def refresh_derived_fields(self):
+        self.unit_price, self.unit_price_basis = compute_unit_price(
+            self.price, self.quantity_value, self.quantity_unit
+        )
+        self.discount_pct = compute_discount_pct(self.price, self.mrp)
+
+    def refresh_brand(self):
+        self.brand_ref = Brand.objects.for_name(self.brand)
+        if self.brand_ref is not None:
+            self.brand = self.brand_ref.name
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "brand" in update_fields:
+            self.refresh_brand()
+        if update_fields is not None:
+            update_fields = {*update_fields, *DERIVED_FIELDS, "updated"}
+            if "brand" in update_fields:
+                update_fields.add("brand_ref")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+        if update_fields is None or CARD_SOURCES & update_fields:
+            self.refresh_card_json()
+
+    def refresh_card_json(self):
+        """
+        Re-render card_json. Runs after the row is written, once the id and the
+        stored image name are final, and renders the row as read back (1 ->
+        "1.00") so the card matches what a reload would serialize. Written
+        with a plain UPDATE that fires no signals.
+        """
+        from .serializers import render_card
+
+        stored = type(self)._base_manager.get(pk=self.pk)
+        card = render_card(stored)
+        if card != stored.card_json:
+            type(self)._base_manager.filter(pk=self.pk).update(card_json=card)
+        self.card_json = card
+
     def __str__(self):
         return f"{self.title} ({self.get_pet_type_display()})"
 
 
+class ProductTombstone(models.Model):
+    """A hard-deleted product, so /api/pet-products/changes/ can report the delete."""
+    product_id = models.BigIntegerField()
+    pet_type = models.CharField(max_length=20, choices=PetType.choices)
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted", "id"], name="pets_tombstone_deleted_idx")]
+
+    def __str__(self):
+        return f"{self.product_id} deleted {self.deleted:%Y-%m-%d %H:%M}"
+
+
+class ProductCategory(models.Model):
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, db_index=False)
+    category = models.ForeignKey(PetCategory, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        # (category, product) serves ?category= listings, (product, category) the reverse
+        constraints = [
+            models.UniqueConstraint(fields=["category", "product"], name="pets_category_product_uniq"),
+        ]
+        indexes = [models.Index(fields=["product", "category"], name="pets_product_category_idx")]
+
+    def __str__(self):
+        return f"{self.category_id} - {self.product_id}"
+
+
+class ProductRecommendation(models.Model):
+    """
+    "Frequently bought together": the top co-purchased products of `product`,
+    rank 0 first. Rebuilt as a whole by `manage.py build_recommendations`.
+    """
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="recommendations", db_index=False)
+    recommended = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    # cosine similarity of the two products' order sets
+    score = models.FloatField()
+
+    class Meta:
+        # a product's list in rank order is one range of this index
+        constraints = [models.UniqueConstraint(fields=["product", "rank"], name="pets_recommendation_rank_uniq")]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank})"
+
+
+class ProductSalesDay(models.Model):
+    """Units of `product` sold on `day` (local date), the buckets the bestseller windows are summed from."""
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="+", db_index=False)
+    day = models.DateField(db_index=True)
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["product", "day"], name="pets_salesday_uniq")]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.day}: {self.units}"
+
+
+class BestsellerWindow(models.Model):
+    """First day of `days` whose buckets are still counted in Bestseller; moved on by expiry."""
+    days = models.PositiveSmallIntegerField(unique=True)
+    start = models.DateField()
+
+    def __str__(self):
+        return f"{self.days}d from {self.start}"
+
+
+class Bestseller(models.Model):
+    """
+    Units of `product` sold in the last `window` days, kept up to date per order
+    line and per expired day (pets.bestsellers) so /api/pet-products/bestsellers/
+    is one LIMITed range of an index.
+    """
+    window = models.PositiveSmallIntegerField()
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="bestsellers", db_index=False)
+    # copied from the product; `manage.py refresh_bestsellers --rebuild` re-syncs it
+    pet_type = models.CharField(max_length=20, choices=PetType.choices)
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["product", "window"], name="pets_bestseller_uniq")]
+        indexes = [
+            models.Index(fields=["window", "pet_type", "-units", "product"], name="pets_bestseller_pet_idx"),
+            models.Index(fields=["window", "-units", "product"], name="pets_bestseller_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units} in {self.window}d"
+
+
+class ProductSimilarity(models.Model):
+    """
+    Content-based neighbours of `product` (TF-IDF cosine over its text), rank 0
+    first. Built by `manage.py build_similar_products`, see pets.similar.
+    """
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="similarities", db_index=False)
+    similar = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="similar_to")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # start of the run that wrote the row; --incremental rescores products updated after the latest
+    computed = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["product", "rank"], name="pets_similarity_rank_uniq")]
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id} (#{self.rank})"
+
+
 class ProductReview(TimeStamped):
-    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="reviews")
+    product = models.ForeignKey(PetProduct, on_delete=models.CASCADE, related_name="reviews", db_index=False)
     name = models.CharField(max_length=120)
     email = models.EmailField()
     rating = models.PositiveSmallIntegerField(choices=[(i, i) for i in range(1, 6)], default=5)
     review = models.TextField(blank=True)
 
+    class Meta:
+        # newest-first review pages and the capped list on product detail; also the FK index
+        indexes = [models.Index(fields=["product", "-created", "-id"], name="pets_review_product_idx")]
+
     def __str__(self):
         return f"{self.name} — {self.product.title}"
 
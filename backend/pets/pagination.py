@@ -0,0 +1,66 @@
+# petshop/pagination.py
+from django.core.cache import cache
+
+# the keyset primitives live in core, next to the default pagination that uses them
+from core.pagination import (  # noqa: F401
+    BoundedCursorPagination,
+    KeysetPage,
+    KeysetPaginator,
+    decode_cursor,
+    encode_cursor,
+    wants_all,
+)
+
+# default product grid ordering; "-id" makes every position unique
+PRODUCT_ORDERING = ("order", "-created", "-id")
+COUNT_CACHE_TIMEOUT = 300
+
+# ?sort= values; each one has a matching (pet_type, is_active, <key>, id) index
+PRODUCT_SORTS = {
+    "price_asc": ("price", "id"),
+    "price_desc": ("-price", "-id"),
+    "rating": ("-rating", "-id"),
+    "newest": ("-created", "-id"),
+    "popular": ("-rating_count", "-id"),
+    "unit_price": ("unit_price", "id"),
+}
+# names used by the storefront's sort menu
+SORT_ALIASES = {"best": "popular", "top": "rating", "new": "newest", "relevance": None}
+
+def product_ordering(sort):
+    sort = SORT_ALIASES.get(sort, sort)
+    return PRODUCT_SORTS.get(sort, PRODUCT_ORDERING)
+
+
+class KeysetPagination(BoundedCursorPagination):
+    """
+    core's BoundedCursorPagination with the ordering taken from the view's
+    get_ordering(), so it can follow ?sort=.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ordering() if hasattr(view, "get_ordering") else PRODUCT_ORDERING
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        if ordering is None:
+            return super().paginate_queryset(queryset, request, view)
+        if wants_all(request):
+            return None
+        return self.paginate_keyset_page(
+            KeysetPaginator(queryset, ordering, self.get_page_size(request)).page(
+                request.query_params.get(self.cursor_query_param)
+            ),
+            request,
+        )
+
+    def paginate_keyset_page(self, page, request):
+        """For callers that page on their own, e.g. the in-memory snapshot."""
+        self.request, self.page = request, page
+        return list(page.object_list)
+
+
+def cached_count(key, queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    Approximate total for cursor mode: COUNT(*) once per `timeout` instead of per request.
+    """
+    return cache.get_or_set(key, queryset.count, timeout)
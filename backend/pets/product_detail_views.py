@@ -1,40 +1,124 @@
 # petshop/product_detail.py
-from rest_framework import generics, status
+from rest_framework import generics
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 
-from .models import PetProduct, ProductReview
-from .serializers_detail import PetProductDetailSerializer, ProductReviewSerializer
+from .models import PetProduct, ProductRecommendation, ProductReview
+from .pagination import PRODUCT_ORDERING, KeysetPagination
+from .renderers import CARD_RENDERERS
+from .serializers import PetProductCardProjection
+from .serializers_detail import SUMMARY_FIELDS, PetProductDetailSerializer, ProductReviewSerializer, review_summary
+from .similar import TOP_K as SIMILAR_TOP_K
+from .views import AnonymousCatalogMixin
 
+# detail carries at most this many; the rest via /api/pet-product/<id>/reviews/
+DETAIL_REVIEWS = 10
+DETAIL_RELATED = 12
+REVIEW_ORDERING = ("-created", "-id")
 
-class PetProductDetailAPIView(generics.RetrieveAPIView):
+# ?expand= name -> prefetch it needs, sliced per product; a sliced prefetch can't
+# fill the manager's cache, so it lands on the attribute the serializer field reads
+EXPAND_PREFETCHES = {
+    "related": lambda: Prefetch(
+        "related", to_attr="related_preview",
+        queryset=PetProduct.objects.filter(is_active=True).order_by(*PRODUCT_ORDERING)[:DETAIL_RELATED],
+    ),
+    "reviews": lambda: Prefetch(
+        "reviews", to_attr="latest_reviews",
+        queryset=ProductReview.objects.order_by(*REVIEW_ORDERING)[:DETAIL_REVIEWS],
+    ),
+    # already top-K per product; a range of the (product, rank) index
+    "together": lambda: Prefetch(
+        "recommendations", to_attr="top_recommendations",
+        queryset=ProductRecommendation.objects.filter(recommended__is_active=True)
+        .select_related("recommended").order_by("rank"),
+    ),
+}
+
+
+class PetProductDetailAPIView(AnonymousCatalogMixin, generics.RetrieveAPIView):
     """
     GET /api/pet-product/<id>/
+    GET /api/pet-product/<id>/?expand=related,reviews,together&fields=id,title,price
+    related_products, reviews and bought_together are only serialized (and queried)
+    when expanded, capped to the DETAIL_RELATED active related products and
+    DETAIL_REVIEWS newest reviews.
     """
     permission_classes = [AllowAny]
     queryset = PetProduct.objects.filter(is_active=True)
     serializer_class = PetProductDetailSerializer
     lookup_field = "id"
 
+    def get_queryset(self):
+        expand = PetProductDetailSerializer.expand_names(self.request)
+        return self.queryset.prefetch_related(*(EXPAND_PREFETCHES[name]() for name in sorted(expand)))
+
 
-class ProductReviewCreateAPIView(generics.CreateAPIView):
+class ProductReviewListCreateAPIView(generics.ListCreateAPIView):
     """
+    GET  /api/pet-product/<id>/reviews/?rating=5&page_size=10&cursor=...
+         newest first, keyset paged on (created, id)
     POST /api/pet-product/<id>/reviews/
     Body: { name, email, rating, review }
     """
     permission_classes = [AllowAny]
     serializer_class = ProductReviewSerializer
+    pagination_class = KeysetPagination
+
+    def get_ordering(self):
+        return REVIEW_ORDERING
+
+    def get_product(self):
+        return get_object_or_404(PetProduct, id=self.kwargs["id"], is_active=True)
+
+    def get_queryset(self):
+        qs = ProductReview.objects.filter(product=self.product)
+        rating = self.request.query_params.get("rating", "")
+        if rating.isdigit():
+            qs = qs.filter(rating=int(rating))
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        self.product = self.get_product()
+        return super().list(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        product = self.get_product()
+        # pets.signals adds the rating to the product's aggregates in this transaction
+        with transaction.atomic():
+            serializer.save(product=product)
+
+
+class ProductReviewSummaryAPIView(AnonymousCatalogMixin, generics.GenericAPIView):
+    """
+    GET /api/pet-product/<id>/review-summary/
+    Count, average and 5..1 star breakdown from the product's stored aggregates.
+    Many products at once: /api/pet-products/review-summary/?ids=1,2,3
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, id):
+        row = get_object_or_404(PetProduct.objects.filter(is_active=True).values(*SUMMARY_FIELDS), id=id)
+        return Response(review_summary(row))
+
+
+class SimilarProductsAPIView(AnonymousCatalogMixin, generics.GenericAPIView):
+    """
+    GET /api/pet-product/<id>/similar/?limit=6
+    Active products with the most similar title, brand and description (see
+    pets.similar), best first, as product cards. Rebuilt by
+    `manage.py build_similar_products [--incremental]`.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = CARD_RENDERERS
 
-    def post(self, request, id, *args, **kwargs):
-        product = get_object_or_404(PetProduct, id=id, is_active=True)
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save(product=product)
-        # Optionally update rating_count and aggregate rating (simple approach)
-        product.rating_count = product.reviews.count()
-        # Simple average rating update (if you'd like):
-        avg = product.reviews.aggregate(avg=models.Avg("rating"))["avg"] or product.rating
-        product.rating = int(round(avg))
-        product.save(update_fields=["rating", "rating_count"])
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def get(self, request, id):
+        get_object_or_404(PetProduct.objects.filter(is_active=True).values("id"), id=id)
+        limit = request.query_params.get("limit", "")
+        limit = min(int(limit), SIMILAR_TOP_K) if limit.isdigit() else SIMILAR_TOP_K
+        cards = PetProductCardProjection(request)
+        qs = PetProduct.objects.filter(is_active=True, similar_to__product=id).order_by("similar_to__rank")
+        return Response(cards.many(cards.queryset(qs)[:limit]))
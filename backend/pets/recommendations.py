@@ -0,0 +1,105 @@
+# petshop/recommendations.py
+"""
+"Frequently bought together" from order history.
+
+build() streams (order_id, product_id) order lines in order_id order, a chunk
+at a time, turns each order into its set of products and counts for every
+product how many orders it shares with each other product: a sparse
+item-item co-occurrence matrix, one Counter row per product. Memory grows with
+the number of distinct co-purchased pairs, never with the number of order
+lines. Each product's TOP_K neighbours by cosine similarity,
+shared(a, b) / sqrt(orders(a) * orders(b)), then replace the
+ProductRecommendation table in one transaction.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import groupby
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import PetProduct, ProductRecommendation
+
+TOP_K = 10
+# orders a pair must share before it counts as bought together
+MIN_SUPPORT = 2
+# bulk orders add noise and n^2 pairs; they're left out
+MAX_BASKET = 50
+CHUNK_SIZE = 5000
+WRITE_BATCH = 1000
+
+
+def baskets(chunk_size=CHUNK_SIZE):
+    """The set of product ids of every non-cancelled order, streamed."""
+    OrderItem = apps.get_model("orders", "OrderItem")
+    lines = (
+        OrderItem.objects.exclude(order__status="cancelled").order_by("order_id")
+        .values_list("order_id", "product_id").iterator(chunk_size=chunk_size)
+    )
+    for _order_id, items in groupby(lines, key=lambda line: line[0]):
+        yield {product_id for _order_id, product_id in items}
+
+
+def co_occurrence(baskets, max_basket=MAX_BASKET):
+    """(orders per product, {product: Counter(other product -> orders shared)})."""
+    orders = Counter()
+    shared = defaultdict(Counter)
+    for basket in baskets:
+        if len(basket) > max_basket:
+            continue
+        orders.update(basket)
+        if len(basket) < 2:
+            continue
+        for product in basket:
+            row = shared[product]
+            for other in basket:
+                if other != product:
+                    row[other] += 1
+    return orders, shared
+
+
+def top_neighbours(orders, shared, top_k=TOP_K, min_support=MIN_SUPPORT, known=None):
+    """(product, [(other, score), ...] best first) for every product with neighbours."""
+    for product, row in shared.items():
+        if known is not None and product not in known:
+            continue
+        scored = (
+            (count / math.sqrt(orders[product] * orders[other]), other)
+            for other, count in row.items()
+            if count >= min_support and (known is None or other in known)
+        )
+        best = heapq.nlargest(top_k, scored)
+        if best:
+            yield product, [(other, score) for score, other in best]
+
+
+def build(top_k=TOP_K, min_support=MIN_SUPPORT, chunk_size=CHUNK_SIZE):
+    """Recompute the whole ProductRecommendation table; returns the rows written."""
+    orders, shared = co_occurrence(baskets(chunk_size))
+    # order lines keep ids of products that may since have been deleted
+    known = set(PetProduct.objects.values_list("id", flat=True))
+    written, batch = 0, []
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        for product, neighbours in top_neighbours(orders, shared, top_k, min_support, known):
+            batch += [
+                ProductRecommendation(product_id=product, recommended_id=other, rank=rank, score=score)
+                for rank, (other, score) in enumerate(neighbours)
+            ]
+            if len(batch) >= WRITE_BATCH:
+                written += len(ProductRecommendation.objects.bulk_create(batch))
+                batch = []
+        written += len(ProductRecommendation.objects.bulk_create(batch))
+    return written
+
+
+def bought_with(product_ids, limit=TOP_K):
+    """Ids of active products most often bought with any of `product_ids`, best first; one query."""
+    rows = (
+        ProductRecommendation.objects.filter(product__in=product_ids, recommended__is_active=True)
+        .exclude(recommended__in=product_ids)
+        .values("recommended").annotate(total=Sum("score")).order_by("-total", "recommended")[:limit]
+    )
+    return [row["recommended"] for row in rows]
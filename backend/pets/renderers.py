@@ -0,0 +1,43 @@
+# petshop/renderers.py
+import re
+import secrets
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+
+class CardJSON:
+    """Already rendered JSON, e.g. a PetProduct.card_json, to be copied into a response as is."""
+    __slots__ = ("json",)
+
+    def __init__(self, json):
+        self.json = json
+
+
+class CardJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that splices CardJSON values into the output instead of encoding
+    them again: each one is written as a placeholder string carrying a per-response
+    random marker, and the placeholders are swapped for the stored text afterwards.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        raw = []
+        marker = secrets.token_hex(8)
+
+        class Encoder(self.encoder_class):
+            def default(self, obj):
+                if isinstance(obj, CardJSON):
+                    raw.append(obj.json.encode())
+                    return f"{marker}:{len(raw) - 1}"
+                return super().default(obj)
+
+        renderer = JSONRenderer()
+        renderer.encoder_class = Encoder
+        out = renderer.render(data, accepted_media_type, renderer_context)
+        if not raw:
+            return out
+        return re.sub(rf'"{marker}:(\d+)"'.encode(), lambda m: raw[int(m[1])], out)
+
+
+# for views that return CardJSON; the browsable API renders its content through the first one
+CARD_RENDERERS = [CardJSONRenderer, BrowsableAPIRenderer]
@@ -0,0 +1,124 @@
+# petshop/search.py
+"""
+Full-text product search on an SQLite FTS5 table that mirrors
+PetProduct.title / brand / description (rowid == product id).
+
+The table is created by migration 0008, kept in sync by the post_save /
+post_delete handlers in signals.py (and by PetProductQuerySet.update() for
+bulk writes) and can be rebuilt from scratch with
+`python manage.py rebuild_search_index`.
+"""
+import re
+
+from django.db import connection
+
+FTS_TABLE = "pets_petproduct_fts"
+# bm25 column weights: title, brand, description
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "<mark>", "</mark>"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled(conn=None):
+    return (conn or connection).vendor == "sqlite"
+
+
+def index_product(product):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, brand, description) VALUES (%s, %s, %s, %s)",
+            [product.pk, product.title, product.brand or "", product.description or ""],
+        )
+
+
+def remove_product(product_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def reindex(product_ids, batch_size=500):
+    """Re-copy the indexed columns of these products, e.g. after a bulk update()."""
+    if not fts_enabled():
+        return
+    product_ids = list(product_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start:start + batch_size]
+            marks = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({marks})", batch)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, brand, description) "
+                "SELECT id, title, COALESCE(brand, ''), COALESCE(description, '') "
+                f"FROM pets_petproduct WHERE id IN ({marks})",
+                batch,
+            )
+
+
+def rebuild():
+    """Re-fill the FTS table from pets_petproduct; returns the number of rows indexed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, brand, description) "
+            "SELECT id, title, COALESCE(brand, ''), COALESCE(description, '') FROM pets_petproduct"
+        )
+        count = cursor.rowcount
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return count
+
+
+def match_expression(text):
+    """
+    Turn free text into a safe FTS5 query: every word is quoted (so user input
+    can't inject FTS syntax) and the last one is a prefix match for search-as-you-type.
+    """
+    terms = _TOKEN_RE.findall((text or "").lower())
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(text, pet_type=None, limit=20, after=None):
+    """
+    BM25-ranked hits for `text` among active products, best first.
+
+    `after` is the (score, id) of the last hit of the previous page. Returns a
+    list of dicts: id, score, title (highlighted), snippet (from description).
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return []
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    sql = [
+        f"SELECT p.id, bm25({FTS_TABLE}, {weights}) AS score,",
+        f"  highlight({FTS_TABLE}, 0, %s, %s),",
+        f"  snippet({FTS_TABLE}, 2, %s, %s, '…', 16)",
+        f"FROM {FTS_TABLE} JOIN pets_petproduct p ON p.id = {FTS_TABLE}.rowid",
+        f"WHERE {FTS_TABLE} MATCH %s AND p.is_active = 1",
+    ]
+    params = [HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, expression]
+    if pet_type:
+        sql.append("AND p.pet_type = %s")
+        params.append(pet_type)
+    if after is not None:
+        sql.append("AND (score > %s OR (score = %s AND p.id > %s))")
+        params += [after[0], after[0], after[1]]
+    sql.append("ORDER BY score, p.id LIMIT %s")
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute("\n".join(sql), params)
+        rows = cursor.fetchall()
+    return [
+        {"id": pk, "score": score, "title": title, "snippet": snippet}
+        for pk, score, title, snippet in rows
+    ]
@@ -1,5 +1,13 @@
+from decimal import Decimal
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
-from .models import PetCategory, PetProduct, PetBanner
+from rest_framework.renderers import JSONRenderer
+from .models import Brand, PetCategory, PetProduct, PetBanner
+from .renderers import CardJSON
+
+CENT = Decimal("0.01")
 
 class ImageURLField(serializers.ImageField):
     def to_representation(self, value):
@@ -10,27 +18,195 @@ class ImageURLField(serializers.ImageField):
         return rep
 
 
+def query_list(request, name):
+    """?expand=related,reviews -> {"related", "reviews"}; None when the parameter is absent."""
+    raw = request.query_params.get(name) if request is not None else None
+    if raw is None:
+        return None
+    return {value.strip() for value in raw.split(",") if value.strip()}
+
+
+def present_cards(cards, request):
+    """
+    Pre-serialized PetProductSerializer dicts (built without a request) as the
+    serializer would return them for `request`: absolute image URLs, ?fields= applied.
+    """
+    only = query_list(request, "fields")
+    out = []
+    for card in cards:
+        card = dict(card)
+        image = card.get("image")
+        if image and not image.startswith("http"):
+            card["image"] = request.build_absolute_uri(image)
+        if only:
+            card = {name: value for name, value in card.items() if name in only}
+        out.append(card)
+    return out
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,title,price keeps only those fields of the top-level serializer.
+    Nested fields listed in Meta.expandable ({"related": "related_products"})
+    are left out unless asked for with ?expand=related; views use
+    expand_names() to run only the prefetches those fields need.
+    """
+
+    @classmethod
+    def expand_names(cls, request):
+        expandable = getattr(cls.Meta, "expandable", {})
+        return {name for name in query_list(request, "expand") or () if name in expandable}
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        request = self.context.get("request")
+        expandable = getattr(self.Meta, "expandable", {})
+        wanted = {expandable[name] for name in self.expand_names(request)}
+        for field_name in expandable.values():
+            if field_name not in wanted:
+                fields.pop(field_name, None)
+        only = query_list(request, "fields")
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only or name in wanted}
+        return fields
+
+
 class PetCategorySerializer(serializers.ModelSerializer):
     image = ImageURLField(required=False, allow_null=True)
 
     class Meta:
         model = PetCategory
-        fields = ["id", "title", "subtitle", "image", "group", "order", "pet_type"]
+        fields = ["id", "title", "subtitle", "image", "group", "order", "pet_type", "product_count"]
+
+
+class BrandSerializer(serializers.ModelSerializer):
+    logo = ImageURLField(required=False, allow_null=True)
+    # only on annotated querysets (the brand list)
+    product_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Brand
+        fields = ["id", "slug", "name", "logo", "product_count"]
 
 
-class PetProductSerializer(serializers.ModelSerializer):
+class PetProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     image = ImageURLField()
     quantity_display = serializers.ReadOnlyField()
 
     class Meta:
         model = PetProduct
         fields = [
-            "id", "title", "image", "price",
+            "id", "title", "image", "price", "mrp", "discount_pct",
             "quantity_value", "quantity_unit", "quantity_display",
+            "unit_price", "unit_price_basis",
             "rating", "rating_count",
         ]
 
 
+def render_card(product):
+    """PetProduct.card_json for `product`: its PetProductSerializer output as the JSON renderer writes it."""
+    return JSONRenderer().render(PetProductSerializer(product).data).decode()
+
+
+def _decimal(value):
+    return None if value is None else f"{value.quantize(CENT):f}"
+
+
+class PetProductCardProjection:
+    """
+    values()-based twin of PetProductSerializer for lists and the cart. Without
+    ?fields= it selects only id and the prebuilt card_json and returns CardJSON
+    values that CardJSONRenderer copies into the response (the view must use
+    renderers.CARD_RENDERERS); with ?fields=, or for rows whose card hasn't been
+    built yet, it selects the card columns and builds the dicts directly. Either
+    way the JSON is identical to the serializer's.
+
+        cards = PetProductCardProjection(request)
+        data = cards.many(cards.queryset(qs))
+    """
+    # card field -> columns it is built from
+    sources = {
+        "quantity_display": ("quantity_value", "quantity_unit"),
+    }
+    converters = {
+        "price": _decimal, "mrp": _decimal, "quantity_value": _decimal, "unit_price": _decimal,
+        "title": str, "quantity_unit": str, "unit_price_basis": str,
+        "id": int, "discount_pct": int, "rating": int, "rating_count": int,
+    }
+
+    def __init__(self, request=None, prebuilt=True):
+        self.request = request
+        only = query_list(request, "fields")
+        self.prebuilt = prebuilt and not only
+        # stored cards carry root-relative image URLs, made absolute by a prefix swap
+        self.origin = request.build_absolute_uri("/")[:-1] if request is not None else ""
+        self.fields = [f for f in PetProductSerializer.Meta.fields if not only or f in only]
+        self.columns = list(dict.fromkeys(c for f in self.fields for c in self.sources.get(f, (f,))))
+        storage = PetProduct._meta.get_field("image").storage
+        # with the default storage a file URL is MEDIA_URL + quoted name, so the
+        # absolute prefix is worked out once instead of per row
+        self.media_prefix = None
+        if isinstance(storage, FileSystemStorage):
+            base = storage.base_url
+            self.media_prefix = request.build_absolute_uri(base) if request is not None else base
+        self.storage = storage
+
+    def queryset(self, queryset, *extra):
+        """`queryset` as values() rows with the card columns plus `extra` (e.g. keyset ordering fields)."""
+        columns = ["id", "card_json"] if self.prebuilt else self.columns
+        return queryset.values(*dict.fromkeys([*columns, *extra]))
+
+    def image_url(self, name):
+        if not name:
+            return None
+        if self.media_prefix is not None:
+            return self.media_prefix + filepath_to_uri(name).lstrip("/")
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def spliced(self, card_json):
+        if self.origin:
+            card_json = card_json.replace('"image":"/', f'"image":"{self.origin}/', 1)
+        return CardJSON(card_json)
+
+    def one(self, row):
+        if self.prebuilt:
+            if row["card_json"]:
+                return self.spliced(row["card_json"])
+            return PetProductCardProjection(self.request, prebuilt=False).by_id([row["id"]])[row["id"]]
+        card = {}
+        for name in self.fields:
+            if name == "image":
+                card[name] = self.image_url(row["image"])
+            elif name == "quantity_display":
+                card[name] = f"{row['quantity_value']} {row['quantity_unit']}"
+            else:
+                value = row[name]
+                card[name] = None if value is None else self.converters[name](value)
+        return card
+
+    def many(self, rows):
+        if not self.prebuilt:
+            return [self.one(row) for row in rows]
+        rows = list(rows)
+        unbuilt = [row["id"] for row in rows if not row["card_json"]]
+        built = PetProductCardProjection(self.request, prebuilt=False).by_id(unbuilt) if unbuilt else {}
+        return [self.spliced(row["card_json"]) if row["card_json"] else built[row["id"]] for row in rows]
+
+    def by_id(self, ids):
+        """{id: card} for the given product ids, one query (two if some cards aren't built yet)."""
+        rows = list(self.queryset(PetProduct.objects.filter(pk__in=ids), "id"))
+        return dict(zip((row["id"] for row in rows), self.many(rows)))
+
+
 class PetBannerSerializer(serializers.ModelSerializer):
     left_image = ImageURLField(required=False, allow_null=True)
     right_image = ImageURLField(required=False, allow_null=True)
@@ -1,11 +1,34 @@
 # petshop/serializers_cart.py
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .models_cart import Cart, CartItem
 from .models import PetProduct
-from .serializers import PetProductSerializer  # reuse product serializer
+from .recommendations import bought_with
+from .serializers import PetProductCardProjection, query_list
+
+CART_RECOMMENDATIONS = 6
+
+
+class ProductCardField(serializers.Field):
+    """
+    The PetProductSerializer card of a FK, built by the values() projection.
+    A parent that serializes many rows can put {product_id: card} in
+    context["product_cards"] so all cards come from one query.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "product_id")
+        super().__init__(read_only=True, **kwargs)
+
+    def to_representation(self, product_id):
+        cards = self.context.get("product_cards")
+        if cards is None or product_id not in cards:
+            cards = PetProductCardProjection(self.context.get("request")).by_id([product_id])
+        return cards.get(product_id)
+
 
 class CartItemSerializer(serializers.ModelSerializer):
-    product = PetProductSerializer(read_only=True)
+    product = ProductCardField()
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=PetProduct.objects.all(),
         source="product",
@@ -27,3 +50,18 @@ class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ["token", "items", "subtotal", "item_count"]
+
+    def to_representation(self, instance):
+        # items, subtotal and item_count share one items query, the cards one more
+        request = self.context.get("request")
+        prefetch_related_objects([instance], "items")
+        product_ids = [item.product_id for item in instance.items.all()]
+        cards = PetProductCardProjection(request)
+        self.context["product_cards"] = cards.by_id(product_ids)
+        data = super().to_representation(instance)
+        # ?expand=recommendations: frequently bought with the cart's products
+        if "recommendations" in (query_list(request, "expand") or ()):
+            ids = bought_with(product_ids, CART_RECOMMENDATIONS) if product_ids else []
+            recommended = cards.by_id(ids) if ids else {}
+            data["recommendations"] = [recommended[pk] for pk in ids if pk in recommended]
+        return data
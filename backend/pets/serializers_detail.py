@@ -1,7 +1,9 @@
 # petshop/serializers_detail.py
+from decimal import ROUND_HALF_UP, Decimal
+
 from rest_framework import serializers
-from .models import PetProduct, ProductReview
-from .serializers import ImageURLField, PetProductSerializer
+from .models import RATING_FIELDS, STARS, PetProduct, ProductReview
+from .serializers import ImageURLField, PetProductSerializer, SparseFieldsMixin
 
 
 class ProductReviewSerializer(serializers.ModelSerializer):
@@ -10,18 +12,55 @@ class ProductReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductReview
         fields = ["id", "name", "email", "rating", "review", "created"]
+        # collected with the review, never shown back
+        extra_kwargs = {"email": {"write_only": True}}
+
+
+class RecommendedProductSerializer(PetProductSerializer):
+    """The card of a ProductRecommendation's recommended product."""
+
+    def to_representation(self, recommendation):
+        return super().to_representation(recommendation.recommended)
 
 
-class PetProductDetailSerializer(serializers.ModelSerializer):
+class PetProductDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     image = ImageURLField(required=False, allow_null=True)
     quantity_display = serializers.ReadOnlyField()
-    related_products = PetProductSerializer(source="related", many=True, read_only=True)
-    reviews = ProductReviewSerializer(many=True, read_only=True)
+    # filled by the detail view's capped prefetches
+    related_products = PetProductSerializer(source="related_preview", many=True, read_only=True)
+    reviews = ProductReviewSerializer(source="latest_reviews", many=True, read_only=True)
+    bought_together = RecommendedProductSerializer(source="top_recommendations", many=True, read_only=True)
 
     class Meta:
         model = PetProduct
         fields = [
             "id", "pet_type", "title", "brand", "image", "description",
             "price", "mrp", "quantity_value", "quantity_unit", "quantity_display",
-            "rating", "rating_count", "related_products", "reviews",
+            "rating", "rating_count", "related_products", "reviews", "bought_together",
         ]
+        # ?expand= name -> field; left out (with its prefetch) unless requested
+        expandable = {"related": "related_products", "reviews": "reviews", "together": "bought_together"}
+
+
+# PetProduct columns a review summary is built from, for values()
+SUMMARY_FIELDS = ("id", "rating", *RATING_FIELDS)
+
+
+def review_summary(row):
+    """
+    Review count, average and per-star breakdown from the stored aggregates
+    of one SUMMARY_FIELDS row; no ProductReview query.
+    """
+    count = row["rating_count"]
+    stars = {str(i): row[f"stars_{i}"] for i in STARS}
+    return {
+        "id": row["id"],
+        "rating": row["rating"],
+        "rating_count": count,
+        "average": f"{Decimal(row['rating_sum']) / count:.2f}" if count else None,
+        "stars": stars,
+        "percent": {
+            star: int((Decimal(100 * n) / count).quantize(Decimal(1), rounding=ROUND_HALF_UP)) if count else 0
+            for star, n in stars.items()
+        },
+    }
@@ -0,0 +1,242 @@
+# petshop/signals.py
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import bestsellers, catalog_file, search  # catalog_file registers its version-bump writer
+from .catalog import bump_version
+from .fuzzy import fuzzy_index
+from .models import Brand, PetBanner, PetCategory, PetProduct, ProductCategory, ProductReview, ProductTombstone
+from .suggest import suggest_index
+
+
+def _catalog_changed(*changes):
+    """After commit: bump the catalog version and patch this worker's in-memory indexes."""
+    def run():
+        previous, new = bump_version()
+        for index, change in changes:
+            index.apply(change, previous, new)
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=PetProduct)
+def product_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_product(instance)
+
+    pk, title, brand = instance.pk, instance.title, instance.brand
+    rating_count, pet_type, active = instance.rating_count, instance.pet_type, instance.is_active
+
+    def update_suggest(index):
+        index.remove_product(pk)
+        if active:
+            index.add_product(pk, title, brand, rating_count, pet_type)
+
+    def update_fuzzy(index):
+        index.remove_product(pk)
+        if active:
+            index.add_product(pk, title, brand)
+
+    _catalog_changed((suggest_index, update_suggest), (fuzzy_index, update_fuzzy))
+
+
+@receiver(post_delete, sender=PetProduct)
+def product_deleted(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+    ProductTombstone.objects.create(product_id=instance.pk, pet_type=instance.pet_type)
+    pk = instance.pk
+    _catalog_changed(
+        (suggest_index, lambda index: index.remove_product(pk)),
+        (fuzzy_index, lambda index: index.remove_product(pk)),
+    )
+
+
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=PetBanner)
+def catalog_row_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _catalog_changed()
+
+
+@receiver(post_save, sender=PetCategory)
+def category_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    pk, title, pet_type = instance.pk, instance.title, instance.pet_type
+
+    def update_suggest(index):
+        index.remove_category(pk)
+        index.add_category(pk, title, pet_type)
+
+    _catalog_changed((suggest_index, update_suggest))
+
+
+@receiver(post_delete, sender=PetCategory)
+def category_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    _catalog_changed((suggest_index, lambda index: index.remove_category(pk)))
+
+
+# PetCategory.product_count: adjusted by +/-1 on every change to the active
+# products of a category instead of COUNTed per request. Links added through
+# product.categories.add() arrive via m2m_changed (add() uses bulk_create),
+# single rows saved directly (admin inline) via post_save; every removal,
+# including cascades, comes through post_delete on the link row.
+
+@receiver(m2m_changed, sender=ProductCategory)
+def product_categories_added(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        added = PetProduct.objects.filter(pk__in=pk_set, is_active=True).count()
+        PetCategory.objects.filter(pk=instance.pk).adjust_count(added)
+    elif instance.is_active:
+        PetCategory.objects.filter(pk__in=pk_set).adjust_count(1)
+    _catalog_changed()
+
+
+@receiver(post_save, sender=ProductCategory)
+def product_category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    if PetProduct.objects.filter(pk=instance.product_id, is_active=True).exists():
+        PetCategory.objects.filter(pk=instance.category_id).adjust_count(1)
+    _catalog_changed()
+
+
+@receiver(post_delete, sender=ProductCategory)
+def product_category_deleted(sender, instance, **kwargs):
+    if PetProduct.objects.filter(pk=instance.product_id, is_active=True).exists():
+        PetCategory.objects.filter(pk=instance.category_id).adjust_count(-1)
+    _catalog_changed()
+
+
+@receiver(pre_save, sender=PetProduct)
+def product_activation_check(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._was_active = None
+    if raw or instance._state.adding or (update_fields is not None and "is_active" not in update_fields):
+        return
+    instance._was_active = PetProduct.objects.filter(pk=instance.pk).values_list("is_active", flat=True).first()
+
+
+@receiver(post_save, sender=PetProduct)
+def product_activation_saved(sender, instance, **kwargs):
+    was_active = getattr(instance, "_was_active", None)
+    if was_active is not None and was_active != instance.is_active:
+        PetCategory.objects.filter(products=instance.pk).adjust_count(1 if instance.is_active else -1)
+
+
+# PetProduct rating aggregates: one F() update per review written or deleted,
+# in the review's own transaction; an edited rating (admin) moves it between stars.
+
+@receiver(pre_save, sender=ProductReview)
+def review_rating_check(sender, instance, raw=False, **kwargs):
+    instance._rated = None
+    if raw or instance._state.adding:
+        return
+    instance._rated = ProductReview.objects.filter(pk=instance.pk).values_list("product_id", "rating").first()
+
+
+@receiver(post_save, sender=ProductReview)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    rated = (instance.product_id, instance.rating)
+    before = getattr(instance, "_rated", None)
+    if not created and (before is None or before == rated):
+        return
+    if before is not None:
+        PetProduct.objects.filter(pk=before[0]).add_rating(before[1], -1)
+    PetProduct.objects.filter(pk=instance.product_id).add_rating(instance.rating)
+
+
+@receiver(post_delete, sender=ProductReview)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    # reviews going away with their product leave nothing to update
+    if isinstance(origin, PetProduct) or (isinstance(origin, QuerySet) and origin.model is PetProduct):
+        return
+    PetProduct.objects.filter(pk=instance.product_id).add_rating(instance.rating, -1)
+
+
+# Bestseller windows: each order line counts once it is written; editing its
+# quantity or product (admin inline) moves the difference, deleting it takes it
+# back out. Cancelling or deleting an order takes all its lines back out,
+# reopening a cancelled one puts them back.
+
+def _order_status(item):
+    """Status of the item's order, from the order instance when it's already loaded."""
+    field = item._meta.get_field("order")
+    if field.is_cached(item):
+        return field.get_cached_value(item).status
+    return field.related_model.objects.filter(pk=item.order_id).values_list("status", flat=True).first()
+
+
+@receiver(pre_save, sender="orders.OrderItem")
+def order_item_check(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._counted = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {"product_id", "quantity"} & set(update_fields):
+        return
+    instance._counted = sender.objects.filter(pk=instance.pk).values_list("product_id", "created", "quantity").first()
+
+
+@receiver(post_save, sender="orders.OrderItem")
+def order_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    line = (instance.product_id, instance.created, instance.quantity)
+    before = getattr(instance, "_counted", None)
+    if not created and (before is None or before[::2] == line[::2]):
+        return
+    if _order_status(instance) in (None, "cancelled"):
+        return
+    if before is None:
+        lines = [line]
+    elif before[0] == line[0]:
+        lines = [(line[0], before[1], line[2] - before[2])]
+    else:
+        lines = [(before[0], before[1], -before[2]), (line[0], before[1], line[2])]
+    bestsellers.record(lines)
+
+
+@receiver(post_delete, sender="orders.OrderItem")
+def order_item_deleted(sender, instance, origin=None, **kwargs):
+    # lines going away with their order were taken out by order_deleted
+    Order = sender._meta.get_field("order").related_model
+    if isinstance(origin, Order) or (isinstance(origin, QuerySet) and origin.model is Order):
+        return
+    if _order_status(instance) in (None, "cancelled"):
+        return
+    bestsellers.record([(instance.product_id, instance.created, instance.quantity)], -1)
+
+
+@receiver(pre_save, sender="orders.Order")
+def order_status_check(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._was_cancelled = None
+    if raw or instance._state.adding or (update_fields is not None and "status" not in update_fields):
+        return
+    status = sender.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    instance._was_cancelled = None if status is None else status == "cancelled"
+
+
+@receiver(post_save, sender="orders.Order")
+def order_status_saved(sender, instance, **kwargs):
+    was_cancelled = getattr(instance, "_was_cancelled", None)
+    cancelled = instance.status == "cancelled"
+    if was_cancelled is None or was_cancelled == cancelled:
+        return
+    lines = instance.items.values_list("product_id", "created", "quantity")
+    bestsellers.record(list(lines), -1 if cancelled else 1)
+
+
+@receiver(pre_delete, sender="orders.Order")
+def order_deleted(sender, instance, **kwargs):
+    # before the delete, while the lines are still there to read
+    status = sender.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    if status in (None, "cancelled"):
+        return
+    lines = instance.items.values_list("product_id", "created", "quantity")
+    bestsellers.record(list(lines), -1)
@@ -0,0 +1,178 @@
+# petshop/similar.py
+"""
+Content-based "similar products", for products without order history.
+
+Every active product becomes a TF-IDF vector over the words of its title,
+brand and description (weighted by FIELD_WEIGHTS) plus one term each for its
+pet_type and quantity_unit: sublinear tf, smoothed idf, L2-normalized, kept as
+a pair of compact arrays (term ids, weights). Neighbours are found through an
+inverted index of the terms rare enough to be telling (2 <= df <= MAX_DF * N):
+the partial dot products over those terms pick CANDIDATES per product, whose
+exact cosine (every shared term, common ones included) decides the TOP_K kept.
+Scoring work is proportional to the postings a product's terms touch, never
+to N^2.
+
+build(incremental=True) vectorizes the whole catalog again (cheap) but only
+re-scores products updated since the last run, products whose stored list
+holds one of those, and products a changed product now beats the last entry
+of; everything else keeps its rows. A full run now and then re-bases every
+score on the current idf.
+"""
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import PetProduct, ProductSimilarity
+from .suggest import tokenize
+
+TOP_K = 10
+# exact cosines computed per product, the best partial scores first
+CANDIDATES = 100
+MIN_SCORE = 0.05
+# terms in more than this share of products (and more than MIN_COMMON) don't generate candidates
+MAX_DF = 0.05
+MIN_COMMON = 50
+# a product's strongest terms that are looked up in the inverted index
+QUERY_TERMS = 16
+FIELD_WEIGHTS = {"title": 3, "brand": 2, "description": 1}
+CHUNK_SIZE = 2000
+WRITE_BATCH = 1000
+
+
+def terms(row):
+    """Weighted term counts of a product row (values() dict)."""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in tokenize(row[field]):
+            counts[word] += weight
+    counts[f"pet:{row['pet_type']}"] += 1
+    counts[f"unit:{row['quantity_unit']}"] += 1
+    return counts
+
+
+class Vectors:
+    """TF-IDF vectors of every active product plus the candidate inverted index."""
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_df=MAX_DF):
+        rows = (
+            PetProduct.objects.filter(is_active=True).order_by("id")
+            .values("id", "pet_type", "quantity_unit", *FIELD_WEIGHTS).iterator(chunk_size=chunk_size)
+        )
+        vocabulary, df, raw = {}, Counter(), []
+        self.ids = array("q")
+        for row in rows:
+            counts = {vocabulary.setdefault(term, len(vocabulary)): tf for term, tf in terms(row).items()}
+            df.update(counts.keys())
+            self.ids.append(row["id"])
+            raw.append(counts)
+
+        n = len(raw)
+        idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+        self.position = {pk: i for i, pk in enumerate(self.ids)}
+        self.terms, self.weights = [], []
+        postings = defaultdict(list)
+        common = max(MIN_COMMON, int(max_df * n))
+        for i, counts in enumerate(raw):
+            weighted = sorted(((1 + math.log(tf)) * idf[term], term) for term, tf in counts.items())
+            norm = math.sqrt(sum(w * w for w, _term in weighted)) or 1.0
+            self.terms.append(array("I", (term for _w, term in weighted)))
+            self.weights.append(array("f", (w / norm for w, _term in weighted)))
+            for w, term in weighted:
+                if 2 <= df[term] <= common:
+                    postings[term].append((i, w / norm))
+        self.postings = {
+            term: (array("I", (i for i, _w in entries)), array("f", (w for _i, w in entries)))
+            for term, entries in postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def neighbours(self, i, top_k=TOP_K, candidates=CANDIDATES, min_score=MIN_SCORE):
+        """[(score, position), ...] best first: the top_k products most similar to position i."""
+        query = dict(zip(self.terms[i], self.weights[i]))
+        strongest = heapq.nlargest(QUERY_TERMS, (
+            (w, term) for term, w in query.items() if term in self.postings
+        ))
+        partial = defaultdict(float)
+        for w, term in strongest:
+            positions, weights = self.postings[term]
+            for j, wj in zip(positions, weights):
+                partial[j] += w * wj
+        partial.pop(i, None)
+        scored = []
+        for j in heapq.nlargest(candidates, partial, key=partial.__getitem__):
+            score = sum(query.get(term, 0.0) * w for term, w in zip(self.terms[j], self.weights[j]))
+            if score >= min_score:
+                scored.append((score, -j))
+        return [(score, -j) for score, j in heapq.nlargest(top_k, scored)]
+
+
+def _affected(vectors, since, top_k):
+    """Positions to re-score in an incremental run, and the product ids whose rows go."""
+    changed = set(PetProduct.objects.filter(updated__gte=since).values_list("id", flat=True))
+    stale = set(
+        ProductSimilarity.objects.filter(similar__updated__gte=since)
+        .values_list("product_id", flat=True).distinct()
+    )
+    affected = {vectors.position[pk] for pk in changed | stale if pk in vectors.position}
+
+    # a changed product can push its way into lists that don't mention it yet:
+    # compare against the last stored score, cosine being symmetric
+    floors = {
+        row["product"]: row["floor"] if row["kept"] >= top_k else 0.0
+        for row in ProductSimilarity.objects.values("product").annotate(kept=Count("id"), floor=Min("score"))
+    }
+    for pk in changed:
+        i = vectors.position.get(pk)
+        if i is None:
+            continue
+        for score, j in vectors.neighbours(i, top_k=CANDIDATES):
+            if score > floors.get(vectors.ids[j], 0.0):
+                affected.add(j)
+    return affected, changed | stale
+
+
+def _write(vectors, positions, started, top_k):
+    written, batch = 0, []
+    for i in positions:
+        batch += [
+            ProductSimilarity(product_id=vectors.ids[i], similar_id=vectors.ids[j], rank=rank, score=score, computed=started)
+            for rank, (score, j) in enumerate(vectors.neighbours(i, top_k))
+        ]
+        if len(batch) >= WRITE_BATCH:
+            written += len(ProductSimilarity.objects.bulk_create(batch))
+            batch = []
+    return written + len(ProductSimilarity.objects.bulk_create(batch))
+
+
+def build(top_k=TOP_K, incremental=False, chunk_size=CHUNK_SIZE):
+    """
+    Recompute ProductSimilarity (only what changed since the last run with
+    incremental=True, a full rebuild if there is no last run). Returns
+    (products scored, rows written).
+    """
+    started = timezone.now()
+    since = ProductSimilarity.objects.aggregate(last=Max("computed"))["last"] if incremental else None
+    vectors = Vectors(chunk_size)
+    if since is None:
+        positions, cleared = range(len(vectors)), None
+    else:
+        positions, cleared = _affected(vectors, since, top_k)
+        positions = sorted(positions)
+        cleared |= {vectors.ids[i] for i in positions}
+
+    with transaction.atomic():
+        if cleared is None:
+            ProductSimilarity.objects.all().delete()
+        else:
+            cleared = list(cleared)
+            for start in range(0, len(cleared), WRITE_BATCH):
+                ProductSimilarity.objects.filter(product__in=cleared[start:start + WRITE_BATCH]).delete()
+        written = _write(vectors, positions, started, top_k)
+    return len(positions), written
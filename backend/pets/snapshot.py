@@ -0,0 +1,234 @@
+# petshop/snapshot.py
+"""
+Optional in-process snapshot of the catalog for the read-heavy listing endpoints.
+
+With PETS_CATALOG_SNAPSHOT = True each worker keeps, per pet_type, the active
+products as __slots__ records in default grid order, with their card JSON
+pre-serialized, plus the serialized categories and banner. /api/pet-products/
+and /api/pet-page/ then filter, sort and page in memory with no SQL at all.
+A snapshot is never mutated: a catalog version bump (product, category, link,
+brand or banner change) makes the next reader build a new one and swap it in,
+while concurrent readers keep answering from the old one meanwhile.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+
+from .catalog import VersionedIndex, current_version
+from .facets import PRICE_BANDS
+from .models import PetBanner, PetCategory, PetProduct, ProductCategory
+from .pagination import PRODUCT_ORDERING, KeysetPage, decode_cursor, encode_cursor
+from .serializers import PetBannerSerializer, PetCategorySerializer, PetProductSerializer, present_cards
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def enabled():
+    return getattr(settings, "PETS_CATALOG_SNAPSHOT", False)
+
+
+def _micros(moment):
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+# PetProduct columns the listing filters and orderings need
+RECORD_FIELDS = (
+    "id", "order", "created", "price", "mrp", "rating", "rating_count", "unit_price",
+    "unit_price_basis", "discount_pct", "quantity_unit",
+)
+
+
+class ProductRecord:
+    __slots__ = (*RECORD_FIELDS, "brand", "categories", "card")
+
+    def __init__(self, product, brand, categories, card):
+        for name in RECORD_FIELDS:
+            setattr(self, name, getattr(product, name))
+        self.brand = brand
+        self.categories = categories
+        self.card = card
+
+    def sort_key(self, fields):
+        return tuple(_key_value(getattr(self, name), desc) for name, desc in fields)
+
+
+def _key_value(value, desc):
+    # every ordering field is numeric or a datetime, so descending is a negation
+    if isinstance(value, datetime):
+        value = _micros(value)
+    return -value if desc else value
+
+
+def matches(record, params, filters):
+    """The filters of views._product_listing / facets.filter_queryset, on a record."""
+    if params.get("unit_basis") and record.unit_price_basis != params["unit_basis"]:
+        return False
+    category = params.get("category", "")
+    if category.isdigit() and int(category) not in record.categories:
+        return False
+    if "brand" in filters and record.brand not in filters["brand"]:
+        return False
+    if "quantity_unit" in filters and record.quantity_unit not in filters["quantity_unit"]:
+        return False
+    if "price" in filters and not any(
+        value in filters["price"] and record.price >= low and (high is None or record.price < high)
+        for value, low, high in PRICE_BANDS
+    ):
+        return False
+    if "rating" in filters and str(record.rating) not in filters["rating"]:
+        return False
+    if "has_discount" in filters and not (record.mrp is not None and record.mrp > record.price):
+        return False
+    return True
+
+
+class PetTypeSnapshot:
+    def __init__(self, records, categories, banner):
+        self.records = records  # default grid order
+        self.categories = categories
+        self.banner = banner
+        self._orders = {tuple(PRODUCT_ORDERING): (records, [r.sort_key(_fields(PRODUCT_ORDERING)) for r in records])}
+        self._lock = threading.Lock()
+
+    def ordered(self, ordering):
+        """(records, sort keys) in `ordering`; other sorts are built on first use and kept."""
+        ordering = tuple(ordering)
+        if ordering not in self._orders:
+            fields = _fields(ordering)
+            records = self.records
+            if "unit_price" in ordering:
+                records = [r for r in records if r.unit_price is not None]
+            records = sorted(records, key=lambda r: r.sort_key(fields))
+            with self._lock:
+                self._orders.setdefault(ordering, (records, [r.sort_key(fields) for r in records]))
+        return self._orders[ordering]
+
+    def filtered(self, ordering, params, filters):
+        records, keys = self.ordered(ordering)
+        if not filters and not params.get("unit_basis") and not params.get("category"):
+            return records, keys
+        rows = [(r, k) for r, k in zip(records, keys) if matches(r, params, filters)]
+        return [r for r, _k in rows], [k for _r, k in rows]
+
+
+def _fields(ordering):
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def keyset_page(records, keys, ordering, page_size, cursor=None):
+    """
+    Same paging and cursors as pagination.KeysetPaginator, by bisecting the
+    pre-sorted keys.
+    """
+    fields = _fields(ordering)
+    reverse = False
+    if cursor:
+        values, reverse = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise NotFound("Invalid cursor")
+        position = _cursor_key(values, fields)
+        if reverse:
+            end = bisect.bisect_left(keys, position)
+            start = max(0, end - page_size)
+            rows = records[start:end]
+            has_next, has_previous = True, start > 0
+        else:
+            start = bisect.bisect_right(keys, position)
+            rows = records[start:start + page_size]
+            has_next, has_previous = start + page_size < len(records), True
+    else:
+        rows = records[:page_size]
+        has_next, has_previous = len(records) > page_size, False
+    if not rows:
+        return KeysetPage(rows, None, None)
+
+    def position(record):
+        return [getattr(record, name) for name, _desc in fields]
+
+    next_cursor = encode_cursor(position(rows[-1])) if has_next else None
+    previous_cursor = encode_cursor(position(rows[0]), reverse=True) if has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def _cursor_key(values, fields):
+    opts = PetProduct._meta
+    try:
+        return tuple(
+            _key_value(opts.get_field(name).to_python(value), desc)
+            for (name, desc), value in zip(fields, values)
+        )
+    except (ValidationError, TypeError):
+        raise NotFound("Invalid cursor")
+
+
+def cards(rows, request):
+    return present_cards([record.card for record in rows], request)
+
+
+def absolute_images(data, request, *names):
+    data = dict(data)
+    for name in names:
+        if data.get(name) and not data[name].startswith("http"):
+            data[name] = request.build_absolute_uri(data[name])
+    return data
+
+
+def build_snapshot():
+    products = list(
+        PetProduct.objects.filter(is_active=True).select_related("brand_ref").order_by(*PRODUCT_ORDERING)
+    )
+    links = {}
+    for product_id, category_id in ProductCategory.objects.values_list("product_id", "category_id").iterator():
+        links.setdefault(product_id, set()).add(category_id)
+    serialized = PetProductSerializer(products, many=True).data
+
+    by_type = {}
+    for product, card in zip(products, serialized):
+        brand = product.brand_ref.slug if product.brand_ref else None
+        record = ProductRecord(product, brand, frozenset(links.get(product.id, ())), dict(card))
+        by_type.setdefault(product.pet_type, []).append(record)
+
+    categories = {}
+    for category in PetCategory.objects.order_by("order", "id"):
+        categories.setdefault(category.pet_type, []).append(PetCategorySerializer(category).data)
+    banners = {banner.pet_type: PetBannerSerializer(banner).data for banner in PetBanner.objects.all()}
+
+    pet_types = set(by_type) | set(categories) | set(banners)
+    return {
+        pet_type: PetTypeSnapshot(by_type.get(pet_type, []), categories.get(pet_type, []), banners.get(pet_type))
+        for pet_type in pet_types
+    }
+
+
+class CatalogSnapshot(VersionedIndex):
+    """
+    VersionedIndex that doesn't make readers wait for a rebuild: while one
+    request builds the next snapshot the others keep using the current one.
+    """
+
+    def get(self):
+        version = current_version()
+        if self._index is not None and self._version == version:
+            return self._index
+        if self._index is not None and not self._lock.acquire(blocking=False):
+            return self._index
+        if self._index is None:
+            self._lock.acquire()
+        try:
+            if self._index is None or self._version != version:
+                index = self._build()
+                self._index, self._version = index, version
+            return self._index
+        finally:
+            self._lock.release()
+
+
+catalog_snapshot = CatalogSnapshot(build_snapshot)
+
+
+def pet_type_snapshot(pet_type):
+    return catalog_snapshot.get().get(pet_type) or PetTypeSnapshot([], [], None)
@@ -0,0 +1,299 @@
+# petshop/suggest.py
+"""
+In-memory typeahead over product titles, brands and category titles.
+
+Every suggestion is an entry (a "handle"); each distinct word maps to a posting
+array of handles sorted by weight (rating_count, summed per brand) and the
+vocabulary is a sorted list, so a keystroke is a bisect on the vocabulary plus
+a merge of the heads of a few postings. Nothing here touches the database once
+the index is built.
+
+Per-handle data lives in typed arrays (ids, weights, pet type and brand codes)
+rather than Python objects, and products are found through an array indexed by
+product id, so apart from the label strings 100k products take a few MB.
+
+Patches keep postings sorted by inserting at the bisected position. Removed
+entries leave dead handles behind; once they outnumber the live ones the
+columns are compacted and every handle renumbered.
+"""
+import bisect
+import heapq
+import re
+import unicodedata
+from array import array
+
+from .catalog import VersionedIndex
+
+PRODUCT, BRAND, CATEGORY = 0, 1, 2
+KIND_NAMES = {PRODUCT: "products", BRAND: "brands", CATEGORY: "categories"}
+
+MIN_PREFIX = 1
+# bounds the work per keystroke for very short prefixes like "d"
+MAX_WORDS_SCANNED = 200
+MAX_CANDIDATES = 500
+# compact once there are more dead handles than live ones (and at least this many)
+COMPACT_MIN_DEAD = 256
+MAX_WEIGHT = 0xFFFFFFFF
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold()
+
+
+def tokenize(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+class SuggestIndex:
+    def __init__(self):
+        # per-handle columns
+        self.kinds = array("B")
+        self.weights = array("I")
+        self.refs = array("I")      # product id / category id / brand number
+        self.pet_codes = array("B") # position in pet_type_names; 0 (None) for brands
+        self.owners = array("i")    # a product's brand number, -1 for none
+        self.labels = []            # display text, None once the entry is removed
+        self.dead = 0               # removed handles still in the columns
+
+        self.words = []             # sorted vocabulary
+        self.postings = {}          # word -> array("I") of handles, heaviest first
+
+        self.products = array("i")  # product id -> handle, -1 for none
+        self.categories = {}        # category id -> handle
+        self.brands = {}            # brand key -> [handle, {pet type: member count}]
+        self.brand_keys = []        # brand number -> brand key, None once removed
+        self.pet_type_names = [None]
+        self._pet_code = {None: 0}
+
+    # -- building -------------------------------------------------------
+
+    def _new_handle(self, kind, ref, label, weight, pet_type, owner=-1):
+        handle = len(self.labels)
+        code = self._pet_code.get(pet_type)
+        if code is None:
+            code = self._pet_code[pet_type] = len(self.pet_type_names)
+            self.pet_type_names.append(pet_type)
+        self.kinds.append(kind)
+        self.weights.append(min(weight, MAX_WEIGHT))
+        self.refs.append(ref)
+        self.pet_codes.append(code)
+        self.owners.append(owner)
+        self.labels.append(label)
+        return handle
+
+    def _heavier_first(self, handle):
+        return -self.weights[handle]
+
+    def _link(self, handle, text, resort=True):
+        for word in set(tokenize(text)):
+            posting = self.postings.get(word)
+            if posting is None:
+                self.postings[word] = array("I", [handle])
+                bisect.insort(self.words, word)
+            elif resort:
+                bisect.insort(posting, handle, key=self._heavier_first)
+            else:
+                posting.append(handle)
+
+    def _unlink(self, handle, text):
+        for word in set(tokenize(text)):
+            posting = self.postings.get(word)
+            if posting is None or handle not in posting:
+                continue
+            posting.remove(handle)
+            if not posting:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def _sort(self, word):
+        posting = self.postings[word]
+        self.postings[word] = array("I", sorted(posting, key=self.weights.__getitem__, reverse=True))
+
+    def _reweight(self, handle, text, weight, resort=True):
+        words = set(tokenize(text)) if resort else ()
+        for word in words:
+            self.postings[word].remove(handle)
+        self.weights[handle] = max(0, min(weight, MAX_WEIGHT))
+        for word in words:
+            bisect.insort(self.postings[word], handle, key=self._heavier_first)
+
+    def _drop(self, handle):
+        self._unlink(handle, self.labels[handle])
+        self.labels[handle] = None
+        self.dead += 1
+
+    def _compact(self):
+        """Squeeze the dead handles out of the columns and renumber the live ones."""
+        live = [h for h, label in enumerate(self.labels) if label is not None]
+        new = array("i", [-1]) * len(self.labels)
+        for i, h in enumerate(live):
+            new[h] = i
+        brands = [key for key in self.brand_keys if key is not None]
+        brand_new = {key: i for i, key in enumerate(brands)}
+        renumber = array("i", (brand_new[key] if key is not None else -1 for key in self.brand_keys))
+
+        self.refs = array("I", (renumber[self.refs[h]] if self.kinds[h] == BRAND else self.refs[h] for h in live))
+        self.kinds = array("B", (self.kinds[h] for h in live))
+        self.weights = array("I", (self.weights[h] for h in live))
+        self.pet_codes = array("B", (self.pet_codes[h] for h in live))
+        self.owners = array("i", (renumber[self.owners[h]] if self.owners[h] >= 0 else -1 for h in live))
+        self.labels = [self.labels[h] for h in live]
+        # renumbering keeps the relative order, so the postings stay sorted
+        self.postings = {word: array("I", (new[h] for h in posting)) for word, posting in self.postings.items()}
+        self.products = array("i", (new[h] if h >= 0 else -1 for h in self.products))
+        self.categories = {pk: new[h] for pk, h in self.categories.items()}
+        for entry in self.brands.values():
+            entry[0] = new[entry[0]]
+        self.brand_keys = brands
+        self.dead = 0
+
+    def _maybe_compact(self):
+        if self.dead >= COMPACT_MIN_DEAD and self.dead * 2 > len(self.labels):
+            self._compact()
+
+    def _product_handle(self, product_id):
+        return self.products[product_id] if product_id < len(self.products) else -1
+
+    def add_product(self, product_id, title, brand, weight, pet_type, resort=True):
+        key = normalize(brand).strip()
+        owner = -1
+        if key:
+            entry = self.brands.get(key)
+            if entry is None:
+                owner = len(self.brand_keys)
+                self.brand_keys.append(key)
+                brand_handle = self._new_handle(BRAND, owner, brand.strip(), weight, None)
+                self.brands[key] = [brand_handle, {pet_type: 1}]
+                self._link(brand_handle, brand, resort)
+            else:
+                owner = self.refs[entry[0]]
+                members = entry[1]
+                members[pet_type] = members.get(pet_type, 0) + 1
+                self._reweight(entry[0], self.labels[entry[0]], self.weights[entry[0]] + weight, resort)
+        handle = self._new_handle(PRODUCT, product_id, title, weight, pet_type, owner)
+        if product_id >= len(self.products):
+            self.products.extend(array("i", [-1]) * (product_id + 1 - len(self.products)))
+        self.products[product_id] = handle
+        self._link(handle, title, resort)
+
+    def remove_product(self, product_id):
+        handle = self._product_handle(product_id)
+        if handle < 0:
+            return
+        self.products[product_id] = -1
+        weight, pet_type, owner = self.weights[handle], self.pet_type_names[self.pet_codes[handle]], self.owners[handle]
+        self._drop(handle)
+        if owner >= 0:
+            key = self.brand_keys[owner]
+            entry = self.brands[key]
+            members = entry[1]
+            members[pet_type] -= 1
+            if not members[pet_type]:
+                del members[pet_type]
+            if not members:
+                self._drop(entry[0])
+                del self.brands[key]
+                self.brand_keys[owner] = None
+            else:
+                self._reweight(entry[0], self.labels[entry[0]], self.weights[entry[0]] - weight)
+        self._maybe_compact()
+
+    def add_category(self, category_id, title, pet_type, resort=True):
+        handle = self._new_handle(CATEGORY, category_id, title, 0, pet_type)
+        self.categories[category_id] = handle
+        self._link(handle, title, resort)
+
+    def remove_category(self, category_id):
+        handle = self.categories.pop(category_id, None)
+        if handle is not None:
+            self._drop(handle)
+            self._maybe_compact()
+
+    def finish(self):
+        """Sort every posting once after a bulk load with resort=False."""
+        for word in self.postings:
+            self._sort(word)
+
+    # -- lookup ---------------------------------------------------------
+
+    def suggest(self, text, limit=8, pet_type=None):
+        terms = tokenize(text)
+        if not terms or len(terms[-1]) < MIN_PREFIX:
+            return {KIND_NAMES[k]: [] for k in KIND_NAMES}
+        *whole, last = terms
+
+        # heads of the postings of every vocabulary word starting with `last`
+        lo = bisect.bisect_left(self.words, last)
+        postings = []
+        for word in self.words[lo:lo + MAX_WORDS_SCANNED]:
+            if not word.startswith(last):
+                break
+            postings.append(self.postings[word][:MAX_CANDIDATES])
+
+        weights, labels, kinds, refs = self.weights, self.labels, self.kinds, self.refs
+        pet_codes, names = self.pet_codes, self.pet_type_names
+        # no code at all: nothing of that pet type is indexed
+        wanted = self._pet_code.get(pet_type, -1) if pet_type else None
+        merged = heapq.merge(*postings, key=lambda h: -weights[h])
+        results = {kind: [] for kind in KIND_NAMES}
+        seen = set()
+        for scanned, handle in enumerate(merged):
+            if scanned >= MAX_CANDIDATES:
+                break
+            if handle in seen or labels[handle] is None:
+                continue
+            seen.add(handle)
+            bucket = results[kinds[handle]]
+            if len(bucket) >= limit:
+                continue
+            if wanted is not None:
+                if kinds[handle] == BRAND:
+                    # brands are shared: offered while the brand has active products of this pet type
+                    if pet_type not in self.brands[self.brand_keys[refs[handle]]][1]:
+                        continue
+                elif pet_codes[handle] not in (0, wanted):
+                    continue
+            if whole:
+                words = set(tokenize(labels[handle]))
+                if not all(w in words for w in whole):
+                    continue
+            bucket.append(handle)
+            if all(len(b) >= limit for b in results.values()):
+                break
+
+        return {
+            KIND_NAMES[kind]: [
+                {
+                    "id": refs[h] if kind != BRAND else None,
+                    "label": labels[h],
+                    "pet_type": names[pet_codes[h]],
+                }
+                for h in handles
+            ]
+            for kind, handles in results.items()
+        }
+
+
+def build_index():
+    from .models import PetCategory, PetProduct
+
+    index = SuggestIndex()
+    products = PetProduct.objects.filter(is_active=True).values_list(
+        "id", "title", "brand", "rating_count", "pet_type"
+    )
+    for pk, title, brand, rating_count, pet_type in products.iterator(chunk_size=2000):
+        index.add_product(pk, title, brand, rating_count, pet_type, resort=False)
+    for pk, title, pet_type in PetCategory.objects.values_list("id", "title", "pet_type"):
+        index.add_category(pk, title, pet_type, resort=False)
+    index.finish()
+    return index
+
+
+suggest_index = VersionedIndex(build_index)
@@ -1,3 +1,1239 @@
-from django.test import TestCase
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+import base64
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from orders.models import Order, OrderItem
+
+from . import bestsellers, catalog_file, facets, fuzzy, recommendations, search, similar, suggest
+from .catalog import bump_version, current_version, single_flight
+from .models import (
+    Bestseller, Brand, PetCategory, PetProduct, PetType, ProductCategory, ProductRecommendation, ProductReview,
+    ProductSalesDay, ProductSimilarity, UnitType,
+    compute_discount_pct, compute_unit_price,
+)
+from .product_detail_views import DETAIL_RELATED, DETAIL_REVIEWS
+from .pagination import PRODUCT_ORDERING, PRODUCT_SORTS, KeysetPaginator, encode_cursor
+from .renderers import CardJSONRenderer
+from .serializers import PetProductCardProjection, PetProductSerializer
+from .snapshot import catalog_snapshot
+from .views import _product_listing
+
+SORT_INDEXES = {
+    "price_asc": "pets_product_price_idx",
+    "price_desc": "pets_product_price_idx",
+    "rating": "pets_product_rating_idx",
+    "newest": "pets_product_created_idx",
+    "popular": "pets_product_popular_idx",
+    "unit_price": "pets_product_unit_price_idx",
+}
+
+
+class ProductSortTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(30):
+            PetProduct.objects.create(
+                title=f"Product {i}", pet_type="dog", price=100 + (i % 7) * 10,
+                rating=1 + i % 5, rating_count=i % 4, order=i % 3,
+                quantity_value=1 + i % 2, quantity_unit=[UnitType.KG, UnitType.G, UnitType.INCH][i % 3],
+            )
+
+    def listing(self, ordering):
+        qs = PetProduct.objects.filter(pet_type="dog", is_active=True)
+        if "unit_price" in ordering:
+            qs = qs.filter(unit_price__isnull=False)
+        return qs.order_by(*ordering)
+
+    def assertIndexOnlyPlan(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_every_sort_uses_its_index(self):
+        self.assertEqual(set(SORT_INDEXES), set(PRODUCT_SORTS))
+        for sort, index in SORT_INDEXES.items():
+            with self.subTest(sort=sort):
+                self.assertIndexOnlyPlan(self.listing(PRODUCT_SORTS[sort])[:21], index)
+
+    def test_keyset_pages_use_the_index(self):
+        for sort, index in SORT_INDEXES.items():
+            with self.subTest(sort=sort):
+                ordering = PRODUCT_SORTS[sort]
+                paginator = KeysetPaginator(self.listing(ordering), ordering, 5)
+                last = paginator.page().object_list[-1]
+                seek = paginator._seek(paginator._position(last), reverse=False)
+                self.assertIndexOnlyPlan(self.listing(ordering).filter(seek)[:6], index)
+
+    def test_unit_basis_filter_uses_its_index(self):
+        qs = self.listing(PRODUCT_SORTS["unit_price"]).filter(unit_price_basis="kg")
+        self.assertIndexOnlyPlan(qs[:21], "pets_product_unit_basis_idx")
+
+    def test_deals_use_discount_index(self):
+        qs = PetProduct.objects.filter(pet_type="dog", is_active=True, discount_pct__gte=10)
+        self.assertIndexOnlyPlan(qs.order_by("-discount_pct", "-id")[:21], "pets_product_discount_idx")
+
+    def test_default_ordering_uses_listing_index(self):
+        self.assertIndexOnlyPlan(self.listing(PRODUCT_ORDERING)[:21], "pets_product_listing_idx")
+
+    def test_cursor_pages_cover_every_product_once(self):
+        client = APIClient()
+        for sort, ordering in PRODUCT_SORTS.items():
+            with self.subTest(sort=sort):
+                ids, url = [], f"/api/pet-products/?pet_type=dog&sort={sort}&page_size=4"
+                while url:
+                    body = client.get(url).json()
+                    ids += [p["id"] for p in body["results"]]
+                    url = body["next"]
+                expected = list(self.listing(ordering).values_list("id", flat=True))
+                self.assertEqual(ids, expected)
+
+
+class PetPageKeysetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        PetProduct.objects.bulk_create(PetProduct(title=f"Tie {i}") for i in range(20))
+        PetProduct.objects.create(title="Cat food", pet_type=PetType.CAT)
+        # every product at the same order and created: only -id tells them apart
+        PetProduct.objects.update(order=0)
+        PetProduct._base_manager.update(created=timezone.now())
+        cls.expected = list(
+            PetProduct.objects.filter(pet_type=PetType.DOG).order_by(*PRODUCT_ORDERING).values_list("id", flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, query):
+        response = APIClient().get(f"/api/pet-page/?pet_type=dog&{query}")
+        return response.status_code, response.json()
+
+    def ids(self, body):
+        return [card["id"] for card in body["products"]]
+
+    def test_next_and_prev_cursors_walk_ties_in_order(self):
+        ids, cursors, cursor = [], [], ""
+        while cursor is not None:
+            _, body = self.page(f"cursor={cursor}")
+            self.assertEqual(body["pagination"]["mode"], "cursor")
+            cursors.append(body["pagination"])
+            ids += self.ids(body)
+            cursor = body["pagination"]["next"]
+        self.assertEqual(ids, self.expected)
+        self.assertEqual([len(p) for p in (ids[:9], ids[9:18], ids[18:])], [9, 9, 2])
+        self.assertIsNone(cursors[0]["prev"])
+
+        _, back = self.page(f"cursor={cursors[2]['prev']}")
+        self.assertEqual(self.ids(back), self.expected[9:18])
+        _, back = self.page(f"cursor={back['pagination']['prev']}")
+        self.assertEqual(self.ids(back), self.expected[:9])
+        self.assertIsNone(back["pagination"]["prev"])
+
+    def test_tampered_cursor_is_not_found(self):
+        _, first = self.page("cursor=")
+        created = PetProduct.objects.values_list("created", flat=True).first().isoformat()
+        for cursor in (
+            "not-base64!", first["pagination"]["next"][:-3],
+            encode_cursor([0, created]), encode_cursor([0, "yesterday", 5]), encode_cursor(["x", created, 5]),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.page(f"cursor={cursor}")[0], 404)
+
+    def test_offset_mode_unchanged(self):
+        status, body = self.page("page=2")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["pagination"], {"page": 2, "total_pages": 3, "total_items": 20})
+        self.assertEqual(self.ids(body), self.expected[9:18])
+        self.assertEqual(self.page("page=99")[1]["pagination"]["page"], 3)
+
+    def test_product_list_links(self):
+        client = APIClient()
+        first = client.get("/api/pet-products/?pet_type=dog&page_size=8").json()
+        second = client.get(first["next"]).json()
+        self.assertEqual([p["id"] for p in first["results"] + second["results"]], self.expected[:16])
+        back = client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+
+
+class UnitPriceTests(TestCase):
+    def test_normalizes_to_canonical_unit(self):
+        self.assertEqual(compute_unit_price(Decimal("1899"), Decimal("2"), UnitType.KG), (Decimal("949.50"), "kg"))
+        self.assertEqual(compute_unit_price(Decimal("40"), Decimal("100"), UnitType.G), (Decimal("400.00"), "kg"))
+        self.assertEqual(compute_unit_price(Decimal("165"), Decimal("160"), UnitType.ML), (Decimal("1031.25"), "l"))
+        self.assertEqual(compute_unit_price(Decimal("160"), Decimal("3"), UnitType.INCH), (None, ""))
+
+    def test_kept_in_sync_on_save(self):
+        product = PetProduct.objects.create(title="Food", price=500, quantity_value=2, quantity_unit=UnitType.KG)
+        self.assertEqual(product.unit_price, Decimal("250.00"))
+        product.price = 300
+        product.save(update_fields=["price"])
+        product.refresh_from_db()
+        self.assertEqual(product.unit_price, Decimal("150.00"))
+
+
+    def test_bulk_update_computes_like_save(self):
+        cases = [
+            ("1899", "2", UnitType.KG, "2000"), ("40", "100", UnitType.G, None), ("165", "160", UnitType.ML, "170.5"),
+            ("0.05", "2", UnitType.KG, "0.07"), ("10", "3", UnitType.PCS, "10"), ("160", "3", UnitType.INCH, "200"),
+            ("99.99", "0", UnitType.L, "100"), ("75", "1.5", UnitType.PACK, "100"), ("33.33", "0.07", UnitType.G, "0"),
+        ]
+        products = PetProduct.objects.bulk_create(PetProduct(title=f"Case {i}") for i in range(len(cases)))
+        for product, (price, quantity, unit, mrp) in zip(products, cases):
+            PetProduct.objects.filter(pk=product.pk).update(
+                price=Decimal(price), quantity_value=Decimal(quantity), quantity_unit=unit,
+                mrp=None if mrp is None else Decimal(mrp),
+            )
+        for product, (price, quantity, unit, mrp) in zip(products, cases):
+            product.refresh_from_db()
+            expected = (*compute_unit_price(Decimal(price), Decimal(quantity), unit), compute_discount_pct(Decimal(price), mrp))
+            self.assertEqual((product.unit_price, product.unit_price_basis, product.discount_pct), expected, (price, quantity, unit))
+
+        PetProduct.objects.filter(pk=products[0].pk).update(price=F("price") * Decimal("0.5"))
+        products[0].refresh_from_db()
+        self.assertEqual((products[0].unit_price, products[0].discount_pct), (Decimal("474.75"), 52))
+
+
+class DiscountTests(TestCase):
+    def test_discount_pct(self):
+        self.assertEqual(compute_discount_pct(Decimal("75"), Decimal("100")), 25)
+        self.assertEqual(compute_discount_pct(Decimal("99.99"), Decimal("100")), 0)
+        self.assertEqual(compute_discount_pct(Decimal("100"), None), 0)
+        self.assertEqual(compute_discount_pct(Decimal("120"), Decimal("100")), 0)
+
+    def test_refresh_command_fixes_raw_writes(self):
+        kept = PetProduct.objects.create(title="Kept", price=60, mrp=100)
+        drifted = PetProduct.objects.create(title="Drifted", price=50, mrp=100, quantity_value=2, quantity_unit=UnitType.KG)
+        PetProduct._base_manager.filter(pk=drifted.pk).update(discount_pct=0, unit_price=None, unit_price_basis="")
+        out = StringIO()
+        call_command("refresh_derived_fields", stdout=out)
+        self.assertIn("on 1 products", out.getvalue())
+        drifted.refresh_from_db()
+        self.assertEqual((drifted.discount_pct, drifted.unit_price, drifted.unit_price_basis), (50, Decimal("25.00"), "kg"))
+        self.assertEqual(PetProduct.objects.get(pk=kept.pk).discount_pct, 40)
+
+    def test_bulk_price_update_refreshes_discount(self):
+        product = PetProduct.objects.create(title="Toy", price=100, mrp=100)
+        self.assertEqual(product.discount_pct, 0)
+        PetProduct.objects.filter(price__gte=100).update(price=60)
+        product.refresh_from_db()
+        self.assertEqual(product.discount_pct, 40)
+
+
+class CategoryCountTests(TestCase):
+    def setUp(self):
+        self.food = PetCategory.objects.create(title="Food")
+        self.toys = PetCategory.objects.create(title="Toys")
+        self.products = [PetProduct.objects.create(title=f"Product {i}") for i in range(4)]
+
+    def counts(self):
+        return list(PetCategory.objects.order_by("id").values_list("product_count", flat=True))
+
+    def test_counts_follow_links_and_activation(self):
+        a, b, c, d = self.products
+        a.categories.add(self.food, self.toys)
+        self.food.products.add(b, c)
+        ProductCategory.objects.create(product=d, category=self.toys)
+        self.assertEqual(self.counts(), [3, 2])
+
+        c.is_active = False
+        c.save()
+        self.food.products.remove(a)
+        self.assertEqual(self.counts(), [1, 2])
+
+        PetProduct.objects.filter(pk=c.pk).update(is_active=True)
+        d.delete()
+        self.assertEqual(self.counts(), [2, 1])
+
+        PetCategory.objects.update(product_count=0)
+        PetCategory.objects.recount()
+        self.assertEqual(self.counts(), [2, 1])
+
+    def test_category_filter(self):
+        self.food.products.add(*self.products[:2])
+        body = APIClient().get(f"/api/pet-products/?category={self.food.pk}").json()
+        self.assertEqual({p["id"] for p in body["results"]}, {p.pk for p in self.products[:2]})
+
+
+class BrandTests(TestCase):
+    def test_spellings_share_one_brand(self):
+        for name in ["Royal Canin", "royal canin ", "ROYAL CANIN"]:
+            PetProduct.objects.create(title="Food", brand=name)
+        self.assertEqual(list(Brand.objects.values_list("slug", "name")), [("royal-canin", "Royal Canin")])
+        self.assertEqual(set(PetProduct.objects.values_list("brand", flat=True)), {"Royal Canin"})
+
+    def test_brand_listing_and_products(self):
+        PetProduct.objects.create(title="Food", brand="Pedigree")
+        PetProduct.objects.create(title="Litter", brand="Pedigree", pet_type="cat")
+        PetProduct.objects.create(title="Old", brand="Drools", is_active=False)
+        client = APIClient()
+        brands = client.get("/api/brands/?pet_type=dog").json()["results"]
+        self.assertEqual([(b["slug"], b["product_count"]) for b in brands], [("pedigree", 1)])
+        body = client.get("/api/brands/pedigree/products/").json()
+        self.assertEqual(len(body["results"]), 2)
+
+        brand = Brand.objects.get(slug="pedigree")
+        qs = PetProduct.objects.filter(brand_ref=brand, is_active=True).order_by(*PRODUCT_ORDERING)[:21]
+        ProductSortTests.assertIndexOnlyPlan(self, qs, "pets_product_brand_idx")
+
+
+class BatchTests(TestCase):
+    def test_one_query_for_many_ids(self):
+        products = [PetProduct.objects.create(title=f"Product {i}") for i in range(10)]
+        hidden = PetProduct.objects.create(title="Hidden", is_active=False)
+        ids = ",".join(str(p.pk) for p in products)
+        client = APIClient()
+        with self.assertNumQueries(1):
+            body = client.get(f"/api/pet-products/batch/?ids={ids},{hidden.pk},999").json()
+        self.assertEqual(list(body["results"]), [str(p.pk) for p in products])
+        self.assertEqual((body["missing"], body["inactive"]), ([999], [hidden.pk]))
+
+        body = client.post("/api/pet-products/batch/", {"ids": [products[0].pk]}, format="json").json()
+        self.assertEqual(list(body["results"]), [str(products[0].pk)])
+        self.assertEqual(client.get("/api/pet-products/batch/?ids=1,x").status_code, 400)
+        self.assertEqual(client.get("/api/pet-products/batch/?ids=" + ",".join(map(str, range(1, 102)))).status_code, 400)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.product = PetProduct.objects.create(title="Food")
+        self.product.related.add(PetProduct.objects.create(title="Bowl"))
+        ProductReview.objects.create(product=self.product, name="A", email="a@example.com", rating=4)
+
+    def get(self, query, queries):
+        with self.assertNumQueries(queries):
+            return APIClient().get(f"/api/pet-product/{self.product.pk}/{query}").json()
+
+    def test_nested_fields_are_opt_in(self):
+        body = self.get("", 1)
+        self.assertNotIn("related_products", body)
+        self.assertNotIn("reviews", body)
+        body = self.get("?expand=related,reviews", 3)
+        self.assertEqual((len(body["related_products"]), len(body["reviews"])), (1, 1))
+        self.assertEqual(set(body["related_products"][0]), set(PetProductSerializer.Meta.fields))
+
+    def test_fields(self):
+        self.assertEqual(list(self.get("?fields=id,price&expand=reviews", 2)), ["id", "price", "reviews"])
+        body = APIClient().get("/api/pet-products/?fields=id,title").json()
+        self.assertEqual(list(body["results"][0]), ["id", "title"])
+
+
+class ReviewTests(TestCase):
+    def setUp(self):
+        self.product = PetProduct.objects.create(title="Food")
+        for i in range(DETAIL_RELATED + 5):
+            self.product.related.add(PetProduct.objects.create(title=f"Related {i}", is_active=i % 5 != 0))
+        self.reviews = [
+            ProductReview.objects.create(product=self.product, name=f"R{i}", email="r@example.com", rating=1 + i % 5)
+            for i in range(DETAIL_REVIEWS + 15)
+        ]
+        self.url = f"/api/pet-product/{self.product.pk}/reviews/"
+
+    def test_detail_is_capped(self):
+        with self.assertNumQueries(3):
+            body = APIClient().get(f"/api/pet-product/{self.product.pk}/?expand=related,reviews").json()
+        newest = sorted(self.reviews, key=lambda r: (r.created, r.pk), reverse=True)[:DETAIL_REVIEWS]
+        self.assertEqual([r["id"] for r in body["reviews"]], [r.pk for r in newest])
+        self.assertNotIn("email", body["reviews"][0])
+        listed = APIClient().get(self.url).json()["results"][0]
+        self.assertEqual(set(listed), {"id", "name", "rating", "review", "created"})
+        self.assertEqual(len(body["related_products"]), DETAIL_RELATED)
+        inactive = set(PetProduct.objects.filter(is_active=False).values_list("id", flat=True))
+        self.assertFalse(inactive & {p["id"] for p in body["related_products"]})
+
+    def test_keyset_pages_and_rating_filter(self):
+        client = APIClient()
+        for query, expected in (("", self.reviews), ("&rating=5", [r for r in self.reviews if r.rating == 5])):
+            ids, url = [], f"{self.url}?page_size=4{query}"
+            while url:
+                body = client.get(url).json()
+                ids += [r["id"] for r in body["results"]]
+                url = body["next"]
+            self.assertEqual(ids, [r.pk for r in sorted(expected, key=lambda r: (r.created, r.pk), reverse=True)])
+        plan = ProductReview.objects.filter(product=self.product).order_by("-created", "-id")[:5].explain()
+        self.assertIn("pets_review_product_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_create(self):
+        response = APIClient().post(self.url, {"name": "A", "email": "a@example.com", "rating": 2}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("email", response.json())
+        self.assertEqual(ProductReview.objects.get(pk=response.json()["id"]).email, "a@example.com")
+        self.assertEqual(APIClient().post(self.url, {"name": "A", "rating": 2}, format="json").status_code, 400)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_count, len(self.reviews) + 1)
+        self.product.is_active = False
+        self.product.save()
+        self.assertEqual(APIClient().get(self.url).status_code, 404)
+
+
+class RatingAggregateTests(TestCase):
+    def post(self, product, rating):
+        return APIClient().post(
+            f"/api/pet-product/{product.pk}/reviews/", {"name": "A", "email": "a@example.com", "rating": rating},
+            format="json",
+        )
+
+    def test_reviews_update_aggregates_in_constant_queries(self):
+        product, busy = PetProduct.objects.create(title="Food"), PetProduct.objects.create(title="Toy")
+        ProductReview.objects.bulk_create(
+            ProductReview(product=busy, name="B", email="b@example.com", rating=3) for _ in range(200)
+        )
+        with CaptureQueriesContext(connection) as quiet:
+            self.post(product, 4)
+        with CaptureQueriesContext(connection) as loud:
+            self.post(busy, 4)
+        self.assertEqual(len(quiet), len(loud))
+
+        for rating in (5, 5):
+            self.post(product, rating)
+        product.refresh_from_db()
+        self.assertEqual(
+            (product.rating_count, product.rating_sum, product.stars_4, product.stars_5, product.rating), (3, 14, 1, 2, 5)
+        )
+        self.assertEqual(json.loads(product.card_json)["rating_count"], 3)
+
+        review = product.reviews.get(rating=4)
+        review.rating = 1
+        review.save()
+        product.refresh_from_db()
+        self.assertEqual((product.rating_sum, product.stars_1, product.stars_4, product.rating), (11, 1, 0, 4))
+
+    def test_reviews_reach_snapshot_facets_and_changes(self):
+        product = PetProduct.objects.create(title="Food", rating=5)
+        catalog_snapshot.clear()
+        facets.facet_index.clear()
+        self.addCleanup(catalog_snapshot.clear)
+        self.addCleanup(facets.facet_index.clear)
+        cache.clear()
+
+        def rating_counts():
+            body = APIClient().get("/api/pet-products/facets/?pet_type=dog").json()
+            return {entry["value"]: entry["count"] for entry in body["facets"]["rating"]}
+
+        def listed_rating():
+            return APIClient().get("/api/pet-products/?pet_type=dog").json()["results"][0]["rating"]
+
+        with mock.patch("pets.views.CHANGES_SETTLE", timedelta(0)), override_settings(PETS_CATALOG_SNAPSHOT=True):
+            token = APIClient().get("/api/pet-products/changes/").json()["token"]
+            self.assertEqual((listed_rating(), rating_counts()), (5, {"5": 1}))
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.post(product, 1)
+            self.assertEqual(len(callbacks), 1)
+            self.assertEqual((listed_rating(), rating_counts()), (1, {"1": 1}))
+            changes = APIClient().get(f"/api/pet-products/changes/?since={token}").json()["results"]
+        self.assertEqual([(p["id"], p["rating"], p["rating_count"]) for p in changes], [(product.pk, 1, 1)])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(PetProduct.objects.all().rebuild_ratings(), 0)
+            PetProduct.objects.filter(pk=product.pk).update(rating_count=0)
+        self.assertEqual(len(callbacks), 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(PetProduct.objects.all().rebuild_ratings(), 1)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_rebuild_and_seed(self):
+        product = PetProduct.objects.create(title="Food", rating=4, rating_count=10)
+        ProductReview.objects.create(product=product, name="A", email="a@example.com", rating=2)
+        # as before the aggregates existed: a hand-entered count, one real review
+        PetProduct.objects.filter(pk=product.pk).update(rating=4, rating_count=10, rating_sum=0, stars_2=0)
+        seed = importlib.import_module("pets.migrations.0017_petproduct_rating_aggregates").seed_rating_aggregates
+        seed(django_apps, None)
+        product.refresh_from_db()
+        self.assertEqual((product.rating_count, product.rating_sum, product.stars_2, product.stars_4), (10, 38, 1, 9))
+
+        call_command("rebuild_ratings", stdout=StringIO())
+        product.refresh_from_db()
+        self.assertEqual(
+            (product.rating_count, product.rating_sum, product.stars_2, product.stars_4, product.rating), (1, 2, 1, 0, 2)
+        )
+
+
+class ReviewSummaryTests(TestCase):
+    def setUp(self):
+        self.product = PetProduct.objects.create(title="Food")
+        for rating in (5, 5, 4):
+            ProductReview.objects.create(product=self.product, name="A", email="a@example.com", rating=rating)
+
+    def test_summary(self):
+        with self.assertNumQueries(1):
+            body = APIClient().get(f"/api/pet-product/{self.product.pk}/review-summary/").json()
+        self.assertEqual((body["rating_count"], body["average"], body["rating"]), (3, "4.67", 5))
+        self.assertEqual(body["stars"], {"1": 0, "2": 0, "3": 0, "4": 1, "5": 2})
+        self.assertEqual(body["percent"], {"1": 0, "2": 0, "3": 0, "4": 33, "5": 67})
+
+        self.product.reviews.filter(rating=5).first().delete()
+        body = APIClient().get(f"/api/pet-product/{self.product.pk}/review-summary/").json()
+        self.assertEqual((body["rating_count"], body["average"], body["stars"]["5"]), (2, "4.50", 1))
+        self.product.reviews.all().delete()
+        body = APIClient().get(f"/api/pet-product/{self.product.pk}/review-summary/").json()
+        self.assertEqual((body["rating_count"], body["average"], body["rating"]), (0, None, 5))
+
+    def test_batch(self):
+        other = PetProduct.objects.create(title="Toy")
+        hidden = PetProduct.objects.create(title="Hidden", is_active=False)
+        with self.assertNumQueries(1):
+            body = APIClient().get(
+                f"/api/pet-products/review-summary/?ids={other.pk},{self.product.pk},{hidden.pk},999"
+            ).json()
+        self.assertEqual(list(body["results"]), [str(other.pk), str(self.product.pk)])
+        self.assertEqual(body["results"][str(self.product.pk)]["rating_count"], 3)
+
+    def test_deleting_a_product_skips_the_updates(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.product.delete()
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.food, self.bowl, self.toy, self.leash = (
+            PetProduct.objects.create(title=t) for t in ("Food", "Bowl", "Toy", "Leash")
+        )
+        baskets = [
+            [self.food, self.bowl], [self.food, self.bowl], [self.food, self.bowl, self.toy],
+            [self.food, self.toy], [self.food, self.toy], [self.leash, self.toy], [self.food],
+        ]
+        for basket in baskets:
+            order = Order.objects.create()
+            for product in basket:
+                OrderItem.objects.create(order=order, product_id=product.pk, product_title=product.title, price=1)
+        cancelled = Order.objects.create(status="cancelled")
+        for product in (self.bowl, self.leash) * 3:
+            OrderItem.objects.create(order=cancelled, product_id=product.pk, product_title=product.title, price=1)
+        OrderItem.objects.create(order=cancelled, product_id=999, product_title="Gone", price=1)
+
+    def test_top_neighbours(self):
+        self.assertEqual(recommendations.build(chunk_size=2), 4)
+        ranked = list(ProductRecommendation.objects.filter(product=self.food).order_by("rank"))
+        self.assertEqual([r.recommended_id for r in ranked], [self.bowl.pk, self.toy.pk])
+        self.assertAlmostEqual(ranked[0].score, 3 / (6 * 3) ** 0.5)
+        self.assertFalse(ProductRecommendation.objects.filter(product=self.leash).exists())
+
+    def test_served_on_detail_and_cart(self):
+        recommendations.build()
+        self.bowl.is_active = False
+        self.bowl.save()
+        with self.assertNumQueries(2):
+            body = APIClient().get(f"/api/pet-product/{self.food.pk}/?expand=together").json()
+        self.assertEqual([p["id"] for p in body["bought_together"]], [self.toy.pk])
+
+        client = APIClient()
+        token = client.post("/api/cart/add/", {"product_id": self.food.pk}, format="json").json()["token"]
+        body = client.get("/api/cart/?expand=recommendations", HTTP_X_CART_TOKEN=token).json()
+        self.assertEqual([p["id"] for p in body["recommendations"]], [self.toy.pk])
+        self.assertNotIn("recommendations", client.get("/api/cart/", HTTP_X_CART_TOKEN=token).json())
+
+
+class BestsellerTests(TestCase):
+    def setUp(self):
+        self.kibble, self.leash = (PetProduct.objects.create(title=t) for t in ("Kibble", "Leash"))
+        self.litter = PetProduct.objects.create(title="Litter", pet_type=PetType.CAT)
+        self.first = self.order((self.kibble, 3), (self.leash, 1))
+        self.second = self.order((self.leash, 5), (self.litter, 2))
+
+    def order(self, *lines):
+        order = Order.objects.create()
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product_id=product.pk, product_title=product.title, price=1, quantity=quantity)
+        return order
+
+    def ranked(self, query=""):
+        response = APIClient().get(f"/api/pet-products/bestsellers/{query}")
+        return [card["id"] for card in response.json()["results"]]
+
+    def units(self):
+        # rows taken down to 0 stay until expire() and are never ranked
+        return set(Bestseller.objects.filter(units__gt=0).values_list("window", "product_id", "units"))
+
+    def test_ranked_by_units_per_window(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.ranked("?pet_type=dog"), [self.leash.pk, self.kibble.pk])
+        self.assertEqual(self.ranked("?window=30d"), [self.leash.pk, self.kibble.pk, self.litter.pk])
+        self.assertEqual(self.ranked("?pet_type=dog&limit=1"), [self.leash.pk])
+        self.leash.is_active = False
+        self.leash.save()
+        self.assertEqual(self.ranked("?pet_type=dog"), [self.kibble.pk])
+        self.assertEqual(APIClient().get("/api/pet-products/bestsellers/?window=1y").status_code, 400)
+
+    def test_cancelling_takes_lines_back(self):
+        self.second.status = "cancelled"
+        self.second.save()
+        self.assertEqual(self.ranked("?pet_type=dog"), [self.kibble.pk, self.leash.pk])
+        self.assertEqual(self.ranked("?pet_type=cat"), [])
+        self.second.status = "processing"
+        self.second.save()
+        self.assertEqual(self.ranked("?pet_type=dog"), [self.leash.pk, self.kibble.pk])
+
+    def test_expired_days_leave_the_window(self):
+        today = timezone.localdate()
+        before = self.units()
+        bestsellers.expire(today)
+        self.assertEqual(self.units(), before)
+        bestsellers.expire(today + timedelta(days=7))
+        self.assertEqual({row[0] for row in self.units()}, {30})
+        bestsellers.expire(today + timedelta(days=30))
+        self.assertEqual(self.units(), set())
+        self.assertFalse(ProductSalesDay.objects.exists())
+
+    def assertMatchesRebuild(self):
+        incremental = self.units()
+        bestsellers.rebuild()
+        self.assertEqual(self.units(), incremental)
+
+    def test_line_edits_and_deletes(self):
+        kibble_line, leash_line = self.first.items.order_by("id")
+        kibble_line.quantity = 7
+        kibble_line.save()
+        self.assertIn((7, self.kibble.pk, 7), self.units())
+        self.assertMatchesRebuild()
+        leash_line.product_id = self.litter.pk
+        leash_line.save()
+        self.assertMatchesRebuild()
+        leash_line.delete()
+        self.assertMatchesRebuild()
+        self.second.delete()
+        self.assertEqual(self.units(), {(7, self.kibble.pk, 7), (30, self.kibble.pk, 7)})
+        self.order((self.leash, 2))
+        Order.objects.all().delete()
+        self.assertEqual(self.units(), set())
+
+    def test_cancelled_orders_stay_out(self):
+        self.second.status = "cancelled"
+        self.second.save()
+        line = self.second.items.first()
+        line.quantity = 9
+        line.save()
+        line.delete()
+        self.second.delete()
+        self.assertMatchesRebuild()
+
+    def test_new_lines_read_the_loaded_order(self):
+        order = Order.objects.create()
+        with CaptureQueriesContext(connection) as ctx:
+            OrderItem.objects.create(order=order, product_id=self.kibble.pk, product_title="Kibble", price=1)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "orders_order"' in q["sql"]])
+        with CaptureQueriesContext(connection) as ctx:
+            OrderItem.objects.create(order_id=order.pk, product_id=self.kibble.pk, product_title="Kibble", price=1)
+        status_reads = [q["sql"] for q in ctx.captured_queries if 'FROM "orders_order"' in q["sql"]]
+        self.assertEqual(len(status_reads), 1)
+        self.assertIn('SELECT "orders_order"."status"', status_reads[0])
+
+    def test_rebuild_matches_incremental(self):
+        self.order((self.kibble, 4))
+        Order.objects.create(status="cancelled").items.create(product_id=self.kibble.pk, product_title="Kibble", price=1)
+        before = self.units()
+        self.assertEqual(bestsellers.rebuild(), len(before))
+        self.assertEqual(self.units(), before)
+
+
+class SearchTests(TestCase):
+    def search(self, query):
+        return APIClient().get(f"/api/pet-products/search/{query}")
+
+    def ids(self, query):
+        return [item["id"] for item in self.search(query).json()["results"]]
+
+    def test_title_outranks_brand_outranks_description(self):
+        in_description = PetProduct.objects.create(title="Dry Food", brand="Acme", description="With salmon oil")
+        in_brand = PetProduct.objects.create(title="Dry Food", brand="Salmon Co", description="With fish oil")
+        in_title = PetProduct.objects.create(title="Salmon Food", brand="Acme", description="With fish oil")
+        body = self.search("?q=salmon").json()
+        self.assertEqual([item["id"] for item in body["results"]], [in_title.pk, in_brand.pk, in_description.pk])
+        self.assertEqual(body["results"][0]["highlight"]["title"], "<mark>Salmon</mark> Food")
+
+    def test_last_term_is_a_prefix(self):
+        kibble = PetProduct.objects.create(title="Chicken Kibble")
+        PetProduct.objects.create(title="Chickpea Biscuits")
+        self.assertEqual(self.ids("?q=kib"), [kibble.pk])
+        self.assertEqual(self.ids("?q=kibble%20chick"), [kibble.pk])
+        # only the last term is a prefix (the endpoint would retry this one corrected)
+        self.assertEqual(search.match_expression("Kib chicken"), '"kib" "chicken"*')
+        self.assertEqual(search.search("kib chicken"), [])
+
+    def test_index_follows_save_and_delete(self):
+        product = PetProduct.objects.create(title="Chicken Kibble")
+        self.assertEqual(self.ids("?q=chicken"), [product.pk])
+        product.title = "Lamb Kibble"
+        product.save()
+        self.assertEqual(self.ids("?q=chicken"), [])
+        self.assertEqual(self.ids("?q=lamb"), [product.pk])
+        product.delete()
+        self.assertEqual(self.ids("?q=lamb"), [])
+
+    def test_index_follows_bulk_update(self):
+        kibble = PetProduct.objects.create(title="Chicken Kibble", brand="Acme")
+        jerky = PetProduct.objects.create(title="Chicken Jerky", brand="Acme")
+        PetProduct.objects.filter(pk=kibble.pk).update(title="Lamb Kibble")
+        PetProduct.objects.filter(brand="Acme").update(brand="Zest", description="grain free")
+        self.assertEqual(self.ids("?q=chicken"), [jerky.pk])
+        self.assertEqual(self.ids("?q=lamb"), [kibble.pk])
+        self.assertEqual(sorted(self.ids("?q=zest")), sorted([kibble.pk, jerky.pk]))
+        self.assertEqual(self.ids("?q=acme"), [])
+        self.assertEqual(len(self.ids("?q=grain")), 2)
+
+    def test_pet_type_and_active_filters(self):
+        dog = PetProduct.objects.create(title="Chicken Kibble", pet_type=PetType.DOG)
+        cat = PetProduct.objects.create(title="Chicken Pate", pet_type=PetType.CAT)
+        PetProduct.objects.create(title="Chicken Jerky", pet_type=PetType.DOG, is_active=False)
+        self.assertEqual(sorted(self.ids("?q=chicken")), sorted([dog.pk, cat.pk]))
+        self.assertEqual(self.ids("?q=chicken&pet_type=dog"), [dog.pk])
+        self.assertEqual(self.ids("?q=chicken&pet_type=cat"), [cat.pk])
+
+    def test_cursor_pages(self):
+        # identical rows tie on score, so pages fall back to the id order
+        PetProduct.objects.bulk_create(PetProduct(title="Chicken Kibble") for _ in range(7))
+        expected = sorted(PetProduct.objects.values_list("id", flat=True))
+        search.rebuild()
+        seen, url = [], "/api/pet-products/search/?q=chicken&page_size=3"
+        while url:
+            body = APIClient().get(url).json()
+            seen += [item["id"] for item in body["results"]]
+            url = body["next"]
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_is_not_found(self):
+        PetProduct.objects.create(title="Chicken Kibble")
+        for values in ([1], [], ["x", 1], [1.5, "2"], [1.5, 2, 3], [True, 2]):
+            with self.subTest(values=values):
+                token = base64.urlsafe_b64encode(json.dumps({"v": values}).encode()).decode()
+                self.assertEqual(self.search(f"?q=chicken&cursor={token}").status_code, 404)
+
+
+class SuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        suggest.suggest_index.clear()
+        self.addCleanup(suggest.suggest_index.clear)
+
+    def suggest(self, query):
+        return APIClient().get(f"/api/pet-products/suggest/{query}").json()
+
+    def labels(self, body, kind="products"):
+        return [item["label"] for item in body[kind]]
+
+    def test_heaviest_first_across_words(self):
+        for title, count in (("Pedigree Adult", 5), ("Pedal Bin", 50), ("Pedigree Puppy", 20)):
+            PetProduct.objects.create(title=title, brand="Pedigree" if "Pedigree" in title else "", rating_count=count)
+        body = self.suggest("?prefix=ped")
+        self.assertEqual(self.labels(body), ["Pedal Bin", "Pedigree Puppy", "Pedigree Adult"])
+        self.assertEqual(self.labels(body, "brands"), ["Pedigree"])
+        # earlier words must all be present
+        self.assertEqual(self.labels(self.suggest("?prefix=puppy%20ped")), ["Pedigree Puppy"])
+
+    def test_save_and_delete_patch_the_live_index(self):
+        kibble = PetProduct.objects.create(title="Chicken Kibble", brand="Acme", rating_count=5)
+        PetProduct.objects.create(title="Chicken Jerky", brand="Acme", rating_count=10)
+        index = suggest.suggest_index.get()
+        self.assertEqual(self.labels(self.suggest("?prefix=chi")), ["Chicken Jerky", "Chicken Kibble"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kibble.rating_count = 30
+            kibble.save()
+        self.assertIs(suggest.suggest_index.get(), index)
+        self.assertEqual(self.labels(self.suggest("?prefix=chi")), ["Chicken Kibble", "Chicken Jerky"])
+        self.assertEqual(index.weights[index.brands["acme"][0]], 40)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kibble.delete()
+        self.assertIs(suggest.suggest_index.get(), index)
+        self.assertEqual(self.labels(self.suggest("?prefix=kib")), [])
+        self.assertEqual(index.weights[index.brands["acme"][0]], 10)
+
+    def test_patches_match_a_fresh_build(self):
+        index = suggest.SuggestIndex()
+        rows = [(pk, f"Toy {pk % 7}", f"Brand {pk % 3}", (pk * 37) % 11, "dog") for pk in range(1, 40)]
+        for row in rows:
+            index.add_product(*row)
+        for pk, title, brand, weight, pet_type in rows[::3]:
+            index.remove_product(pk)
+            index.add_product(pk, title, brand, weight + 5, pet_type)
+        fresh = suggest.SuggestIndex()
+        for pk, title, brand, weight, pet_type in rows:
+            fresh.add_product(pk, title, brand, weight + (5 if pk % 3 == 1 else 0), pet_type, resort=False)
+        fresh.finish()
+        for word, posting in fresh.postings.items():
+            with self.subTest(word=word):
+                self.assertEqual(
+                    [index.weights[h] for h in index.postings[word]], [fresh.weights[h] for h in posting]
+                )
+
+    def test_dead_handles_are_compacted(self):
+        index = suggest.SuggestIndex()
+        index.add_product(1, "Chicken Kibble", "Acme", 3, "dog")
+        for _ in range(suggest.COMPACT_MIN_DEAD + 1):
+            index.remove_product(1)
+            index.add_product(1, "Chicken Kibble", "Acme", 3, "dog")
+        self.assertLessEqual(len(index.labels), 2 * suggest.COMPACT_MIN_DEAD)
+        self.assertEqual(index.dead, len(index.labels) - 2)
+        self.assertEqual(index.suggest("chi")["products"], [{"id": 1, "label": "Chicken Kibble", "pet_type": "dog"}])
+        self.assertEqual([b["label"] for b in index.suggest("acm")["brands"]], ["Acme"])
+
+    def test_pet_type_scopes_products_categories_and_brands(self):
+        PetProduct.objects.create(title="Whiskas Tuna", brand="Whiskas", pet_type=PetType.CAT)
+        PetProduct.objects.create(title="Drools Chicken", brand="Drools", pet_type=PetType.DOG)
+        PetProduct.objects.create(title="Drools Tuna", brand="Drools", pet_type=PetType.CAT)
+        PetCategory.objects.create(title="Wet Food", pet_type=PetType.CAT)
+        dog = self.suggest("?prefix=w&pet_type=dog")
+        self.assertEqual([dog["products"], dog["brands"], dog["categories"]], [[], [], []])
+        cat = self.suggest("?prefix=w&pet_type=cat")
+        self.assertEqual(self.labels(cat, "brands"), ["Whiskas"])
+        self.assertEqual(self.labels(cat, "categories"), ["Wet Food"])
+        self.assertEqual(self.labels(self.suggest("?prefix=dro&pet_type=dog"), "brands"), ["Drools"])
+
+
+class FuzzyCorrectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        fuzzy.fuzzy_index.clear()
+        self.addCleanup(fuzzy.fuzzy_index.clear)
+        self.pedigree = PetProduct.objects.create(title="Pedigree Adult", brand="Pedigree")
+        PetProduct.objects.create(title="Orijen Puppy", brand="Orijen")
+
+    def search(self, query):
+        return APIClient().get(f"/api/pet-products/search/?q={query}").json()
+
+    def test_correct(self):
+        index = fuzzy.fuzzy_index.get()
+        self.assertEqual(index.correct("pedgree adult"), "pedigree adult")
+        self.assertEqual(index.correct("orjen xyzzyq"), "orijen")
+        self.assertIsNone(index.correct("pedigree adult"))
+        # short and numeric terms are never corrected
+        self.assertIsNone(index.correct("ad 500"))
+
+    def test_zero_hits_retry_corrected(self):
+        body = self.search("pedgree")
+        self.assertEqual(body["corrected"], "pedigree")
+        self.assertEqual([item["id"] for item in body["results"]], [self.pedigree.pk])
+
+    def test_no_correction_when_the_first_page_has_hits(self):
+        typo = PetProduct.objects.create(title="Pedgree Biscuits")
+        with mock.patch.object(fuzzy.TrigramIndex, "correct") as correct:
+            body = self.search("pedgree")
+        correct.assert_not_called()
+        self.assertIsNone(body["corrected"])
+        self.assertEqual([item["id"] for item in body["results"]], [typo.pk])
+
+    def test_budget_leaves_terms_as_typed(self):
+        index = fuzzy.fuzzy_index.get()
+        # the clock jumps past the deadline right after it is set
+        ticks = iter([0.0] + [1.0] * 100)
+        with mock.patch.object(fuzzy.time, "perf_counter", lambda: next(ticks)):
+            self.assertIsNone(index.correct("pedgree adult"))
+        with mock.patch.object(fuzzy, "BUDGET_SECONDS", -1):
+            body = self.search("pedgree%20adult")
+        self.assertEqual([body["corrected"], body["results"]], [None, []])
+
+
+class FacetTests(TestCase):
+    COMBINATIONS = [
+        {},
+        {"brand": ["acme"], "price": ["0-250"]},
+        {"brand": ["acme", "zest"], "has_discount": ["1"], "rating": ["4"]},
+        {"quantity_unit": ["kg"], "price": ["250-500", "500-1000"]},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        facets.facet_index.clear()
+        self.addCleanup(facets.facet_index.clear)
+        self.products = [
+            PetProduct.objects.create(
+                title=f"Product {i}", brand=["Acme", "Zest", "Bolt"][i % 3], pet_type=PetType.DOG,
+                quantity_unit=[UnitType.KG, UnitType.G, UnitType.PCS][i % 4 % 3],
+                price=[99, 249, 250, 480, 900, 3000][i % 6], mrp=[None, 1000, 200][i % 3], rating=1 + i % 5,
+            )
+            for i in range(36)
+        ]
+        PetProduct.objects.create(title="Cat", brand="Acme", pet_type=PetType.CAT)
+        gone = PetProduct.objects.create(title="Gone", brand="Acme", pet_type=PetType.DOG, is_active=False)
+        self.category = PetCategory.objects.create(title="Dry Food", pet_type=PetType.DOG)
+        self.category.products.add(gone, *self.products[::2])
+
+    def listing_count(self, filters):
+        params = QueryDict(mutable=True)
+        for name, values in filters.items():
+            params.setlist(name, values)
+        return _product_listing(params, PetType.DOG)[0].count()
+
+    def assertCountsMatchListing(self, scope=None):
+        for filters in self.COMBINATIONS:
+            filters = {**filters, **(scope or {})}
+            query = "&".join(f"{name}={','.join(values)}" for name, values in filters.items())
+            body = APIClient().get(f"/api/pet-products/facets/?pet_type=dog&{query}").json()
+            with self.subTest(filters=filters):
+                self.assertEqual(body["total"], self.listing_count(filters))
+            for name, entries in body["facets"].items():
+                for entry in entries:
+                    with self.subTest(filters=filters, facet=name, value=entry["value"]):
+                        self.assertEqual(entry["count"], self.listing_count({**filters, name: [entry["value"]]}))
+
+    def test_counts_match_the_listing_after_updates(self):
+        self.assertCountsMatchListing()
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = self.products[0]
+            moved.brand, moved.price, moved.mrp, moved.rating = "Zest", 260, 300, 4
+            moved.save()
+            PetProduct.objects.filter(pk__in=[p.pk for p in self.products[1:6]]).update(price=120, mrp=150)
+            PetProduct.objects.filter(pk=self.products[6].pk).update(is_active=False)
+        self.assertCountsMatchListing()
+
+    def test_category_and_unit_basis_narrow_the_counts(self):
+        category = {"category": [str(self.category.pk)]}
+        for scope in (category, {"unit_basis": ["kg"]}, {**category, "unit_basis": ["pcs"]}):
+            with self.subTest(scope=scope):
+                self.assertCountsMatchListing(scope)
+        body = APIClient().get(f"/api/pet-products/facets/?pet_type=dog&category={self.category.pk}").json()
+        self.assertEqual(body["total"], 18)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.products.remove(*self.products[:6])
+        self.assertCountsMatchListing(category)
+
+
+class DealsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PetProduct.objects.bulk_create(
+            PetProduct(title=f"Deal {i}", price=100, mrp=100 + i, discount_pct=i) for i in range(1, 26)
+        )
+
+    def test_all_is_not_served_from_the_page_cache(self):
+        client = APIClient()
+        page = client.get("/api/pet-products/deals/?all=1").json()
+        self.assertEqual(len(page["results"]), 20)
+        client.force_authenticate(User.objects.create_user("admin", password="x", is_staff=True))
+        everything = client.get("/api/pet-products/deals/?all=1").json()
+        self.assertEqual(len(everything), 25)
+        self.assertEqual(everything[0]["id"], page["results"][0]["id"])
+        # and the staff response didn't replace the cached page
+        client.force_authenticate(None)
+        self.assertEqual(client.get("/api/pet-products/deals/?all=1").json(), page)
+
+
+class CatalogAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = PetProduct.objects.create(title="Chicken Kibble", brand="Acme", price=80, mrp=100)
+        self.stale = APIClient()
+        self.stale.credentials(HTTP_AUTHORIZATION="Bearer expired.or.garbage")
+
+    def test_catalog_reads_ignore_credentials(self):
+        pk = self.product.pk
+        for url in (
+            "/api/pet-products/", f"/api/pet-products/{pk}/", "/api/pet-products/search/?q=chicken",
+            "/api/pet-products/facets/?pet_type=dog", "/api/pet-products/deals/",
+            "/api/pet-products/changes/", f"/api/pet-products/batch/?ids={pk}",
+            f"/api/pet-products/review-summary/?ids={pk}", "/api/pet-products/bestsellers/",
+            "/api/pet-products/suggest/?prefix=chi", "/api/pet-categories/", "/api/brands/",
+            "/api/brands/acme/products/", "/api/pet-page/", f"/api/pet-product/{pk}/",
+            f"/api/pet-product/{pk}/review-summary/", f"/api/pet-product/{pk}/similar/",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.stale.get(url).status_code, 200)
+        response = self.stale.post("/api/pet-products/batch/", {"ids": [pk]}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_all_still_authenticates(self):
+        self.assertEqual(self.stale.get("/api/pet-products/deals/?all=1").status_code, 401)
+        staff = User.objects.create_user("admin", password="x", is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+        body = client.get("/api/pet-products/deals/?all=1").json()
+        self.assertEqual([card["id"] for card in body], [self.product.pk])
+
+
+class SimilarProductTests(TestCase):
+    def setUp(self):
+        self.puppy, self.adult, self.cat, self.chew, self.tug = (
+            PetProduct.objects.create(title=title, brand=brand, pet_type=pet_type, quantity_unit=unit)
+            for title, brand, pet_type, unit in (
+                ("Royal Canin Puppy Dry Dog Food", "Royal Canin", PetType.DOG, UnitType.KG),
+                ("Royal Canin Adult Dry Dog Food", "Royal Canin", PetType.DOG, UnitType.KG),
+                ("Whiskas Tuna Cat Food", "Whiskas", PetType.CAT, UnitType.KG),
+                ("Rope Chew Toy", "Kong", PetType.DOG, UnitType.PCS),
+                ("Rope Tug Toy", "Kong", PetType.DOG, UnitType.PCS),
+            )
+        )
+        PetProduct.objects.create(title="Royal Canin Senior Dry Dog Food", brand="Royal Canin", is_active=False)
+
+    def similar_ids(self, product):
+        return list(ProductSimilarity.objects.filter(product=product).order_by("rank").values_list("similar_id", flat=True))
+
+    def test_full_build(self):
+        scored, written = similar.build()
+        self.assertEqual(scored, 5)
+        self.assertEqual(written, ProductSimilarity.objects.count())
+        self.assertEqual(self.similar_ids(self.puppy)[0], self.adult.pk)
+        self.assertEqual(self.similar_ids(self.chew)[0], self.tug.pk)
+        self.assertNotIn(self.cat.pk, self.similar_ids(self.chew))
+        scores = list(ProductSimilarity.objects.filter(product=self.puppy).order_by("rank").values_list("score", flat=True))
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertLessEqual(scores[0], 1.0 + 1e-6)
+
+    def test_incremental_rescores_only_what_changed(self):
+        similar.build()
+        untouched = list(ProductSimilarity.objects.filter(product=self.cat).values_list("similar_id", "computed"))
+        xl = PetProduct.objects.create(title="Rope Chew Toy XL", brand="Kong")
+        similar.build(incremental=True)
+        self.assertEqual(self.similar_ids(self.chew)[0], xl.pk)
+        self.assertIn(self.chew.pk, self.similar_ids(xl))
+        self.assertEqual(list(ProductSimilarity.objects.filter(product=self.cat).values_list("similar_id", "computed")), untouched)
+
+        PetProduct.objects.filter(pk=self.adult.pk).update(is_active=False)
+        similar.build(incremental=True)
+        self.assertNotIn(self.adult.pk, self.similar_ids(self.puppy))
+        self.assertNotIn(self.adult.pk, self.similar_ids(self.cat))
+        self.assertEqual(self.similar_ids(self.adult), [])
+
+    def test_endpoint(self):
+        similar.build()
+        PetProduct.objects.filter(pk=self.adult.pk).update(is_active=False)
+        with self.assertNumQueries(2):
+            body = APIClient().get(f"/api/pet-product/{self.puppy.pk}/similar/").json()
+        self.assertEqual([card["id"] for card in body], [self.cat.pk])
+        self.assertEqual(body[0]["title"], self.cat.title)
+        body = APIClient().get(f"/api/pet-product/{self.chew.pk}/similar/?limit=1").json()
+        self.assertEqual([card["id"] for card in body], [self.tug.pk])
+        self.assertEqual(APIClient().get(f"/api/pet-product/{self.adult.pk}/similar/").status_code, 404)
+
+
+class CardProjectionTests(TestCase):
+    def test_same_json_as_serializer(self):
+        PetProduct.objects.create(title="Plain")
+        PetProduct.objects.create(
+            title='Kibble "mix" \u2028', image="products/kibble mix ü.jpg", price=Decimal("499"), mrp=Decimal("650.5"),
+            quantity_value=Decimal("2.5"), quantity_unit=UnitType.KG,
+        )
+        PetProduct.objects.bulk_create([PetProduct(title="Not built yet")])
+        factory, renderer = APIRequestFactory(), CardJSONRenderer()
+        for query in ("", "?fields=id,image,quantity_display"):
+            request = Request(factory.get(f"/api/pet-products/{query}"))
+            qs = PetProduct.objects.order_by("id")
+            expected = renderer.render(PetProductSerializer(qs, many=True, context={"request": request}).data)
+            for prebuilt in (True, False):
+                cards = PetProductCardProjection(request, prebuilt=prebuilt)
+                self.assertEqual(renderer.render(cards.many(cards.queryset(qs))), expected)
+
+    def test_card_json_follows_changes(self):
+        product = PetProduct.objects.create(title="Ball", price=Decimal("100"))
+        self.assertEqual(json.loads(product.card_json)["price"], "100.00")
+        PetProduct.objects.filter(pk=product.pk).update(price=Decimal("80"), mrp=Decimal("100"))
+        card = json.loads(PetProduct.objects.get(pk=product.pk).card_json)
+        self.assertEqual((card["price"], card["discount_pct"]), ("80.00", 20))
+
+        PetProduct.objects.bulk_create([PetProduct(title="Imported")])
+        with self.assertRaises(CommandError):
+            call_command("rebuild_product_cards", "--check", stdout=StringIO())
+        call_command("rebuild_product_cards", stdout=StringIO())
+        call_command("rebuild_product_cards", "--check", stdout=StringIO())
+
+    def test_bulk_update_renders_each_card_once(self):
+        PetProduct.objects.bulk_create(
+            PetProduct(title=f"Bulk {i}", price=Decimal("10"), quantity_value=Decimal("1"), quantity_unit=UnitType.KG)
+            for i in range(5)
+        )
+        from . import serializers
+
+        with mock.patch.object(serializers, "render_card", wraps=serializers.render_card) as render, \
+                self.captureOnCommitCallbacks() as callbacks:
+            PetProduct.objects.filter(title__startswith="Bulk ").update(price=Decimal("7"))
+        self.assertEqual(render.call_count, 5)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(PetProduct.objects.filter(unit_price=Decimal("7.00")).count(), 5)
+
+    def test_cart_cards_in_one_query(self):
+        client = APIClient()
+        products = [PetProduct.objects.create(title=f"Toy {i}") for i in range(5)]
+        token = None
+        for product in products:
+            token = client.post("/api/cart/add/", {"product_id": product.pk}, format="json",
+                                HTTP_X_CART_TOKEN=token or "").json()["token"]
+        with self.assertNumQueries(3):
+            body = client.get("/api/cart/", HTTP_X_CART_TOKEN=token).json()
+        self.assertEqual([item["product"]["title"] for item in body["items"]], [p.title for p in products])
+
+
+class ChangesFeedTests(TestCase):
+    def sync(self, since=""):
+        return APIClient().get(f"/api/pet-products/changes/?since={since}").json()
+
+    def test_changes_since_token(self):
+        food, toy, bowl = (PetProduct.objects.create(title=t) for t in ("Food", "Toy", "Bowl"))
+        with mock.patch("pets.views.CHANGES_SETTLE", timedelta(0)):
+            first = self.sync()
+            self.assertEqual([p["id"] for p in first["results"]], [food.pk, toy.pk, bowl.pk])
+            self.assertEqual(self.sync(first["token"])["results"], [])
+
+            PetProduct.objects.filter(pk=food.pk).update(price=10)
+            toy.is_active = False
+            toy.save()
+            bowl_id = bowl.pk
+            bowl.delete()
+            body = self.sync(first["token"])
+        self.assertEqual([p["id"] for p in body["results"]], [food.pk])
+        self.assertEqual(body["removed"], [toy.pk, bowl_id])
+
+    def test_bad_since_is_a_400(self):
+        good = self.sync()["token"]
+        for since in (
+            "eyJ2IjpbMSwyLDMsNF19", "not-base64!", good[:-3], encode_cursor([1, 2]),
+            encode_cursor(["2025-01-01T00:00:00+00:00", "1", "2025-01-01T00:00:00+00:00", 0]),
+            encode_cursor(["2025-01-01T00:00:00+00:00", True, "2025-01-01T00:00:00+00:00", 0]),
+            encode_cursor(["yesterday", 1, "2025-01-01T00:00:00+00:00", 0]), "2025-13-45T00:00:00",
+        ):
+            with self.subTest(since=since):
+                response = APIClient().get(f"/api/pet-products/changes/?since={since}")
+                self.assertEqual((response.status_code, response.json()), (400, {"since": "Invalid token."}))
+
+    def test_settle_window_holds_back_fresh_writes(self):
+        PetProduct.objects.create(title="Food")
+        self.assertEqual(self.sync()["results"], [])
+
+
+class CatalogSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ProductSortTests.setUpTestData()
+        PetProduct.objects.filter(pk__in=[1, 2]).update(is_active=False)
+
+    def setUp(self):
+        # the snapshot is per process and test data never commits a version bump
+        catalog_snapshot.clear()
+        cache.clear()
+
+    def walk(self, url):
+        pages = []
+        while url:
+            pages.append(APIClient().get(url).json())
+            url = pages[-1]["next"]
+        return pages
+
+    def test_same_pages_as_database_with_no_queries(self):
+        for query in ["", "sort=price_desc", "sort=unit_price&unit_basis=kg", "rating=5,4&price=0-250"]:
+            with self.subTest(query=query):
+                url = f"/api/pet-products/?pet_type=dog&page_size=4&{query}"
+                expected = self.walk(url)
+                with override_settings(PETS_CATALOG_SNAPSHOT=True):
+                    self.assertEqual(self.walk(url), expected)
+                    with self.assertNumQueries(0):
+                        self.walk(url)
+
+    def test_rebuilt_after_a_change(self):
+        with override_settings(PETS_CATALOG_SNAPSHOT=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                before = APIClient().get("/api/pet-page/?pet_type=dog&cursor=").json()
+                PetProduct.objects.create(title="New", order=0)
+            body = APIClient().get("/api/pet-page/?pet_type=dog&cursor=").json()
+        self.assertEqual(body["pagination"]["total_items"], before["pagination"]["total_items"] + 1)
+
+
+class PetPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_until_the_catalog_changes(self):
+        PetCategory.objects.create(title="Food")
+        PetProduct.objects.create(title="Kibble")
+        client = APIClient()
+        first = client.get("/api/pet-page/?pet_type=dog").json()
+        self.assertEqual(first["promos"], first["sidebar"][0]["items"])
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get("/api/pet-page/?pet_type=dog").json(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PetCategory.objects.create(title="Toys")
+        self.assertEqual(len(client.get("/api/pet-page/?pet_type=dog").json()["promos"]), 2)
+
+    def test_concurrent_misses_build_once(self):
+        calls, results = [], []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return "payload"
+
+        threads = [threading.Thread(target=lambda: results.append(single_flight("pets:test", build, 60))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((len(calls), results), (1, ["payload"] * 5))
+
+
+class CatalogFileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ProductSortTests.setUpTestData()
+        PetProduct.objects.filter(pk__in=[1, 2]).update(is_active=False)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "catalog.bin")
+
+    def test_pages_match_database_with_no_queries(self):
+        walk = CatalogSnapshotTests.walk
+        for sort in ["", *PRODUCT_SORTS]:
+            with self.subTest(sort=sort):
+                url = f"/api/pet-products/?pet_type=dog&page_size=4&sort={sort}"
+                expected = walk(self, url)
+                with override_settings(PETS_CATALOG_FILE=self.path):
+                    catalog_file.write()
+                    self.assertEqual(walk(self, url), expected)
+                    with self.assertNumQueries(0):
+                        walk(self, url)
+
+    def test_lookup_and_replace(self):
+        with override_settings(PETS_CATALOG_FILE=self.path, PETS_CATALOG_FILE_DELAY=0):
+            catalog_file.write()
+            mapped = catalog_file.current()
+            self.assertEqual(mapped.card(mapped.find(3))["title"], "Product 2")
+            self.assertIsNone(mapped.find(1))
+            with self.captureOnCommitCallbacks(execute=True):
+                PetProduct.objects.filter(pk=3).update(title="Renamed")
+            self.assertIsNot(catalog_file.current(), mapped)
+            self.assertEqual(catalog_file.current().card(catalog_file.current().find(3))["title"], "Renamed")
+
+    def test_stale_or_older_files_are_not_served(self):
+        with override_settings(PETS_CATALOG_FILE=self.path), mock.patch.object(catalog_file, "_schedule") as schedule:
+            version = catalog_file.write()
+            self.assertIsNotNone(catalog_file.current())
+            with self.captureOnCommitCallbacks(execute=True):
+                PetProduct.objects.filter(pk=3).update(title="Renamed")
+            schedule.assert_called_once()
+            # bumped, rewrite pending: the database answers meanwhile
+            self.assertIsNone(catalog_file.current())
+            self.assertEqual(catalog_file.write(), version + 1)
+            # a slower build from the older version doesn't replace the newer file
+            self.assertIsNone(catalog_file.write(version=version))
+            self.assertEqual(catalog_file.file_version(self.path), version + 1)
+            self.assertEqual(catalog_file.current().card(catalog_file.current().find(3))["title"], "Renamed")
+
+    def test_bumps_share_one_background_rewrite(self):
+        with override_settings(PETS_CATALOG_FILE=self.path, PETS_CATALOG_FILE_DELAY=0.05), \
+                mock.patch.object(catalog_file, "write", return_value=None) as write:
+            for _ in range(5):
+                bump_version()
+            time.sleep(0.3)
+        write.assert_called_once_with(version=current_version())
@@ -1,12 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    BrandViewSet,
     PetCategoryViewSet,
     PetProductViewSet,
     PetBannerViewSet,
     PetPageViewSet,
 )
-from .product_detail_views import PetProductDetailAPIView, ProductReviewCreateAPIView
+from .product_detail_views import (
+    PetProductDetailAPIView,
+    ProductReviewListCreateAPIView,
+    ProductReviewSummaryAPIView,
+    SimilarProductsAPIView,
+)
 from .views_cart import CartViewSet
 
 router = DefaultRouter()
@@ -14,12 +20,17 @@ router.register(r"pet-categories", PetCategoryViewSet, basename="pet-category")
 router.register(r"pet-products", PetProductViewSet, basename="pet-product")
 router.register(r"pet-banners", PetBannerViewSet, basename="pet-banner")
 router.register(r"pet-page", PetPageViewSet, basename="pet-page")
+router.register(r"brands", BrandViewSet, basename="brand")
 router.register(r'cart', CartViewSet, basename='cart')
 
 urlpatterns = [
     path("", include(router.urls)),
     path("pet-product/<int:id>/", PetProductDetailAPIView.as_view(), name="pet-product-detail"),
-    path("pet-product/<int:id>/reviews/", ProductReviewCreateAPIView.as_view(), name="pet-product-reviews"),
+    path("pet-product/<int:id>/reviews/", ProductReviewListCreateAPIView.as_view(), name="pet-product-reviews"),
+    path(
+        "pet-product/<int:id>/review-summary/", ProductReviewSummaryAPIView.as_view(), name="pet-product-review-summary"
+    ),
+    path("pet-product/<int:id>/similar/", SimilarProductsAPIView.as_view(), name="pet-product-similar"),
 ]
 
 
@@ -1,40 +1,473 @@
 # petshop/viewsets.py
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny
 from django.core.paginator import Paginator
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from .models import PetCategory, PetProduct, PetBanner
+from .models import Brand, PetCategory, PetProduct, PetBanner, ProductTombstone
 from .serializers import (
+    BrandSerializer,
     PetCategorySerializer,
     PetProductSerializer,
     PetBannerSerializer,
+    PetProductCardProjection,
+    present_cards,
+)
+from .serializers_detail import SUMMARY_FIELDS, review_summary
+from core.pagination import wants_all
+from .pagination import (
+    PRODUCT_ORDERING,
+    KeysetPaginator,
+    KeysetPagination,
+    cached_count,
+    decode_cursor,
+    encode_cursor,
+    product_ordering,
 )
+from . import bestsellers, catalog_file, facets, search, snapshot
+from .catalog import current_version, single_flight
+from .renderers import CARD_RENDERERS
+from .fuzzy import fuzzy_index
+from .suggest import suggest_index
 
 PAGE_SIZE = 9
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+SUGGEST_LIMIT = 8
+DEALS_ORDERING = ("-discount_pct", "-id")
+DEALS_CACHE_TIMEOUT = 60
+BRANDS_CACHE_TIMEOUT = 60 * 60
+PET_PAGE_CACHE_TIMEOUT = 60 * 10
+BATCH_MAX_IDS = 100
+CHANGES_LIMIT = 500
+# rows newer than this are held back until writes still in flight have committed
+CHANGES_SETTLE = timedelta(seconds=5)
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, maximum))
+
+
+def _product_listing(params, pet_type):
+    """
+    Active products of `pet_type` with the listing filters and ?sort= applied.
+    Returns (queryset, ordering) so callers can keyset-page on the same ordering.
+    """
+    ordering = product_ordering(params.get("sort"))
+    qs = PetProduct.objects.filter(pet_type=pet_type, is_active=True)
+    if "unit_price" in ordering:
+        # products without a comparable unit have no unit price to page on
+        qs = qs.filter(unit_price__isnull=False)
+    if params.get("unit_basis"):
+        qs = qs.filter(unit_price_basis=params["unit_basis"])
+    if params.get("category", "").isdigit():
+        qs = qs.filter(categories=params["category"])
+    qs = facets.filter_queryset(qs, facets.parse_filters(params))
+    return qs.order_by(*ordering), ordering
+
+
+def _id_list(raw):
+    """[1, "2", "3,4"] -> [1, 2, 3, 4], first occurrence order, duplicates dropped."""
+    ids = []
+    for item in raw:
+        for token in str(item).split(","):
+            token = token.strip()
+            if not token:
+                continue
+            if not token.isdigit():
+                raise ValidationError({"ids": f"Invalid id: {token!r}"})
+            ids.append(int(token))
+    return list(dict.fromkeys(ids))
+
+
+def _watermark(since):
+    """
+    ?since= is either a token from a previous response or, for the first sync,
+    an ISO timestamp. Returns (product (updated, id), tombstone (deleted, id)).
+    """
+    invalid = ValidationError({"since": "Invalid token."})
+    try:
+        moment = parse_datetime(since) if since else None
+        if since and moment is None:
+            values = decode_cursor(since)[0]
+            if (
+                len(values) != 4
+                or not all(isinstance(v, str) for v in values[::2])
+                or not all(isinstance(v, int) and not isinstance(v, bool) for v in values[1::2])
+            ):
+                raise invalid
+            moments = [parse_datetime(values[0]), parse_datetime(values[2])]
+            if None in moments:
+                raise invalid
+            return (moments[0], values[1]), (moments[1], values[3])
+    except (NotFound, ValueError):
+        # not base64 / JSON, or a date that parses but doesn't exist
+        raise invalid
+    if moment is None:
+        moment = datetime.min.replace(tzinfo=dt_timezone.utc)
+    elif timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return (moment, 0), (moment, 0)
+
+
+def _search_position(cursor):
+    """The (score, id) a search ?cursor= carries; malformed ones are NotFound like the other cursors."""
+    values = decode_cursor(cursor)[0]
+    if (
+        len(values) != 2
+        or not isinstance(values[0], (int, float)) or isinstance(values[0], bool)
+        or not isinstance(values[1], int) or isinstance(values[1], bool)
+    ):
+        raise NotFound("Invalid cursor")
+    return values
+
+
+def _card_page(request, queryset, ordering, paginator=None):
+    """
+    Keyset-paged product cards through the values() projection; `paginator`
+    defaults to a fresh KeysetPagination.
+    """
+    paginator = paginator or KeysetPagination()
+    cards = PetProductCardProjection(request)
+    rows = cards.queryset(queryset, *(f.lstrip("-") for f in ordering))
+    page = paginator.paginate_queryset(rows, request, ordering=ordering)
+    if page is None:
+        return Response(cards.many(rows.order_by(*ordering)))
+    return paginator.get_paginated_response(cards.many(page))
+
+
+def _has_filters(params):
+    return bool(params.get("unit_basis") or params.get("category") or facets.parse_filters(params))
 
 
-class PetCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+def _count_key(pet_type, params):
+    """Cache key for the listing total: filters and sort (unit_price drops rows) matter, the position doesn't."""
+    filters = sorted((k, v) for k, v in params.lists() if k not in ("cursor", "page", "page_size"))
+    digest = hashlib.md5(repr(filters).encode()).hexdigest()
+    return f"pets:active-count:{pet_type}:{digest}"
+
+
+class AnonymousCatalogMixin:
+    """
+    The catalog reads the same for everyone, so its views skip authentication
+    (a JWT decode or token lookup per request) and a stale Authorization header
+    can't turn a product page into a 401. The exception is ?all=, which only
+    staff may use (core.pagination.wants_all) and so has to know who is asking.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.anonymous = "all" not in request.GET
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_authenticators(self):
+        if getattr(self, "anonymous", False):
+            return []
+        return super().get_authenticators()
+
+
+class PetCategoryViewSet(AnonymousCatalogMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     serializer_class = PetCategorySerializer
     queryset = PetCategory.objects.all()
+    ordering = ("order", "id")
 
     def get_queryset(self):
         pet_type = self.request.query_params.get("pet_type", "dog")
         return PetCategory.objects.filter(pet_type=pet_type).order_by("order", "id")
 
 
-class PetProductViewSet(viewsets.ReadOnlyModelViewSet):
+class PetProductViewSet(AnonymousCatalogMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
+    renderer_classes = CARD_RENDERERS
     serializer_class = PetProductSerializer
     queryset = PetProduct.objects.all()
+    pagination_class = KeysetPagination
+
+    def get_ordering(self):
+        """?sort=price_asc|price_desc|rating|newest|popular|unit_price, default grid order otherwise."""
+        return product_ordering(self.request.query_params.get("sort"))
 
     def get_queryset(self):
         pet_type = self.request.query_params.get("pet_type", "dog")
-        return PetProduct.objects.filter(pet_type=pet_type, is_active=True).order_by("order", "-created")
+        return _product_listing(self.request.query_params, pet_type)[0]
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        ordering = self.get_ordering()
+        if wants_all(request):
+            return _card_page(request, self.get_queryset(), ordering, self.paginator)
+        if catalog_file.enabled() and not _has_filters(params):
+            mapped = catalog_file.current()
+            if mapped is not None:
+                page = mapped.page(
+                    params.get("pet_type", "dog"), ordering, self.paginator.get_page_size(request), params.get("cursor")
+                )
+                cards = self.paginator.paginate_keyset_page(page, request)
+                return self.paginator.get_paginated_response(present_cards(cards, request))
+        if not snapshot.enabled():
+            return _card_page(request, self.get_queryset(), ordering, self.paginator)
+        records, keys = snapshot.pet_type_snapshot(params.get("pet_type", "dog")).filtered(
+            ordering, params, facets.parse_filters(params)
+        )
+        page = snapshot.keyset_page(records, keys, ordering, self.paginator.get_page_size(request), params.get("cursor"))
+        rows = self.paginator.paginate_keyset_page(page, request)
+        return self.paginator.get_paginated_response(snapshot.cards(rows, request))
 
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """
+        GET /api/pet-products/facets/?pet_type=dog&brand=pedigree&price=0-250&has_discount=1
+        Sidebar counts for brand, quantity_unit, price band, rating and has_discount,
+        computed from in-memory bitsets. Takes the same filters as the listing,
+        including &category=<id> and &unit_basis=.
+        """
+        pet_type = request.query_params.get("pet_type", "dog")
+        filters = facets.parse_filters(request.query_params)
+        scope = facets.parse_scope(request.query_params)
+        return Response({"pet_type": pet_type, **facets.facet_counts(pet_type, filters, scope)})
 
-class PetBannerViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=["get"], url_path="deals")
+    def deals(self, request):
+        """
+        GET /api/pet-products/deals/?pet_type=dog&min_discount=20&page_size=10&cursor=...
+        Biggest discounts first, straight off the discount index; pages are cached briefly.
+        Staff ?all=1 bypasses the cache (the same URL is a single page for everyone else).
+        """
+        pet_type = request.query_params.get("pet_type", "dog")
+        min_discount = _int_param(request, "min_discount", 1, 100)
+        qs = PetProduct.objects.filter(pet_type=pet_type, is_active=True, discount_pct__gte=min_discount)
+        if wants_all(request):
+            return _card_page(request, qs, DEALS_ORDERING)
+
+        key = "pets:deals:" + hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        data = cache.get(key)
+        if data is None:
+            data = _card_page(request, qs, DEALS_ORDERING).data
+            cache.set(key, data, DEALS_CACHE_TIMEOUT)
+        return Response(data)
+
+    @action(detail=False, methods=["get", "post"], url_path="batch")
+    def batch(self, request):
+        """
+        GET  /api/pet-products/batch/?ids=1,2,3
+        POST /api/pet-products/batch/  {"ids": [1, 2, 3]}
+        Cards for up to BATCH_MAX_IDS products in one query, keyed by id;
+        ids that don't exist or are inactive are listed instead.
+        """
+        if request.method == "POST":
+            raw = request.data.get("ids", [])
+            raw = raw if isinstance(raw, list) else [raw]
+        else:
+            raw = request.query_params.getlist("ids")
+        ids = _id_list(raw)
+        if len(ids) > BATCH_MAX_IDS:
+            raise ValidationError({"ids": f"At most {BATCH_MAX_IDS} ids per request."})
+
+        results, inactive = {}, []
+        mapped = catalog_file.current() if catalog_file.enabled() else None
+        if mapped is not None:
+            # active products straight from the shared file; only the rest hit the database
+            rows = {pk: mapped.find(pk) for pk in ids}
+            results = {pk: mapped.card(row) for pk, row in rows.items() if row is not None}
+            results = dict(zip(results, present_cards(results.values(), request)))
+        products = PetProduct.objects.in_bulk([pk for pk in ids if pk not in results]) if len(results) < len(ids) else {}
+        for pk in ids:
+            if pk in results:
+                continue
+            product = products.get(pk)
+            if product is None:
+                continue
+            if not product.is_active:
+                inactive.append(pk)
+                continue
+            results[pk] = PetProductSerializer(product, context={"request": request}).data
+        missing = [pk for pk in ids if pk not in results and pk not in products]
+        results = {pk: results[pk] for pk in ids if pk in results}
+        return Response({"results": results, "missing": missing, "inactive": inactive})
+
+    @action(detail=False, methods=["get"], url_path="review-summary")
+    def review_summary(self, request):
+        """
+        GET /api/pet-products/review-summary/?ids=1,2,3
+        /api/pet-product/<id>/review-summary/ for up to BATCH_MAX_IDS active products,
+        keyed by id, in one query; unknown or inactive ids are left out.
+        """
+        ids = _id_list(request.query_params.getlist("ids"))
+        if len(ids) > BATCH_MAX_IDS:
+            raise ValidationError({"ids": f"At most {BATCH_MAX_IDS} ids per request."})
+        rows = PetProduct.objects.filter(pk__in=ids, is_active=True).values(*SUMMARY_FIELDS)
+        summaries = {row["id"]: review_summary(row) for row in rows}
+        return Response({"results": {pk: summaries[pk] for pk in ids if pk in summaries}})
+
+    @action(detail=False, methods=["get"], url_path="bestsellers")
+    def bestsellers(self, request):
+        """
+        GET /api/pet-products/bestsellers/?pet_type=dog&window=7d&limit=20
+        Active products by units sold in the last 7 or 30 days, as cards, read
+        from the leaderboard pets.bestsellers keeps (one LIMITed index range).
+        """
+        window = request.query_params.get("window") or bestsellers.DEFAULT_WINDOW
+        if window not in bestsellers.WINDOWS:
+            raise ValidationError({"window": f"One of {', '.join(bestsellers.WINDOWS)}."})
+        pet_type = request.query_params.get("pet_type") or None
+        limit = _int_param(request, "limit", bestsellers.TOP_LIMIT, bestsellers.MAX_LIMIT)
+        cards = PetProductCardProjection(request)
+        qs = bestsellers.top(bestsellers.WINDOWS[window], pet_type)
+        return Response({"window": window, "pet_type": pet_type, "results": cards.many(cards.queryset(qs)[:limit])})
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """
+        GET /api/pet-products/changes/?since=2025-01-01T00:00:00Z&pet_type=dog
+        GET /api/pet-products/changes/?since=<token from the previous response>
+        Products created or updated after the watermark (`results`), and ids that
+        were deactivated or deleted (`removed`), oldest first. Keep calling with
+        `since` set to the returned `token` while `has_more` is true. The token is a
+        server-side (updated, id) position, so client clocks never matter.
+        """
+        (after, after_id), (deleted_after, deleted_after_id) = _watermark(request.query_params.get("since"))
+        pet_type = request.query_params.get("pet_type")
+        horizon = timezone.now() - CHANGES_SETTLE
+
+        products = PetProduct.objects.filter(
+            Q(updated__gt=after) | Q(updated=after, id__gt=after_id), updated__lte=horizon
+        )
+        tombstones = ProductTombstone.objects.filter(
+            Q(deleted__gt=deleted_after) | Q(deleted=deleted_after, id__gt=deleted_after_id), deleted__lte=horizon
+        )
+        if pet_type:
+            products = products.filter(pet_type=pet_type)
+            tombstones = tombstones.filter(pet_type=pet_type)
+        products = list(products.order_by("updated", "id")[: CHANGES_LIMIT + 1])
+        tombstones = list(tombstones.order_by("deleted", "id")[: CHANGES_LIMIT + 1])
+        has_more = len(products) > CHANGES_LIMIT or len(tombstones) > CHANGES_LIMIT
+        products, tombstones = products[:CHANGES_LIMIT], tombstones[:CHANGES_LIMIT]
+
+        if products:
+            after, after_id = products[-1].updated, products[-1].id
+        if tombstones:
+            deleted_after, deleted_after_id = tombstones[-1].deleted, tombstones[-1].id
+        active = [p for p in products if p.is_active]
+        results = PetProductSerializer(active, many=True, context={"request": request}).data
+        for item, product in zip(results, active):
+            item["pet_type"] = product.pet_type
+        removed = [p.id for p in products if not p.is_active] + [t.product_id for t in tombstones]
+        return Response({
+            "token": encode_cursor([after, after_id, deleted_after, deleted_after_id]),
+            "has_more": has_more,
+            "results": results,
+            "removed": removed,
+        })
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        GET /api/pet-products/search/?q=chicken&pet_type=dog&page_size=20&cursor=...
+        BM25-ranked, with <mark> highlighted title and description snippet.
+        A first page with no hits is retried once with misspelled terms corrected
+        through the trigram index ("pedigre" -> "pedigree"); see `corrected`.
+        """
+        query = request.query_params.get("q", "").strip()
+        pet_type = request.query_params.get("pet_type") or None
+        page_size = _int_param(request, "page_size", SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+        cursor = request.query_params.get("cursor")
+        after = _search_position(cursor) if cursor else None
+
+        hits = search.search(query, pet_type=pet_type, limit=page_size + 1, after=after)
+        corrected = None
+        if not hits and after is None:
+            corrected = fuzzy_index.get().correct(query)
+            if corrected:
+                hits = search.search(corrected, pet_type=pet_type, limit=page_size + 1)
+        has_more = len(hits) > page_size
+        hits = hits[:page_size]
+
+        products = PetProduct.objects.in_bulk([h["id"] for h in hits])
+        results = []
+        for hit in hits:
+            product = products.get(hit["id"])
+            if product is None:
+                continue
+            item = PetProductSerializer(product, context={"request": request}).data
+            item["highlight"] = {"title": hit["title"], "description": hit["snippet"]}
+            results.append(item)
+
+        next_url = None
+        if has_more:
+            token = encode_cursor([hits[-1]["score"], hits[-1]["id"]])
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", token)
+            if corrected:
+                next_url = replace_query_param(next_url, "q", corrected)
+        return Response({"query": query, "corrected": corrected, "next": next_url, "results": results})
+
+    @action(detail=False, methods=["get"], url_path="suggest")
+    def suggest(self, request):
+        """
+        GET /api/pet-products/suggest/?prefix=ped&pet_type=dog&limit=8
+        Served from the per-process prefix index, no database access.
+        """
+        prefix = request.query_params.get("prefix", "")
+        pet_type = request.query_params.get("pet_type") or None
+        limit = _int_param(request, "limit", SUGGEST_LIMIT, 20)
+        suggestions = suggest_index.get().suggest(prefix, limit=limit, pet_type=pet_type)
+        return Response({"prefix": prefix, **suggestions})
+
+
+class BrandViewSet(AnonymousCatalogMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    GET /api/brands/?pet_type=dog         -> brands with active products, with counts
+    GET /api/brands/<slug>/               -> one brand
+    GET /api/brands/<slug>/products/?pet_type=dog&cursor=...
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = CARD_RENDERERS
+    serializer_class = BrandSerializer
+    queryset = Brand.objects.all()
+    lookup_field = "slug"
+    ordering = ("name", "id")
+
+    def list(self, request):
+        pet_type = request.query_params.get("pet_type") or None
+        # the catalog version moves on every product change, so counts are never stale
+        key = f"pets:brands:{pet_type}:{request.get_host()}:{current_version()}"
+        data = cache.get(key)
+        if data is None:
+            active = Q(products__is_active=True)
+            if pet_type:
+                active &= Q(products__pet_type=pet_type)
+            brands = (
+                Brand.objects.annotate(product_count=Count("products", filter=active))
+                .filter(product_count__gt=0).order_by(*self.ordering)
+            )
+            data = BrandSerializer(brands, many=True, context={"request": request}).data
+            cache.set(key, data, BRANDS_CACHE_TIMEOUT)
+        return Response({"pet_type": pet_type, "results": data})
+
+    @action(detail=True, methods=["get"], url_path="products")
+    def products(self, request, slug=None):
+        brand = self.get_object()
+        qs = PetProduct.objects.filter(brand_ref=brand, is_active=True)
+        pet_type = request.query_params.get("pet_type")
+        if pet_type:
+            qs = qs.filter(pet_type=pet_type)
+        return _card_page(request, qs, PRODUCT_ORDERING)
+
+
+class PetBannerViewSet(AnonymousCatalogMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     serializer_class = PetBannerSerializer
     queryset = PetBanner.objects.all()
@@ -44,39 +477,105 @@ class PetBannerViewSet(viewsets.ReadOnlyModelViewSet):
         return PetBanner.objects.filter(pet_type=pet_type)
 
 
-class PetPageViewSet(viewsets.ViewSet):
+class PetPageViewSet(AnonymousCatalogMixin, viewsets.ViewSet):
     """
     Combined page payload via DefaultRouter:
     - GET /api/pet-page/         -> defaults to pet_type=dog&page=1
     - GET /api/pet-page/?pet_type=cat&page=2
+    - GET /api/pet-page/?pet_type=cat&cursor=   -> keyset mode, follow pagination.next / pagination.prev
+    - &sort=price_asc|price_desc|rating|newest|popular|unit_price and the
+      /api/pet-products/ filters (incl. &category=<id>) work in both modes
+    Payloads are cached per catalog version and query, filled by one request at a time.
     """
     permission_classes = [AllowAny]
+    renderer_classes = CARD_RENDERERS
 
     def list(self, request):
         pet_type = request.query_params.get("pet_type", "dog")
         page_num = int(request.query_params.get("page", 1))
+        # the catalog version moves on every product, category and banner change,
+        # so a cached payload is never stale; the host is in the key for the image URLs
+        params = sorted(request.query_params.lists())
+        digest = hashlib.md5(repr((request.build_absolute_uri("/"), params)).encode()).hexdigest()
+        key = f"pets:pet-page:{pet_type}:{page_num}:{current_version()}:{digest}"
+        build = self._from_snapshot if snapshot.enabled() else self._from_database
+        return Response(single_flight(key, lambda: build(request, pet_type, page_num), PET_PAGE_CACHE_TIMEOUT))
 
+    def _from_database(self, request, pet_type, page_num):
         categories = PetCategory.objects.filter(pet_type=pet_type).order_by("order", "id")
-        products_qs = PetProduct.objects.filter(pet_type=pet_type, is_active=True).order_by("order", "-created")
+        products_qs, ordering = _product_listing(request.query_params, pet_type)
         banner = PetBanner.objects.filter(pet_type=pet_type).first()
+        cards = PetProductCardProjection(request)
+        rows = cards.queryset(products_qs, *(f.lstrip("-") for f in ordering))
 
-        paginator = Paginator(products_qs, PAGE_SIZE)
-        page = paginator.get_page(page_num)
+        if "cursor" in request.query_params:
+            page = KeysetPaginator(rows, ordering, PAGE_SIZE).page(
+                request.query_params.get("cursor") or None
+            )
+            products = page.object_list
+            pagination = {
+                "mode": "cursor",
+                "next": page.next_cursor,
+                "prev": page.previous_cursor,
+                "page_size": PAGE_SIZE,
+                "total_items": cached_count(_count_key(pet_type, request.query_params), products_qs),
+                "total_is_approximate": True,
+            }
+        else:
+            paginator = Paginator(rows, PAGE_SIZE)
+            page = paginator.get_page(page_num)
+            products = page.object_list
+            pagination = {
+                "page": page.number,
+                "total_pages": paginator.num_pages,
+                "total_items": paginator.count,
+            }
 
-        data = {
+        categories = PetCategorySerializer(categories, many=True, context={"request": request}).data
+        return {
             "title": pet_type.capitalize(),
-            "promos": PetCategorySerializer(categories, many=True, context={"request": request}).data,
-            "sidebar": [{
-                "id": 0,
-                "title": "Categories",
-                "items": PetCategorySerializer(categories, many=True, context={"request": request}).data
-            }],
-            "products": PetProductSerializer(page.object_list, many=True, context={"request": request}).data,
+            "promos": categories,
+            "sidebar": [{"id": 0, "title": "Categories", "items": categories}],
+            "products": cards.many(products),
             "banner": PetBannerSerializer(banner, context={"request": request}).data if banner else None,
-            "pagination": {
+            "pagination": pagination,
+        }
+
+    def _from_snapshot(self, request, pet_type, page_num):
+        """The same payload as list(), answered from the in-memory catalog snapshot."""
+        params = request.query_params
+        current = snapshot.pet_type_snapshot(pet_type)
+        ordering = product_ordering(params.get("sort"))
+        records, keys = current.filtered(ordering, params, facets.parse_filters(params))
+
+        if "cursor" in params:
+            page = snapshot.keyset_page(records, keys, ordering, PAGE_SIZE, params.get("cursor") or None)
+            products = page.object_list
+            pagination = {
+                "mode": "cursor",
+                "next": page.next_cursor,
+                "prev": page.previous_cursor,
+                "page_size": PAGE_SIZE,
+                "total_items": len(records),
+                "total_is_approximate": False,
+            }
+        else:
+            paginator = Paginator(records, PAGE_SIZE)
+            page = paginator.get_page(page_num)
+            products = page.object_list
+            pagination = {
                 "page": page.number,
                 "total_pages": paginator.num_pages,
                 "total_items": paginator.count,
-            },
+            }
+
+        categories = [snapshot.absolute_images(c, request, "image") for c in current.categories]
+        banner = current.banner
+        return {
+            "title": pet_type.capitalize(),
+            "promos": categories,
+            "sidebar": [{"id": 0, "title": "Categories", "items": categories}],
+            "products": snapshot.cards(products, request),
+            "banner": snapshot.absolute_images(banner, request, "left_image", "right_image") if banner else None,
+            "pagination": pagination,
         }
-        return Response(data)
@@ -8,6 +8,7 @@ from django.db import transaction
 
 from .models_cart import Cart, CartItem
 from .models import PetProduct
+from .renderers import CARD_RENDERERS
 from .serializers_cart import CartSerializer, CartItemSerializer
 
 
@@ -26,6 +27,7 @@ def _get_or_create_cart_from_request(request):
 
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]
+    renderer_classes = CARD_RENDERERS
 
     def list(self, request):
         cart = _get_or_create_cart_from_request(request)
@@ -58,6 +58,7 @@ class VetDoctorViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = VetDoctor.objects.all()
     serializer_class = VetDoctorSerializer
     permission_classes = [AllowAny]
+    ordering = ("order", "id")
 
 
 
@@ -77,6 +78,7 @@ class PetServicesPageViewSet(viewsets.ReadOnlyModelViewSet):
 class ServiceCardViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ServiceCard.objects.select_related("page").all()
     serializer_class = ServiceCardSerializer
+    ordering = ("order", "id")
 
 
 
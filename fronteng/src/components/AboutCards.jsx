@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function AboutCards({ apiEndpoint = "/about-cards/" }) {
   const [cards, setCards] = useState([]);
@@ -11,7 +11,7 @@ export default function AboutCards({ apiEndpoint = "/about-cards/" }) {
       try {
         const res = await api.get(apiEndpoint);
         if (!mounted) return;
-        setCards(Array.isArray(res.data) ? res.data : []);
+        setCards(listData(res.data));
       } catch (err) {
         console.error("Failed to load about cards", err);
       }
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function AboutHighlight({ apiEndpoint = "/about-highlights/" }) {
   const [highlight, setHighlight] = useState(null);
@@ -10,7 +10,7 @@ export default function AboutHighlight({ apiEndpoint = "/about-highlights/" }) {
       try {
         const res = await api.get(apiEndpoint);
         if (!mounted) return;
-        const data = Array.isArray(res.data) ? res.data[0] : res.data;
+        const data = listData(res.data)[0];
         setHighlight(data || null);
       } catch (err) {
         console.error("Failed to load about highlight", err);
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 export default function AboutSection({ apiEndpoint = "/about/" }) {
   const [about, setAbout] = useState(null);
 
@@ -9,7 +9,7 @@ export default function AboutSection({ apiEndpoint = "/about/" }) {
       try {
         const res = await api.get(apiEndpoint);
         if (!mounted) return;
-        const data = Array.isArray(res.data) ? res.data[0] : res.data;
+        const data = listData(res.data)[0];
         setAbout(data || null);
       } catch (err) {
         console.error("Failed to load about content", err);
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function OfferStrip({ apiEndpoint = "/offer-strips/" }) {
   const [offer, setOffer] = useState(null);
@@ -11,8 +11,9 @@ export default function OfferStrip({ apiEndpoint = "/offer-strips/" }) {
       try {
         const res = await api.get(apiEndpoint);
         if (!mounted) return;
-        if (Array.isArray(res.data) && res.data.length > 0) {
-          setOffer(res.data[0]);
+        const data = listData(res.data);
+        if (data.length > 0) {
+          setOffer(data[0]);
         }
       } catch (err) {
         console.error("Failed to fetch offer strip", err);
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function PetServices({ apiEndpoint = "/pet-services/" }) {
   const [services, setServices] = useState([]);
@@ -10,7 +10,7 @@ export default function PetServices({ apiEndpoint = "/pet-services/" }) {
       try {
         const res = await api.get(apiEndpoint);
         if (!mounted) return;
-        setServices(Array.isArray(res.data) ? res.data : []);
+        setServices(listData(res.data));
       } catch (err) {
         console.error("Failed loading services:", err);
       }
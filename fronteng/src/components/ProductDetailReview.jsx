@@ -1,6 +1,8 @@
 import React, { useEffect, useState } from "react";
 import api from "../lib/api";
 
+const EMPTY_COUNTS = { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 };
+
 export default function CustomerReviews({ productId }) {
   // form states
   const [rating, setRating] = useState(0);
@@ -11,53 +13,50 @@ export default function CustomerReviews({ productId }) {
   const [message, setMessage] = useState("");
 
   // stats + reviews
-  const [counts, setCounts] = useState({ 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 });
+  const [counts, setCounts] = useState(EMPTY_COUNTS);
   const [totalReviews, setTotalReviews] = useState(0);
   const [loadingStats, setLoadingStats] = useState(true);
-  const [reviews, setReviews] = useState([]); // full reviews array (sorted newest first)
+  const [reviews, setReviews] = useState([]); // newest reviews (first page)
 
   // pagination for review list
   const PAGE_SIZE = 5;
   const [visibleCount, setVisibleCount] = useState(PAGE_SIZE);
 
-  // fetch product detail and compute review stats + list
+  // star breakdown comes precomputed from the server; the list is its first page
+  const loadReviews = async () => {
+    const [summary, page] = await Promise.all([
+      api.get(`/pet-product/${productId}/review-summary/`),
+      api.get(`/pet-product/${productId}/reviews/`, { params: { page_size: PAGE_SIZE } }),
+    ]);
+    const stars = summary.data?.stars || {};
+    const byStar = { ...EMPTY_COUNTS };
+    for (const s of Object.keys(byStar)) byStar[s] = Number(stars[s]) || 0;
+    return {
+      counts: byStar,
+      total: summary.data?.rating_count || 0,
+      reviews: Array.isArray(page.data?.results) ? page.data.results : [],
+    };
+  };
+
+  const applyReviews = ({ counts: byStar, total, reviews: list }) => {
+    setCounts(byStar);
+    setTotalReviews(total);
+    setReviews(list);
+    setVisibleCount(PAGE_SIZE);
+  };
+
+  // fetch review summary + newest reviews
   useEffect(() => {
     let cancelled = false;
     const fetchStats = async () => {
       setLoadingStats(true);
       try {
-        const res = await api.get(`/pet-product/${productId}/`);
+        const data = await loadReviews();
         if (cancelled) return;
-        const data = res.data || {};
-        const reviewsArr = Array.isArray(data.reviews) ? data.reviews : [];
-
-        // sort newest first by created (fallback to as-is if created missing)
-        const sorted = reviewsArr.slice().sort((a, b) => {
-          const ta = a.created ? new Date(a.created).getTime() : 0;
-          const tb = b.created ? new Date(b.created).getTime() : 0;
-          return tb - ta;
-        });
-
-        // compute counts
-        const byStar = { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 };
-        for (const r of sorted) {
-          const s = Number(r.rating) || 0;
-          if (s >= 1 && s <= 5) byStar[s] = (byStar[s] || 0) + 1;
-        }
-        const total = Object.values(byStar).reduce((a, b) => a + b, 0);
-
-        // fallback: if serializer provided rating_count and reviews empty, use that
-        if (total === 0 && typeof data.rating_count === "number" && data.rating_count > 0) {
-          byStar[5] = data.rating_count;
-        }
-
-        setCounts(byStar);
-        setTotalReviews(total || data.rating_count || 0);
-        setReviews(sorted);
-        setVisibleCount(PAGE_SIZE);
+        applyReviews(data);
       } catch (err) {
         console.error("Failed to load product reviews for stats", err);
-        setCounts({ 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 });
+        setCounts(EMPTY_COUNTS);
         setTotalReviews(0);
         setReviews([]);
       } finally {
@@ -94,25 +93,7 @@ export default function CustomerReviews({ productId }) {
       setEmail("");
 
       // optimistic refetch of reviews/stats
-      api.get(`/pet-product/${productId}/`).then((res) => {
-        const data = res.data || {};
-        const reviewsArr = Array.isArray(data.reviews) ? data.reviews : [];
-        const sorted = reviewsArr.slice().sort((a, b) => {
-          const ta = a.created ? new Date(a.created).getTime() : 0;
-          const tb = b.created ? new Date(b.created).getTime() : 0;
-          return tb - ta;
-        });
-        // compute counts
-        const byStar = { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 };
-        for (const r of sorted) {
-          const s = Number(r.rating) || 0;
-          if (s >= 1 && s <= 5) byStar[s] = (byStar[s] || 0) + 1;
-        }
-        setCounts(byStar);
-        setTotalReviews(Object.values(byStar).reduce((a, b) => a + b, 0) || data.rating_count || 0);
-        setReviews(sorted);
-        setVisibleCount(PAGE_SIZE);
-      }).catch(() => { /* ignore */ });
+      loadReviews().then(applyReviews).catch(() => { /* ignore */ });
 
     } catch (err) {
       console.error("Submit failed", err);
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function PromoBanner({ apiEndpoint = "/promo-banners/" }) {
   const [banner, setBanner] = useState(null);
@@ -9,8 +9,9 @@ export default function PromoBanner({ apiEndpoint = "/promo-banners/" }) {
     async function fetchBanner() {
       try {
         const res = await api.get(apiEndpoint);
-        if (res.data.length > 0) {
-          setBanner(res.data[0]); // show first banner only
+        const data = listData(res.data);
+        if (data.length > 0) {
+          setBanner(data[0]); // show first banner only
         }
       } catch (err) {
         console.error("Error loading promo banner", err);
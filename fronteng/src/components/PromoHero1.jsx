@@ -1,7 +1,7 @@
 // src/components/PromoHero.jsx
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 import CloudPng from "../assets/cloud.png";
 import UmbrellaIconPng from "../assets/umbrella-icon.png";
@@ -15,7 +15,7 @@ export default function PromoHero1({ apiEndpoint = "/carousal-banner1/" }) {
     async function fetchBanner() {
       try {
         const res = await api.get(apiEndpoint);
-        const data = Array.isArray(res.data) ? res.data : [];
+        const data = listData(res.data);
         if (mounted && data.length > 0) {
           setBanner(data[0]);
         }
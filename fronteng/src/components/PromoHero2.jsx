@@ -1,7 +1,7 @@
 // src/components/PromoHero2.jsx
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function PromoHero2({ apiEndpoint = "/carousal-banner2/" }) {
   const [banner, setBanner] = useState(null);
@@ -11,7 +11,7 @@ export default function PromoHero2({ apiEndpoint = "/carousal-banner2/" }) {
     (async () => {
       try {
         const res = await api.get(apiEndpoint);
-        const data = Array.isArray(res.data) ? res.data : [];
+        const data = listData(res.data);
         if (mounted && data.length > 0) setBanner(data[0]);
       } catch (err) {
         console.error("Failed to fetch banner", err);
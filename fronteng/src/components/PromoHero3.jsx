@@ -1,7 +1,7 @@
 // src/components/PromoHero3.jsx
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function PromoHero3({ apiEndpoint = "/carousal-banner3/" }) {
   const [banner, setBanner] = useState(null);
@@ -11,7 +11,7 @@ export default function PromoHero3({ apiEndpoint = "/carousal-banner3/" }) {
     async function fetchBanner() {
       try {
         const res = await api.get(apiEndpoint);
-        const data = Array.isArray(res.data) ? res.data : [];
+        const data = listData(res.data);
         if (mounted && data.length > 0) setBanner(data[0]);
       } catch (err) {
         console.error("Failed to load promo banner 3", err);
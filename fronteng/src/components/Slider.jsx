@@ -1,6 +1,6 @@
 import React, { useEffect, useLayoutEffect, useRef, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 
 export default function Slider({ apiEndpoint = "/home-categories/", visibleCount = 5 }) {
   const [items, setItems] = useState([]);
@@ -31,7 +31,7 @@ export default function Slider({ apiEndpoint = "/home-categories/", visibleCount
       try {
         const res = await api.get(apiEndpoint);
         if (mounted) {
-          setItems(res.data || []);
+          setItems(listData(res.data));
           // reset index if items change
           setIndex(0);
         }
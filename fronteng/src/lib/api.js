@@ -9,4 +9,8 @@ baseURL: API_BASE,
 });
 
 
+// list endpoints are cursor-paginated: { next, previous, results }
+export const listData = (data) => (Array.isArray(data) ? data : data?.results ?? []);
+
+
 export default api;
\ No newline at end of file
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../lib/api";
+import api, { listData } from "../lib/api";
 import doctorIcon from "../assets/verified1.png";
 import followupIcon from "../assets/followup.png";
 import deliveryIcon from "../assets/medicine-delivery.png";
@@ -41,7 +41,7 @@ export default function ConsultVet() {
         }
 
         if (docsRes.status === "fulfilled") {
-          setDoctors(Array.isArray(docsRes.value.data) ? docsRes.value.data : []);
+          setDoctors(listData(docsRes.value.data));
         } else {
           console.error("Failed to fetch vet-doctors", docsRes.reason);
         }
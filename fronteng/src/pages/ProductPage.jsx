@@ -52,7 +52,7 @@ const j = (p) => `${API_ROOT}${p.startsWith("/") ? p : `/${p}`}`;
     setLoading(true);
 
     api
-      .get(`/pet-product/${id}/`)
+      .get(`/pet-product/${id}/`, { params: { expand: "related" } })
       .then((res) => {
         if (cancelled) return;
         const p = res.data;
@@ -56,7 +56,9 @@ export default function Checkout() {
       if (!buyNow || !buyNowProductId || buyNowProduct) return;
       setLoadingBuyNowProduct(true);
       try {
-        const res = await api.get(`/pet-product/${buyNowProductId}/`);
+        const res = await api.get(`/pet-product/${buyNowProductId}/`, {
+          params: { fields: "id,title,image,price,quantity_display" },
+        });
         if (cancelled) return;
         const p = res.data;
         setBuyNowProduct({